@@ -0,0 +1,32 @@
+# ancine_client/__init__.py
+
+"""
+Cliente Python da API de Dados Abertos da ANCINE.
+
+    from ancine_client import Client
+
+    with Client() as client:
+        # Todas as páginas, a seguir o cursor
+        for lancamento in client.lancamentos(ano_lancamento=2023):
+            ...
+
+        # Pesquisa filtrada para um DataFrame (colunas dos joins achatadas)
+        salas = client.pesquisa_salas({'complexos.uf_complexo': 'SP'}).to_pandas(flatten=True)
+
+        # Tabela inteira (exportação NDJSON em paralelo no servidor) para Arrow
+        obras = client.export('obras').to_arrow()
+
+        # Vários pedidos em simultâneo
+        market_share, por_uf = client.gather(client.market_share, client.salas_por_uf)
+
+Requer o httpx; o pandas e o pyarrow só são precisos para `to_pandas()` e
+`to_arrow()`.
+"""
+
+from .client import DEFAULT_BASE_URL, Client, Export, Page, Query, __version__
+from .errors import ApiError, ExportInterruptedError, RateLimitedError, ServiceUnavailableError
+
+__all__ = [
+    'Client', 'Query', 'Export', 'Page', 'DEFAULT_BASE_URL', '__version__',
+    'ApiError', 'RateLimitedError', 'ServiceUnavailableError', 'ExportInterruptedError'
+]
@@ -0,0 +1,332 @@
+# ancine_client/client.py
+
+"""
+Cliente da API: um método por endpoint.
+
+Os endpoints de listas retornam uma `Query` preguiçosa: nada é pedido até
+ser percorrida, e percorrê-la segue o `next_cursor` página a página (com
+`prefetch`, a página seguinte é pedida enquanto a atual é processada).
+`export()` lê uma tabela inteira de uma só vez em NDJSON, lida em paralelo
+no servidor, e é o caminho mais rápido para cargas completas.
+"""
+
+import itertools
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import frames
+from .errors import ExportInterruptedError
+from .transport import Transport
+
+DEFAULT_BASE_URL = os.environ.get('ANCINE_API_URL', 'https://genuine-flight-472304-e1.rj.r.appspot.com')
+
+# Máximo por página no servidor (MAX_PAGE_SIZE)
+PAGE_SIZE = 100
+
+__version__ = '0.1.0'
+
+
+class Page:
+    """Uma página de registos e a sua paginação."""
+
+    def __init__(self, data, pagination, stale=False):
+        self.data = data
+        self.pagination = pagination or {}
+        # Servida do cache do servidor com o Supabase indisponível (X-Data-Stale)
+        self.stale = stale
+
+    @property
+    def next_cursor(self):
+        return self.pagination.get('next_cursor')
+
+    @property
+    def has_next(self) -> bool:
+        return bool(self.pagination.get('has_next')) and self.next_cursor is not None
+
+    @property
+    def total(self):
+        return self.pagination.get('total_filtered_count')
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f"Page({len(self.data)} registos, next_cursor={self.next_cursor!r})"
+
+
+class Rows:
+    """Resultado iterável registo a registo, também como DataFrame ou tabela Arrow."""
+
+    def pages(self):
+        raise NotImplementedError
+
+    def __iter__(self):
+        for page in self.pages():
+            yield from page
+
+    def to_list(self) -> list:
+        return list(self)
+
+    def to_pandas(self, flatten=False):
+        """DataFrame do pandas (ver frames.to_pandas)."""
+        return frames.to_pandas((list(page) for page in self.pages()), flatten=flatten)
+
+    def to_arrow(self):
+        """Tabela do pyarrow (ver frames.to_arrow)."""
+        return frames.to_arrow(list(page) for page in self.pages())
+
+
+class Query(Rows):
+    """Pesquisa paginada por cursor (`limit`/`last_id`)."""
+
+    def __init__(self, client, path, params, limit=PAGE_SIZE, prefetch=False):
+        self._client = client
+        self.path = path
+        self.params = params
+        self.limit = limit
+        self.prefetch = prefetch
+
+    def _fetch(self, last_id=None) -> Page:
+        data, headers = self._client._transport.get(
+            self.path, {**self.params, 'limit': self.limit, 'last_id': last_id}
+        )
+        return Page(data.get('data', []), data.get('pagination'), headers.get('X-Data-Stale') == 'true')
+
+    def first_page(self) -> Page:
+        return self._fetch()
+
+    def pages(self, max_pages=None):
+        """Gerador das páginas, a seguir o `next_cursor` até à última."""
+        page = self._fetch()
+        count = 1
+        while True:
+            more = page.has_next and (max_pages is None or count < max_pages)
+            following = None
+            if more and self.prefetch:
+                following = self._client._pool('prefetch').submit(self._fetch, str(page.next_cursor))
+            try:
+                yield page
+            except GeneratorExit:
+                # Varrimento abandonado: a página seguinte já não é precisa
+                if following is not None:
+                    following.cancel()
+                raise
+            if not more:
+                return
+            page = following.result() if following is not None else self._fetch(str(page.next_cursor))
+            count += 1
+
+    def __repr__(self):
+        return f"Query({self.path!r}, {self.params!r})"
+
+
+class Export(Rows):
+    """Exportação completa (NDJSON), entregue em páginas de `page_size` registos."""
+
+    def __init__(self, client, table_name, params, page_size=1000):
+        self._client = client
+        self.table_name = table_name
+        self.params = params
+        self.page_size = page_size
+
+    def __iter__(self):
+        lines = self._client._transport.stream_lines(f"/api/v1/export/{self.table_name}", self.params)
+        try:
+            for line in lines:
+                if not line:
+                    continue
+                row = json.loads(line)
+                if row.keys() == {'error', 'rows_exported'}:
+                    raise ExportInterruptedError(row['error'], row['rows_exported'])
+                yield row
+        finally:
+            lines.close()
+
+    def pages(self):
+        rows = iter(self)
+        while True:
+            page = list(itertools.islice(rows, self.page_size))
+            if not page:
+                return
+            yield page
+
+    def __repr__(self):
+        return f"Export({self.table_name!r}, {self.params!r})"
+
+
+def _filters(filters, kwargs) -> dict:
+    # Filtros com ponto (`complexos.uf_complexo`) só cabem no dicionário
+    return {**(filters or {}), **kwargs}
+
+
+class Client:
+    """
+    Cliente da API de Dados Abertos da ANCINE.
+
+    Uma instância mantém um pool de ligações e um cache por ETag; deve ser
+    reutilizada (e partilhada entre threads) em vez de criada por pedido.
+    Os filtros são passados como no URL: por argumento (`ano_lancamento=2023`)
+    ou num dicionário, para os que têm ponto (`{'complexos.uf_complexo': 'SP'}`).
+
+    Opções do transporte: `timeout`, `max_connections`, `http2`, `retries`,
+    `backoff`, `max_backoff`, `cache_size` (0 desliga o cache por ETag) e
+    `headers` (ver transport.Transport).
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, page_size=PAGE_SIZE, prefetch=False,
+                 max_workers=None, **transport_options):
+        transport_options.setdefault('max_connections', 10)
+        headers = {'User-Agent': f"ancine-client/{__version__}", **(transport_options.pop('headers', None) or {})}
+        self._transport = Transport(base_url.rstrip('/'), headers=headers, **transport_options)
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.max_workers = max_workers or transport_options['max_connections']
+        # Pools próprios para gather() e para o prefetch: um gather de Queries
+        # com prefetch não pode ficar à espera de threads do próprio pool
+        self._executors = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._transport.close()
+
+    def _pool(self, name='gather'):
+        with self._lock:
+            if name not in self._executors:
+                self._executors[name] = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=f"ancine-client-{name}"
+                )
+            return self._executors[name]
+
+    def _query(self, path, filters, kwargs, limit=None) -> Query:
+        return Query(self, path, _filters(filters, kwargs), limit or self.page_size, self.prefetch)
+
+    def _get(self, path, params=None):
+        return self._transport.get(path, params)[0]
+
+    # --- Execução em simultâneo ---
+
+    def gather(self, *calls):
+        """
+        Executa as chamadas em simultâneo (no pool do cliente) e retorna os
+        resultados pela mesma ordem. Cada chamada é uma função sem
+        argumentos ou uma Query/Export (lida até ao fim, como lista).
+
+            market_share, por_uf = client.gather(client.market_share, client.salas_por_uf)
+        """
+        futures = [
+            self._pool().submit(call.to_list if isinstance(call, Rows) else call)
+            for call in calls
+        ]
+        return [future.result() for future in futures]
+
+    def stats(self) -> dict:
+        """Pedidos feitos, novas tentativas e respostas 304 servidas do cache."""
+        return self._transport.stats()
+
+    # --- Acesso direto e exportação ---
+
+    def data(self, table_name, filters=None, limit=None, **kwargs) -> Query:
+        """`/api/v1/data/<tabela>`: registos de uma tabela, sem joins."""
+        return self._query(f"/api/v1/data/{table_name}", filters, kwargs, limit)
+
+    def export(self, table_name, filters=None, partitions=None, page_size=1000, **kwargs) -> Export:
+        """
+        `/api/v1/export/<tabela>`: a tabela inteira (filtros por igualdade),
+        por ordem da chave, lida no servidor em `partitions` intervalos em
+        paralelo. Levanta ExportInterruptedError se parar a meio.
+        """
+        params = _filters(filters, kwargs)
+        if partitions is not None:
+            params['partitions'] = partitions
+        return Export(self, table_name, params, page_size)
+
+    # --- Pesquisas com relacionamentos ---
+
+    def pesquisa_salas(self, filters=None, limit=None, **kwargs) -> Query:
+        """`/api/v1/pesquisa-salas`: salas com complexo e exibidor."""
+        return self._query('/api/v1/pesquisa-salas', filters, kwargs, limit)
+
+    def pesquisa_obras(self, filters=None, limit=None, **kwargs) -> Query:
+        """`/api/v1/pesquisa-obras`: obras com países de origem."""
+        return self._query('/api/v1/pesquisa-obras', filters, kwargs, limit)
+
+    def obras(self, filters=None, limit=None, **kwargs) -> Query:
+        """`/api/v1/obras/pesquisa`."""
+        return self._query('/api/v1/obras/pesquisa', filters, kwargs, limit)
+
+    def lancamentos(self, filters=None, limit=None, **kwargs) -> Query:
+        """`/api/v1/lancamentos/pesquisa`: lançamentos com obra e distribuidora."""
+        return self._query('/api/v1/lancamentos/pesquisa', filters, kwargs, limit)
+
+    def filmagem_estrangeira(self, filters=None, limit=None, **kwargs) -> Query:
+        """`/api/v1/producao/filmagem-estrangeira`."""
+        return self._query('/api/v1/producao/filmagem-estrangeira', filters, kwargs, limit)
+
+    def filmagem_estrangeira_por_pais(self, pais_origem, limit=None) -> dict:
+        """`/api/v1/producao/filmagem-estrangeira/pais/<pais>`."""
+        return self._get(f"/api/v1/producao/filmagem-estrangeira/pais/{pais_origem}", {'limit': limit})
+
+    def filmagem_estrangeira_stats(self) -> dict:
+        """`/api/v1/producao/filmagem-estrangeira/stats`."""
+        return self._get('/api/v1/producao/filmagem-estrangeira/stats')
+
+    # --- Estatísticas e KPIs ---
+
+    def salas_por_uf(self) -> list:
+        """`/api/v1/estatisticas/salas_por_uf`."""
+        return self._get('/api/v1/estatisticas/salas_por_uf')
+
+    def obras_por_tipo(self) -> list:
+        """`/api/v1/estatisticas/obras_por_tipo`."""
+        return self._get('/api/v1/estatisticas/obras_por_tipo')
+
+    def obras_estatisticas_por_tipo(self) -> list:
+        """`/api/v1/obras/estatisticas/por_tipo`."""
+        return self._get('/api/v1/obras/estatisticas/por_tipo')
+
+    def market_share(self) -> list:
+        """`/api/v1/estatisticas/market_share`."""
+        return self._get('/api/v1/estatisticas/market_share')
+
+    def ranking_distribuidoras(self) -> list:
+        """`/api/v1/estatisticas/ranking_distribuidoras`."""
+        return self._get('/api/v1/estatisticas/ranking_distribuidoras')
+
+    # --- Estado do serviço ---
+
+    def status_backend(self) -> dict:
+        """`/status/backend`: circuit breaker e contadores por rota."""
+        return self._get('/status/backend')
+
+    def status_admission(self) -> dict:
+        """`/status/admission`: pedidos em curso, em espera e rejeitados."""
+        return self._get('/status/admission')
+
+    def status_settings(self) -> dict:
+        """`/status/settings`: configuração efetiva (requer `X-Admin-Token` em `headers`)."""
+        return self._get('/status/settings')
+
+    def status_queries(self, sort='total', limit=20) -> dict:
+        """`/status/queries`: assinaturas de queries mais custosas (requer `X-Admin-Token`)."""
+        return self._get('/status/queries', {'sort': sort, 'limit': limit})
+
+    def status_query_indexes(self, min_calls=None) -> dict:
+        """`/status/queries/indexes`: sugestões de índices (requer `X-Admin-Token`)."""
+        return self._get('/status/queries/indexes', {'min_calls': min_calls})
+
+    def metrics(self) -> str:
+        """`/metrics`, no formato de exposição do Prometheus."""
+        return self._transport.get_text('/metrics')
@@ -0,0 +1,32 @@
+# ancine_client/errors.py
+
+"""Exceções do cliente."""
+
+
+class ApiError(Exception):
+    """
+    Resposta de erro da API (4xx/5xx), depois de esgotadas as novas
+    tentativas. `payload` é o corpo JSON, se houver (ex.: `partial` num 504).
+    """
+
+    def __init__(self, message, status_code=None, payload=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.payload = payload
+        self.retry_after = retry_after
+
+
+class RateLimitedError(ApiError):
+    """429: limite de pedidos do cliente excedido."""
+
+
+class ServiceUnavailableError(ApiError):
+    """503: servidor sobrecarregado ou Supabase indisponível."""
+
+
+class ExportInterruptedError(ApiError):
+    """A exportação parou a meio (prazo ou falha no servidor)."""
+
+    def __init__(self, message, rows_exported=None):
+        super().__init__(message)
+        self.rows_exported = rows_exported
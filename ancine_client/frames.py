@@ -0,0 +1,39 @@
+# ancine_client/frames.py
+
+"""
+Conversão de páginas de registos em DataFrames do pandas e tabelas Arrow.
+O pandas e o pyarrow são opcionais: só são importados quando usados.
+"""
+
+
+def _import(module, extra):
+    try:
+        return __import__(module)
+    except ImportError:
+        raise ImportError(f"Esta função requer o {module}: pip install {extra}") from None
+
+
+def to_arrow(pages):
+    """
+    Tabela Arrow com todas as páginas (iterável de listas de dicionários).
+    Cada página é convertida ao chegar; os tipos são unificados no fim (uma
+    coluna nula numa página e preenchida noutra, inteiros e decimais).
+    Recursos embutidos (joins) ficam como colunas struct.
+    """
+    pa = _import('pyarrow', 'pyarrow')
+    tables = [pa.Table.from_pylist(page) for page in pages if page]
+    if not tables:
+        return pa.table({})
+    return pa.concat_tables(tables, promote_options='permissive')
+
+
+def to_pandas(pages, flatten=False):
+    """
+    DataFrame com todas as páginas. Com `flatten=True`, os recursos embutidos
+    passam a colunas `recurso.coluna` (como os filtros da API).
+    """
+    pd = _import('pandas', 'pandas')
+    records = [row for page in pages for row in page]
+    if flatten:
+        return pd.json_normalize(records)
+    return pd.DataFrame.from_records(records)
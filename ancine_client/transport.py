@@ -0,0 +1,163 @@
+# ancine_client/transport.py
+
+"""
+Transporte HTTP do cliente: um pool de ligações httpx partilhado (keep-alive,
+HTTP/2 opcional), novas tentativas com backoff exponencial e um cache LRU
+de respostas por ETag.
+
+Cada resposta JSON com ETag fica guardada (corpo em bytes); o pedido
+seguinte ao mesmo URL envia If-None-Match e, se o servidor responder 304,
+o corpo vem do cache sem voltar a ser transferido.
+
+Novas tentativas: falhas de ligação/timeout e respostas 429, 502, 503 e 504,
+até `retries` vezes. A espera é o Retry-After do servidor (se houver) ou um
+backoff exponencial com jitter, limitada a `max_backoff` segundos.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+
+from .errors import ApiError, RateLimitedError, ServiceUnavailableError
+
+RETRY_STATUS = (429, 502, 503, 504)
+
+
+def _error(response):
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = None
+    message = payload.get('error') if isinstance(payload, dict) else None
+    message = message or f"HTTP {response.status_code} em {response.request.url}"
+    retry_after = _retry_after(response)
+    if response.status_code == 429:
+        return RateLimitedError(message, 429, payload, retry_after)
+    if response.status_code == 503:
+        return ServiceUnavailableError(message, 503, payload, retry_after)
+    return ApiError(message, response.status_code, payload, retry_after)
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return None
+
+
+class Transport:
+    """
+    Pedidos GET à API com pool de ligações, novas tentativas e cache por
+    ETag. Pode ser partilhado entre threads.
+    """
+
+    def __init__(self, base_url, timeout=30.0, max_connections=10, http2=False,
+                 retries=3, backoff=0.5, max_backoff=30.0, cache_size=256, headers=None):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache_size = cache_size
+
+        self._http = httpx.Client(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            http2=http2,
+            headers=headers
+        )
+        # (caminho, parâmetros) -> (etag, corpo)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'not_modified': 0}
+
+    def _delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _store(self, key, etag, body):
+        with self._lock:
+            self._cache[key] = (etag, body)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _send(self, path, params, headers=None, stream=False):
+        """Envia o pedido, com novas tentativas; retorna a resposta (2xx ou 304)."""
+        attempt = 0
+        while True:
+            self._count('requests')
+            retry_after = None
+            try:
+                request = self._http.build_request('GET', path, params=params, headers=headers)
+                response = self._http.send(request, stream=stream)
+            except httpx.TransportError:
+                if attempt >= self.retries:
+                    raise
+            else:
+                if response.status_code < 400:
+                    return response
+                if stream:
+                    response.read()
+                    response.close()
+                if response.status_code not in RETRY_STATUS or attempt >= self.retries:
+                    raise _error(response)
+                retry_after = _retry_after(response)
+
+            self._count('retries')
+            time.sleep(self._delay(attempt, retry_after))
+            attempt += 1
+
+    def get(self, path, params=None):
+        """
+        GET com corpo JSON. Retorna (dados, cabeçalhos); com 304 os dados vêm
+        do cache.
+        """
+        params = {k: str(v) for k, v in (params or {}).items() if v is not None}
+        key = (path, tuple(sorted(params.items())))
+        entry = self._cached(key) if self.cache_size else None
+        headers = {'If-None-Match': entry[0]} if entry is not None else None
+
+        response = self._send(path, params, headers)
+        if response.status_code == 304 and entry is not None:
+            self._count('not_modified')
+            return json.loads(entry[1]), response.headers
+
+        etag = response.headers.get('ETag')
+        if etag and self.cache_size:
+            self._store(key, etag, response.content)
+        return response.json(), response.headers
+
+    def get_text(self, path, params=None) -> str:
+        return self._send(path, params).text
+
+    def stream_lines(self, path, params=None):
+        """Gerador das linhas do corpo (ex.: NDJSON), sem o ler inteiro para memória."""
+        params = {k: str(v) for k, v in (params or {}).items() if v is not None}
+        response = self._send(path, params, stream=True)
+        try:
+            yield from response.iter_lines()
+        finally:
+            response.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, 'cached_responses': len(self._cache)}
+
+    def close(self):
+        self._http.close()
@@ -1,81 +1,60 @@
+import logging
+
 from flask import Flask
 from flask_cors import CORS
-from flasgger import Swagger
+
+logger = logging.getLogger(__name__)
 
 def create_app():
     app = Flask(__name__)
     CORS(app)
     
-    # Configuração do Flasgger/Swagger
-    swagger_config = {
-        "headers": [],
-        "specs": [
-            {
-                "endpoint": 'apispec',
-                "route": '/apispec.json',
-                "rule_filter": lambda rule: True,
-                "model_filter": lambda tag: True,
-            }
-        ],
-        "static_url_path": "/flasgger_static",
-        "swagger_ui": True,
-        "specs_route": "/docs/"
-    }
+    # Carrega as configurações (app/config/settings.py); com valores
+    # inválidos a aplicação não arranca (SettingsError com todos os problemas)
+    from .config import settings
+    settings_warnings = settings.validate()
+    app.config.from_object('app.config.settings')
     
-    swagger_template = {
-        "swagger": "2.0",
-        "info": {
-            "title": "API de Dados Abertos da ANCINE",
-            "description": "API centralizada para acesso aos dados públicos da Agência Nacional do Cinema (ANCINE). Permite consultas detalhadas sobre salas de cinema, obras brasileiras, lançamentos comerciais e estatísticas do setor audiovisual.",
-            "version": "1.0.0",
-            "contact": {
-                "name": "API ANCINE",
-                "url": "https://genuine-flight-472304-e1.rj.r.appspot.com"
-            },
-            "license": {
-                "name": "MIT",
-                "url": "https://opensource.org/licenses/MIT"
-            }
-        },
-        "host": "genuine-flight-472304-e1.rj.r.appspot.com",
-        "basePath": "/",
-        "schemes": ["https", "http"],
-        "consumes": ["application/json"],
-        "produces": ["application/json"],
-        "tags": [
-            {
-                "name": "Exibição",
-                "description": "Endpoints relacionados a salas de cinema, complexos e exibidores"
-            },
-            {
-                "name": "Produção", 
-                "description": "Endpoints de obras brasileiras e filmagens estrangeiras"
-            },
-            {
-                "name": "Distribuição",
-                "description": "Endpoints de lançamentos comerciais e dados de bilheteria"
-            },
-            {
-                "name": "KPIs",
-                "description": "Endpoints de estatísticas e indicadores agregados"
-            },
-            {
-                "name": "Acesso Direto",
-                "description": "Endpoints genéricos para acesso direto a tabelas"
-            }
-        ]
-    }
+    # Logging estruturado (JSON) através de uma fila, sem bloquear os pedidos
+    from .services import logging_service
+    logging_service.setup()
+    for warning in settings_warnings:
+        logger.warning(f"Configuração ({settings.APP_PROFILE}): {warning}")
     
-    # Inicializa o Flasgger
-    Swagger(app, config=swagger_config, template=swagger_template)
+    # Documentação: /apispec.json e /docs/ (flasgger só é carregado se necessário)
+    from .docs import register_docs
+    register_docs(app)
     
-    # TODO: Conectar com configurações futuras
-    # app.config.from_object('app.config.settings')
+    # Hooks globais (cabeçalhos de dados desatualizados, etc.)
+    from .middleware import register_middleware
+    register_middleware(app)
+    
+    # Rotas de estado interno (/status/backend, /status/settings, /status/admission, /status/queries)
+    from .status import register_status
+    register_status(app)
     
     # Registra todos os blueprints da API v1
     from .api.v1 import register_blueprints
     register_blueprints(app)
     
+    # Registra os comandos CLI (ex.: flask --app run snapshot build <dir>)
+    from .cli import register_commands
+    register_commands(app)
+    
+    # Aquecimento: snapshot, caches e KPIs pré-calculados
+    from .services.deadline_service import with_deadline
+    from .services.warmup_service import warm_up
+    
+    @app.route('/_ah/warmup')
+    @with_deadline(app.config['WARMUP_DEADLINE_SECONDS'])
+    def warmup():
+        # Handler de warmup do App Engine (requer 'inbound_services: warmup')
+        warm_up()
+        return '', 200
+    
+    if app.config['PRELOAD_WARMUP']:
+        warm_up()
+    
     # Rota de redirecionamento para a documentação
     @app.route('/')
     def home():
@@ -1,31 +1,35 @@
 # app/api/v1/__init__.py
 
+import logging
+
+logger = logging.getLogger(__name__)
+
 # 1. Importar as *variáveis* de blueprint de cada ficheiro de endpoint
 
 # Do seu ficheiro 'data.py' (salas, complexos, estatísticas de salas)
 try:
     from .data import data_bp
 except ImportError:
-    print("Aviso: Blueprint 'data_bp' não encontrado.")
+    logger.warning("Blueprint 'data_bp' não encontrado.")
     data_bp = None
 
 # Das novas fontes de dados
 try:
     from .endpoints_obras import obras_bp
 except ImportError:
-    print("Aviso: Blueprint 'obras_bp' não encontrado.")
+    logger.warning("Blueprint 'obras_bp' não encontrado.")
     obras_bp = None
 
 try:
     from .endpoints_lancamentos import lancamentos_bp
 except ImportError:
-    print("Aviso: Blueprint 'lancamentos_bp' não encontrado.")
+    logger.warning("Blueprint 'lancamentos_bp' não encontrado.")
     lancamentos_bp = None
 
 try:
     from .endpoints_producao import producao_bp
 except ImportError:
-    print("Aviso: Blueprint 'producao_bp' (filmagem) não encontrado.")
+    logger.warning("Blueprint 'producao_bp' (filmagem) não encontrado.")
     producao_bp = None
 
 
@@ -50,4 +54,4 @@ def register_blueprints(app):
     if producao_bp:
         app.register_blueprint(producao_bp, url_prefix='/api/v1/producao')
         
-    print("Blueprints da V1 registados com sucesso.")
\ No newline at end of file
+    logger.info("Blueprints da V1 registados com sucesso.")
\ No newline at end of file
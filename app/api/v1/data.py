@@ -1,5 +1,16 @@
-from flask import Blueprint, jsonify, request
-from app.services.supabase_service import supabase # Importa seu cliente Supabase
+import itertools
+import json
+import logging
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from app.asgi import async_view
+from app.config import settings
+from app.services import deadline_service, lancamento_service, obra_service, sala_service, scan_service
+from app.services.admission_service import admission_priority
+from app.services.deadline_service import with_deadline
+from app.services.ratelimit_service import rate_limit_cost
+from app.services.supabase_service import SupabaseUnavailableError
+from .responses import page_response, respond, respond_async, service_unavailable
 from flask_cors import CORS
 # Remova as importações do google.cloud.firestore
 
@@ -7,6 +18,7 @@ from flask_cors import CORS
 # (Se você refatorou, este pode ser 'salas_bp', 'obras_bp', etc.)
 # (Vou manter 'data_bp' como no seu exemplo)
 data_bp = Blueprint('data_bp', __name__)
+logger = logging.getLogger(__name__)
 CORS(data_bp)
 
 
@@ -71,85 +83,104 @@ def get_table_cursor(table_name):
       500:
         description: Erro interno do servidor.
     """
-    if supabase is None:
-        return jsonify({'error': 'Serviço Supabase não está disponível.'}), 503
-        
+    return respond(
+        sala_service.get_generic_table_data, table_name, request.args.to_dict(),
+        render=page_response, invalid=ValueError  # ex.: "Nome de tabela inválido"
+    )
+
+
+@async_view(get_table_cursor)
+async def get_table_cursor_async(table_name):
+    return await respond_async(
+        sala_service.get_generic_table_data_async, table_name, request.args.to_dict(),
+        render=page_response, invalid=ValueError  # ex.: "Nome de tabela inválido"
+    )
+
+
+@data_bp.route('/export/<string:table_name>', methods=['GET'])
+@admission_priority('expensive')
+@rate_limit_cost(settings.EXPORT_RATE_LIMIT_COST)
+@with_deadline(settings.EXPORT_DEADLINE_SECONDS)
+def export_table(table_name):
+    """
+    Exportação completa de uma tabela (NDJSON)
+    ---
+    tags:
+      - Acesso Direto
+    summary: Todos os registos de uma tabela, um objeto JSON por linha.
+    description: >
+      Exporta a tabela inteira (ou filtrada) por ordem da chave primária, em streaming.
+      A tabela é lida em intervalos da chave primária em paralelo, por isso o tempo de
+      exportação depende da concorrência disponível e não do número de páginas.
+      Se a exportação for interrompida a meio (prazo esgotado, falha do backend), a
+      última linha é um objeto com `error` e `rows_exported`.
+    parameters:
+      - in: path
+        name: table_name
+        required: true
+        schema:
+          type: string
+          enum: ['exibidores', 'complexos', 'salas', 'obras', 'paises_origem', 'distribuidoras', 'lancamentos']
+        description: Nome da tabela a exportar.
+      - in: query
+        name: partitions
+        schema:
+          type: integer
+          default: 8
+          maximum: 64
+        description: Intervalos da chave primária lidos em paralelo.
+    responses:
+      200:
+        description: Registos da tabela, um objeto JSON por linha.
+        content:
+          application/x-ndjson:
+            schema:
+              type: string
+      400:
+        description: Nome de tabela ou parâmetro inválido.
+      503:
+        description: Supabase indisponível.
+    """
     try:
-        # 1. Validação simples do nome da tabela (ATUALIZADO)
-        allowed_tables = [
-            'exibidores', 'complexos', 'salas',
-            'obras', 'paises_origem', 'filmagem_estrangeira'
-            'distribuidoras', 'lancamentos'
-        ]
-        if table_name not in allowed_tables:
-            return jsonify({'error': 'Nome de tabela inválido.'}), 400
-
-        # 2. Parâmetros de paginação e limite
-        limit = min(int(request.args.get('limit', 10)), 100)
-        last_id = request.args.get('last_id') 
-        
-        # 3. Define a Chave Primária correta (ATUALIZADO)
-        primary_key_map = {
-            'exibidores': 'registro_exibidor',
-            'complexos': 'registro_complexo',
-            'salas': 'registro_sala',
-            'obras': 'cpb',
-            'paises_origem': 'id', # Chave SERIAL da tabela
-            'distribuidoras': 'registro_distribuidora',
-            'lancamentos': 'id' # Chave SERIAL da tabela
-        }
-        
-        # O 'get' previne um erro se a tabela for válida
-        # mas não estiver no mapa (embora devesse estar)
-        primary_key_column = primary_key_map.get(table_name)
-        if not primary_key_column:
-             return jsonify({'error': 'Configuração de chave primária não encontrada.'}), 500
-
-        # 4. Constrói a query base
-        query_builder = supabase.table(table_name).select('*', count='exact')
-        
-        # 5. Constrói filtros dinâmicos
-        filter_params = {k: v for k, v in request.args.items() 
-                         if k not in ['limit', 'last_id']}
-        
-        for key, value in filter_params.items():
-            if '.' not in key: 
-                query_builder = query_builder.eq(key, value)
-        
-        # 6. Adiciona ordenação e cursor
-        query_builder = query_builder.order(primary_key_column)
-        if last_id:
-            query_builder = query_builder.gt(primary_key_column, last_id)
-        
-        # 7. Busca (limit + 1) e executa
-        response = query_builder.limit(limit + 1).execute()
-        
-        # 8. Processa os resultados
-        docs_with_extra = response.data
-        total_count = response.count
-        has_next = len(docs_with_extra) > limit
-        docs_for_page = docs_with_extra[:limit]
-        data = docs_for_page
-        
-        # 9. Define o cursor
-        next_cursor = None
-        if has_next and docs_for_page:
-            next_cursor = docs_for_page[-1].get(primary_key_column)
-        
-        return jsonify({
-            'data': data,
-            'pagination': {
-                'total_filtered_count': total_count,
-                'per_page': limit,
-                'next_cursor': next_cursor, 
-                'has_next': has_next
-            }
-        })
+        params = request.args.to_dict()
+        if table_name not in sala_service.PRIMARY_KEY_MAP:
+            raise ValueError("Nome de tabela inválido.")
+        try:
+            partitions = min(max(1, int(params.pop('partitions', settings.SCAN_PARTITIONS))), 64)
+        except ValueError:
+            raise ValueError("partitions deve ser um número inteiro.")
+        # A exportação não pagina: limit/last_id (de um URL de /data) são ignorados
+        filters = {k: v for k, v in params.items() if '.' not in k and k not in ['limit', 'last_id']}
 
+        # A primeira página é lida já: os erros iniciais ainda têm o seu código HTTP
+        pages = scan_service.scan(table_name, sala_service.PRIMARY_KEY_MAP[table_name], filters, partitions)
+        first_page = next(pages, [])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SupabaseUnavailableError as e:
+        return service_unavailable(e)
     except Exception as e:
-        print(f"Erro geral na consulta: {e}") 
+        logger.exception("Erro geral na exportação")
         return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
 
+    return Response(stream_with_context(_export_lines(first_page, pages)), mimetype='application/x-ndjson')
+
+
+def _export_lines(first_page, pages):
+    rows = 0
+    try:
+        for page in itertools.chain([first_page], pages):
+            deadline_service.check('export')
+            yield ''.join(json.dumps(row, ensure_ascii=False, default=str) + '\n' for row in page)
+            rows += len(page)
+            deadline_service.record_progress(rows_exported=rows)
+    except Exception as e:
+        # O estado (200) já foi enviado: a última linha indica a interrupção
+        logger.warning(f"Exportação interrompida após {rows} registos: {e}")
+        yield json.dumps({'error': str(e), 'rows_exported': rows}, ensure_ascii=False) + '\n'
+    finally:
+        pages.close()
+
 
 @data_bp.route('/pesquisa-salas', methods=['GET'])
 def get_salas_com_joins():
@@ -289,59 +320,15 @@ def get_salas_com_joins():
       500:
         description: Erro interno do servidor.
     """
-    if supabase is None:
-        return jsonify({'error': 'Serviço Supabase não está disponível.'}), 503
-        
-    try:
-        # 1. Parâmetros
-        limit = min(int(request.args.get('limit', 10)), 100)
-        last_id = request.args.get('last_id')
-        primary_key_column = 'registro_sala'
-
-        # 2. Query com JOINs
-        select_query = '*, complexos!inner(*, exibidores(*))'
-        query_builder = supabase.table('salas').select(select_query, count='exact')
-        
-        # 3. Filtros
-        filter_params = {k: v for k, v in request.args.items() 
-                         if k not in ['limit', 'last_id']}
-        
-        for key, value in filter_params.items():
-            query_builder = query_builder.eq(key, value)
-        
-        # 4. Paginação
-        query_builder = query_builder.order(primary_key_column) 
-        if last_id:
-            query_builder = query_builder.gt(primary_key_column, last_id)
-        
-        # 5. Executa
-        response = query_builder.limit(limit + 1).execute()
-        
-        # 6. Processa
-        docs_with_extra = response.data
-        total_count = response.count
-        has_next = len(docs_with_extra) > limit
-        docs_for_page = docs_with_extra[:limit]
-        data = docs_for_page
-        
-        next_cursor = None
-        if has_next and docs_for_page:
-            next_cursor = docs_for_page[-1].get(primary_key_column)
-        
-        # 7. Retorna
-        return jsonify({
-            'data': data,
-            'pagination': {
-                'total_filtered_count': total_count,
-                'per_page': limit,
-                'next_cursor': next_cursor, 
-                'has_next': has_next
-            }
-        })
+    return respond(sala_service.get_salas_com_join, request.args.to_dict(), render=page_response)
+
+
+@async_view(get_salas_com_joins)
+async def get_salas_com_joins_async():
+    return await respond_async(
+        sala_service.get_salas_com_join_async, request.args.to_dict(), render=page_response
+    )
 
-    except Exception as e:
-        print(f"Erro geral na consulta: {e}") 
-        return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
 
 # --- NOVOS ENDPOINTS PARA OBRAS E ESTATÍSTICAS ---
 
@@ -467,68 +454,14 @@ def get_obras_com_joins():
       500:
         description: Erro interno do servidor.
     """
-    if supabase is None:
-        return jsonify({'error': 'Serviço Supabase não está disponível.'}), 503
-        
-    try:
-        # 1. Parâmetros
-        limit = min(int(request.args.get('limit', 10)), 100)
-        last_id = request.args.get('last_id')
-        primary_key_column = 'cpb' # Chave primária da tabela 'obras'
-
-        # 2. Query com JOINs
-        # '*, paises_origem(*)' -> Traga tudo da obra E
-        # uma lista de todos os 'paises_origem' relacionados.
-        select_query = '*, paises_origem(*)'
-        
-        # 3. Filtros
-        filter_params = {k: v for k, v in request.args.items() 
-                         if k not in ['limit', 'last_id']}
-
-        # Se houver um filtro na tabela 'paises_origem',
-        # forçamos um 'inner join' para que apenas as obras que 
-        # correspondem ao país sejam retornadas.
-        if any(key.startswith('paises_origem.') for key in filter_params):
-            select_query = '*, paises_origem!inner(*)'
-
-        query_builder = supabase.table('obras').select(select_query, count='exact')
-
-        for key, value in filter_params.items():
-            query_builder = query_builder.eq(key, value)
-        
-        # 4. Paginação
-        query_builder = query_builder.order(primary_key_column)
-        if last_id:
-            query_builder = query_builder.gt(primary_key_column, last_id)
-        
-        # 5. Executa
-        response = query_builder.limit(limit + 1).execute()
-        
-        # 6. Processa
-        docs_with_extra = response.data
-        total_count = response.count
-        has_next = len(docs_with_extra) > limit
-        docs_for_page = docs_with_extra[:limit]
-        data = docs_for_page
-        
-        next_cursor = None
-        if has_next and docs_for_page:
-            next_cursor = docs_for_page[-1].get(primary_key_column)
-        
-        # 7. Retorna
-        return jsonify({
-            'data': data,
-            'pagination': {
-                'total_filtered_count': total_count,
-                'per_page': limit,
-                'next_cursor': next_cursor, 
-                'has_next': has_next
-            }
-        })
+    return respond(obra_service.get_obras_com_join, request.args.to_dict(), render=page_response)
 
-    except Exception as e:
-        print(f"Erro geral na consulta: {e}") 
-        return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
+
+@async_view(get_obras_com_joins)
+async def get_obras_com_joins_async():
+    return await respond_async(
+        obra_service.get_obras_com_join_async, request.args.to_dict(), render=page_response
+    )
 
 
 @data_bp.route('/estatisticas/salas_por_uf', methods=['GET'])
@@ -577,16 +510,14 @@ def get_stats_salas_por_uf():
       500:
         description: Erro interno do servidor.
     """
-    if supabase is None:
-        return jsonify({'error': 'Serviço Supabase não está disponível.'}), 503
-        
-    try:
-        response = supabase.rpc('contar_salas_por_uf').execute()
-        return jsonify(response.data)
+    return respond(sala_service.get_stats_salas_por_uf, context="Erro em /estatisticas/salas_por_uf")
 
-    except Exception as e:
-        print(f"Erro em /estatisticas/salas_por_uf: {e}") 
-        return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
+
+@async_view(get_stats_salas_por_uf)
+async def get_stats_salas_por_uf_async():
+    return await respond_async(
+        sala_service.get_stats_salas_por_uf_async, context="Erro em /estatisticas/salas_por_uf"
+    )
 
 
 @data_bp.route('/estatisticas/obras_por_tipo', methods=['GET'])
@@ -627,16 +558,14 @@ def get_stats_obras_por_tipo():
       500:
         description: Erro interno do servidor.
     """
-    if supabase is None:
-        return jsonify({'error': 'Serviço Supabase não está disponível.'}), 503
-        
-    try:
-        response = supabase.rpc('contar_obras_por_tipo').execute()
-        return jsonify(response.data)
+    return respond(obra_service.get_stats_obras_por_tipo, context="Erro em /estatisticas/obras_por_tipo")
 
-    except Exception as e:
-        print(f"Erro em /estatisticas/obras_por_tipo: {e}") 
-        return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
+
+@async_view(get_stats_obras_por_tipo)
+async def get_stats_obras_por_tipo_async():
+    return await respond_async(
+        obra_service.get_stats_obras_por_tipo_async, context="Erro em /estatisticas/obras_por_tipo"
+    )
 
 
 @data_bp.route('/estatisticas/market_share', methods=['GET'])
@@ -688,12 +617,14 @@ def get_stats_market_share():
       500:
         description: Erro interno do servidor.
     """
-    try:
-        response = supabase.rpc('calcular_market_share_nacional').execute()
-        return jsonify(response.data)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-    
+    return respond(lancamento_service.get_market_share_nacional, context=None)
+
+
+@async_view(get_stats_market_share)
+async def get_stats_market_share_async():
+    return await respond_async(lancamento_service.get_market_share_nacional_async, context=None)
+
+
 @data_bp.route('/estatisticas/ranking_distribuidoras', methods=['GET'])
 def get_stats_ranking_distribuidoras():
     """
@@ -740,8 +671,9 @@ def get_stats_ranking_distribuidoras():
       500:
         description: Erro interno do servidor.
     """
-    try:
-        response = supabase.rpc('ranking_distribuidoras').execute()
-        return jsonify(response.data)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+    return respond(lancamento_service.get_ranking_distribuidoras, context=None)
+
+
+@async_view(get_stats_ranking_distribuidoras)
+async def get_stats_ranking_distribuidoras_async():
+    return await respond_async(lancamento_service.get_ranking_distribuidoras_async, context=None)
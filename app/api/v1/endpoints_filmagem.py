@@ -1,9 +1,12 @@
 # app/api/v1/endpoints_filmagem.py
 
+import logging
+
 from flask import Blueprint, jsonify, request
 from app.services import filmagem_service
 
 filmagem_bp = Blueprint('filmagem_bp', __name__)
+logger = logging.getLogger(__name__)
 
 @filmagem_bp.route('/pesquisa', methods=['GET'])
 def get_filmagens():
@@ -149,5 +152,5 @@ def get_filmagens():
         return jsonify({ 'data': data, 'pagination': pagination })
 
     except Exception as e:
-        print(f"Erro em /pesquisa (filmagem): {e}") 
+        logger.exception("Erro em /pesquisa (filmagem)")
         return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
\ No newline at end of file
@@ -1,5 +1,7 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, request
+from app.asgi import async_view
 from app.services import lancamento_service
+from .responses import page_response, respond, respond_async
 
 lancamentos_bp = Blueprint('lancamentos_bp', __name__)
 
@@ -143,12 +145,15 @@ def get_lancamentos():
       500:
         description: Erro interno do servidor.
     """
-    try:
-        params = request.args.to_dict()
-        data, pagination = lancamento_service.get_lancamentos_com_join(params)
-        
-        return jsonify({ 'data': data, 'pagination': pagination })
+    return respond(
+        lancamento_service.get_lancamentos_com_join, request.args.to_dict(),
+        render=page_response, context="Erro em /pesquisa (lancamentos)"
+    )
 
-    except Exception as e:
-        print(f"Erro em /pesquisa (lancamentos): {e}") 
-        return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
\ No newline at end of file
+
+@async_view(get_lancamentos)
+async def get_lancamentos_async():
+    return await respond_async(
+        lancamento_service.get_lancamentos_com_join_async, request.args.to_dict(),
+        render=page_response, context="Erro em /pesquisa (lancamentos)"
+    )
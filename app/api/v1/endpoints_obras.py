@@ -1,7 +1,9 @@
 # app/api/v1/endpoints_obras.py
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, request
+from app.asgi import async_view
 from app.services import obra_service # Importa o serviço
+from .responses import page_response, respond, respond_async
 
 # Cria um novo Blueprint para este domínio
 obras_bp = Blueprint('obras_bp', __name__)
@@ -137,15 +139,18 @@ def get_obras_com_joins():
       500:
         description: Erro interno do servidor.
     """
-    try:
-        params = request.args.to_dict()
-        data, pagination = obra_service.get_obras_com_join(params)
-        
-        return jsonify({ 'data': data, 'pagination': pagination })
+    return respond(
+        obra_service.get_obras_com_join, request.args.to_dict(),
+        render=page_response, context="Erro em /pesquisa (obras)"
+    )
 
-    except Exception as e:
-        print(f"Erro em /pesquisa (obras): {e}") 
-        return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
+
+@async_view(get_obras_com_joins)
+async def get_obras_com_joins_async():
+    return await respond_async(
+        obra_service.get_obras_com_join_async, request.args.to_dict(),
+        render=page_response, context="Erro em /pesquisa (obras)"
+    )
 
 
 @obras_bp.route('/estatisticas/por_tipo', methods=['GET'])
@@ -186,10 +191,11 @@ def get_stats_obras_por_tipo():
       500:
         description: Erro interno do servidor.
     """
-    try:
-        data = obra_service.get_stats_obras_por_tipo()
-        return jsonify(data)
+    return respond(obra_service.get_stats_obras_por_tipo, context="Erro em /estatisticas/por_tipo")
+
 
-    except Exception as e:
-        print(f"Erro em /estatisticas/por_tipo: {e}") 
-        return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
\ No newline at end of file
+@async_view(get_stats_obras_por_tipo)
+async def get_stats_obras_por_tipo_async():
+    return await respond_async(
+        obra_service.get_stats_obras_por_tipo_async, context="Erro em /estatisticas/por_tipo"
+    )
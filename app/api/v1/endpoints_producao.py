@@ -5,6 +5,8 @@ from flask_cors import CORS
 # ... (outros imports)
 from flask import Blueprint, jsonify, request
 
+from app.config import settings
+
 # from app.services.obra_service import FilmagemService  <-- LINHA INCORRETA
 from app.services.producao_service import filmagem_service_instance as FilmagemService # <-- LINHA CORRETA
 
@@ -131,7 +133,7 @@ def get_filmagem_estrangeira():
     """
     try:
         # Parâmetros de paginação
-        limit = min(int(request.args.get('limit', 10)), 100)
+        limit = min(int(request.args.get('limit', settings.DEFAULT_PAGE_SIZE)), settings.MAX_PAGE_SIZE)
         last_id = request.args.get('last_id')
         
         # Filtros dinâmicos
@@ -216,7 +218,7 @@ def get_filmagem_by_pais(pais_origem):
         description: Erro interno do servidor.
     """
     try:
-        limit = min(int(request.args.get('limit', 10)), 100)
+        limit = min(int(request.args.get('limit', settings.DEFAULT_PAGE_SIZE)), settings.MAX_PAGE_SIZE)
         
         result = FilmagemService.get_filmagens_by_pais(pais_origem, limit)
         
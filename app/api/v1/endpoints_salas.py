@@ -1,11 +1,14 @@
 # app/api/v1/endpoints_salas.py
 
+import logging
+
 from flask import Blueprint, jsonify, request
 # Importa o *serviço* que tem a lógica
 from app.services import sala_service 
 
 # Renomeia o Blueprint para ser mais específico
 salas_bp = Blueprint('salas_bp', __name__)
+logger = logging.getLogger(__name__)
 # O CORS pode ser gerenciado globalmente no app/__init__.py
 
 @salas_bp.route('/<string:table_name>', methods=['GET'])
@@ -82,7 +85,7 @@ def get_table_cursor(table_name):
     except ValueError as e: # Captura o erro "Nome de tabela inválido"
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Erro em /data/{table_name}: {e}") 
+        logger.exception(f"Erro em /data/{table_name}")
         return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
     
 @salas_bp.route('/estatisticas/salas_por_uf', methods=['GET'])
@@ -141,7 +144,7 @@ def get_stats_salas_por_uf():
         return jsonify(response.data)
 
     except Exception as e:
-        print(f"Erro em /estatisticas/salas_por_uf: {e}") 
+        logger.exception("Erro em /estatisticas/salas_por_uf")
         return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
 
 @salas_bp.route('/pesquisa', methods=['GET'])
@@ -293,5 +296,5 @@ def get_salas_com_joins():
         return jsonify({ 'data': data, 'pagination': pagination })
 
     except Exception as e:
-        print(f"Erro em /pesquisa-salas: {e}") 
+        logger.exception("Erro em /pesquisa-salas")
         return jsonify({'error': f"Ocorreu um erro interno: {e}"}), 500
\ No newline at end of file
@@ -0,0 +1,83 @@
+# app/api/v1/responses.py
+
+# Respostas partilhadas pelos blueprints da v1.
+
+import logging
+import math
+
+from flask import jsonify
+
+from app.services.deadline_service import DeadlineExceededError
+from app.services.supabase_service import SupabaseUnavailableError
+
+logger = logging.getLogger(__name__)
+
+
+def gateway_timeout(error):
+    """
+    Resposta 504 para quando o prazo do pedido esgotou, com o progresso
+    feito até esse momento.
+    """
+    response = jsonify({'error': str(error), 'partial': error.progress})
+    response.status_code = 504
+    return response
+
+
+def service_unavailable(error):
+    """
+    Resposta 503 para quando o Supabase não está disponível.
+    Se o circuit breaker estiver aberto, indica quando tentar de novo.
+    Um prazo de pedido esgotado dá 504 (ver gateway_timeout).
+    """
+    if isinstance(error, DeadlineExceededError):
+        return gateway_timeout(error)
+    response = jsonify({'error': str(error)})
+    response.status_code = 503
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after:
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def page_response(result):
+    """Resposta de uma pesquisa paginada: (dados, paginação) dos serviços."""
+    data, pagination = result
+    return jsonify({'data': data, 'pagination': pagination})
+
+
+def error_response(error, context=None, invalid=()):
+    """
+    Resposta para uma exceção da rota: 503/504 para o Supabase indisponível
+    ou prazo esgotado, 400 para as exceções em `invalid` (parâmetros
+    inválidos) e 500 para o resto, registado com `context`; sem `context`,
+    o 500 leva só a mensagem da exceção e não é registado.
+    """
+    if isinstance(error, SupabaseUnavailableError):
+        return service_unavailable(error)
+    if isinstance(error, invalid):
+        return jsonify({'error': str(error)}), 400
+    if context is None:
+        return jsonify({'error': str(error)}), 500
+    logger.exception(context)
+    return jsonify({'error': f"Ocorreu um erro interno: {error}"}), 500
+
+
+def respond(call, *args, render=jsonify, context="Erro geral na consulta", invalid=()):
+    """
+    Corpo comum das rotas de dados: `render(call(*args))` ou a resposta de
+    erro (ver error_response). A versão assíncrona da rota (`@async_view`)
+    usa `respond_async` com os mesmos argumentos e a versão assíncrona do
+    serviço, para as duas darem as mesmas respostas.
+    """
+    try:
+        return render(call(*args))
+    except Exception as e:
+        return error_response(e, context, invalid)
+
+
+async def respond_async(call, *args, render=jsonify, context="Erro geral na consulta", invalid=()):
+    """Como `respond`, com `call` assíncrono (modo ASGI)."""
+    try:
+        return render(await call(*args))
+    except Exception as e:
+        return error_response(e, context, invalid)
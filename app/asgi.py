@@ -0,0 +1,230 @@
+# app/asgi.py
+
+"""
+Modo de serviço assíncrono (ASGI).
+
+`ASGIApp(app)` serve a mesma aplicação Flask (as mesmas rotas, hooks e
+respostas) num servidor ASGI como o uvicorn (ver asgi.py na raiz). Cada
+pedido passa por três fases:
+
+  1. entrada (before_request: request id, tracing, deadline, rate limiting,
+     admissão) numa thread do pool de ASGI_SYNC_THREADS threads;
+  2. a rota: se tiver uma versão assíncrona (registada com `@async_view`),
+     corre no event loop e espera pelo Supabase com o cliente assíncrono,
+     sem ocupar nenhuma thread; as restantes rotas correm no pool;
+  3. saída (after_request, teardown) no pool, e envio da resposta.
+
+As três fases correm no mesmo contexto (contextvars): `request`, `g`, o
+span do pedido e o deadline são os mesmos, tal como no modo WSGI.
+"""
+
+import asyncio
+import contextvars
+import functools
+import io
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import request, request_started
+
+from app.config import settings
+from app.services import supabase_service
+
+logger = logging.getLogger(__name__)
+
+# Rota síncrona -> versão assíncrona
+_async_views = {}
+
+
+def async_view(sync_view):
+    """
+    Decorador: regista a corrotina decorada como a versão assíncrona de
+    `sync_view`, usada no modo ASGI. Recebe os mesmos argumentos e deve
+    retornar a mesma resposta; no modo WSGI continua a correr `sync_view`.
+    """
+    def decorator(func):
+        _async_views[sync_view] = func
+        return func
+    return decorator
+
+
+def build_environ(scope, body: bytes) -> dict:
+    """Environ WSGI (PEP 3333) equivalente a um pedido HTTP ASGI."""
+    script_name = scope.get('root_path', '').encode('utf-8').decode('latin-1')
+    path_info = scope['path'].encode('utf-8').decode('latin-1')
+    if script_name and path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name,
+        'PATH_INFO': path_info,
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'asgi.scope': scope,
+    }
+    client = scope.get('client')
+    if client:
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = client[0], str(client[1])
+
+    for name, value in scope.get('headers', ()):
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'content-length':
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            # Cabeçalhos repetidos são juntos, como num servidor WSGI
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+class ASGIApp:
+    """Adaptador ASGI da aplicação Flask (ver a descrição do módulo)."""
+
+    def __init__(self, app, sync_threads=None):
+        self.app = app
+        if settings.PROFILING_ENABLED:
+            logger.warning("PROFILING_ENABLED não tem efeito no modo ASGI: os pedidos só são perfilados em WSGI.")
+        self.executor = ThreadPoolExecutor(
+            max_workers=sync_threads or settings.ASGI_SYNC_THREADS, thread_name_prefix='asgi-sync'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        else:
+            raise RuntimeError(f"Tipo de ligação ASGI não suportado: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await supabase_service.close_async_client()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        environ = build_environ(scope, await _read_body(receive))
+        context = contextvars.copy_context()
+        status, headers, app_iter = await self._respond(environ, context)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+
+        loop = asyncio.get_running_loop()
+        if isinstance(app_iter, list):
+            await send({'type': 'http.response.body', 'body': b''.join(app_iter)})
+            return
+        # Resposta em streaming: cada bloco é produzido no pool, no contexto
+        # do pedido (o `stream_with_context` volta a ativar o pedido nele)
+        iterator = iter(app_iter)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(
+                    self.executor, functools.partial(context.run, next, iterator, None)
+                )
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(app_iter, 'close'):
+                await loop.run_in_executor(self.executor, functools.partial(context.run, app_iter.close))
+
+    async def _respond(self, environ, context):
+        """
+        O equivalente a `Flask.wsgi_app`: retorna (estado, cabeçalhos, corpo).
+        As fases síncronas correm no pool com `context.run` e a rota
+        assíncrona numa tarefa com o mesmo contexto, uma de cada vez.
+        """
+        loop = asyncio.get_running_loop()
+
+        def in_pool(function, *args):
+            return loop.run_in_executor(self.executor, functools.partial(context.run, function, *args))
+
+        app = self.app
+        request_context = app.request_context(environ)
+        error = None
+        try:
+            try:
+                await in_pool(request_context.push)
+                try:
+                    rv = await self._dispatch(in_pool, context)
+                except Exception as e:
+                    rv = await in_pool(app.handle_user_exception, e)
+                response = await in_pool(app.finalize_request, rv)
+            except Exception as e:
+                error = e
+                response = await in_pool(app.handle_exception, e)
+            return await in_pool(self._wsgi_response, response, environ)
+        finally:
+            if error is not None and app.should_ignore_error(error):
+                error = None
+            await in_pool(request_context.pop, error)
+
+    async def _dispatch(self, in_pool, context):
+        rv, view, view_args = await in_pool(self._preprocess)
+        if rv is not None:
+            return rv
+        if view is None:
+            return await in_pool(self.app.dispatch_request)
+        return await asyncio.get_running_loop().create_task(view(**view_args), context=context)
+
+    def _preprocess(self):
+        """
+        Como o início de `Flask.full_dispatch_request`: sinal e before_request.
+        Retorna (resposta antecipada, versão assíncrona da rota, argumentos).
+        """
+        app = self.app
+        app._got_first_request = True
+        request_started.send(app, _async_wrapper=app.ensure_sync)
+        rv = app.preprocess_request()
+        if rv is not None:
+            return rv, None, None
+
+        # Erros de encaminhamento e OPTIONS automáticos ficam com o Flask
+        rule = request.url_rule
+        if request.routing_exception is not None or rule is None or (
+                getattr(rule, 'provide_automatic_options', False) and request.method == 'OPTIONS'):
+            return None, None, None
+        return None, _async_views.get(app.view_functions[rule.endpoint]), request.view_args
+
+    @staticmethod
+    def _wsgi_response(response, environ):
+        app_iter, status, headers = response.get_wsgi_response(environ)
+        headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        if response.is_sequence:
+            # O caso normal: o corpo já está em memória e segue de uma vez
+            body = b''.join(app_iter)
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+            app_iter = [body]
+        return int(status.split(' ', 1)[0]), headers, app_iter
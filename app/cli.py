@@ -0,0 +1,78 @@
+# app/cli.py
+
+# Comandos de linha de comando (flask --app run <comando>).
+
+import click
+
+from app.services import cache_service, snapshot_service
+from app.services.supabase_service import get_supabase
+
+
+def register_commands(app):
+    """
+    Regista os comandos CLI da aplicação.
+    """
+
+    @app.cli.group('snapshot')
+    def snapshot_group():
+        """Gestão do snapshot Arrow partilhado entre workers."""
+
+    @snapshot_group.command('build')
+    @click.argument('directory')
+    @click.option('--page-size', default=1000, show_default=True, help='Registos por pedido ao Supabase.')
+    def snapshot_build(directory, page_size):
+        """Lê as tabelas do Supabase e grava o snapshot em DIRECTORY."""
+        supabase = get_supabase()
+        if supabase is None:
+            raise click.ClickException("Serviço Supabase não está disponível.")
+
+        tables = snapshot_service.dump_supabase_tables(supabase, page_size=page_size)
+        manifest = snapshot_service.write_snapshot(directory, tables)
+        for table_name, info in manifest['tables'].items():
+            click.echo(f"{table_name}: {info['rows']} registos")
+        click.echo(f"Snapshot '{manifest['version']}' gravado em {directory}.")
+
+    @snapshot_group.command('info')
+    @click.argument('directory')
+    def snapshot_info(directory):
+        """Mostra o manifesto de um snapshot existente."""
+        snapshot = snapshot_service.open_snapshot(directory)
+        click.echo(f"Versão: {snapshot.version}")
+        for table_name, table in snapshot.tables.items():
+            click.echo(f"{table_name}: {table.num_rows} registos, {table.nbytes} bytes (mmap)")
+
+    @app.cli.group('openapi')
+    def openapi_group():
+        """Especificação OpenAPI pré-gerada."""
+
+    @openapi_group.command('build')
+    @click.option('--output', default=None, help='Destino (padrão: OPENAPI_SPEC_FILE).')
+    def openapi_build(output):
+        """Gera a especificação a partir das docstrings (passo de build, antes do deploy)."""
+        from app.docs import write_spec
+
+        output = output or app.config['OPENAPI_SPEC_FILE']
+        spec = write_spec(app, output)
+        click.echo(f"Especificação com {len(spec.get('paths', {}))} rotas gravada em {output}.")
+
+    @app.cli.group('cache')
+    def cache_group():
+        """Cache em memória e em disco."""
+
+    @cache_group.command('warm')
+    def cache_warm():
+        """Aquece o cache (KPIs e primeiras páginas) e grava-o em disco."""
+        from app.services.warmup_service import warm_up
+
+        summary = warm_up()
+        click.echo(f"Versão do dataset: {cache_service.dataset_version()}")
+        click.echo(f"Cache em disco: {app.config['DISK_CACHE_PATH']}")
+        for name, status in {**summary['kpis'], **summary['first_pages']}.items():
+            click.echo(f"{name}: {status}")
+
+    @cache_group.command('clear')
+    def cache_clear():
+        """Apaga todas as entradas do cache (memória e disco)."""
+        cache_service.clear(disk=True)
+        click.echo("Cache apagado.")
+
@@ -1,2 +1,416 @@
-# Configuration settings
-# This file will be used for future configuration needs
\ No newline at end of file
+# app/config/settings.py
+
+# Configurações da aplicação.
+# Carregadas em create_app() via app.config.from_object('app.config.settings')
+# e também importadas diretamente pelos serviços (from app.config import settings).
+#
+# Cada valor vem, por esta ordem, da variável de ambiente com o mesmo nome,
+# dos valores do perfil APP_PROFILE ou do valor padrão abaixo, e é convertido
+# para o seu tipo. Valores inválidos (tipo, intervalo, opções) não param a
+# importação: são reunidos e create_app() recusa arrancar com a lista
+# completa (ver validate()). Os valores efetivos e a sua origem estão em
+# /status/settings, com os segredos mascarados.
+
+import os
+import re
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Carrega o .env (desenvolvimento local). Em produção as variáveis vêm do
+# app.yaml, por isso o python-dotenv só é importado se o ficheiro existir.
+_ENV_FILE = os.path.join(BASE_DIR, ".env")
+if os.path.exists(_ENV_FILE):
+    from dotenv import load_dotenv
+    load_dotenv(_ENV_FILE)
+
+
+class SettingsError(ValueError):
+    """Configuração inválida (uma linha por problema)."""
+
+
+# --- Perfil ---
+# 'production' usa os valores padrão deste ficheiro; 'local' (desenvolvimento)
+# e 'benchmark' (medições reprodutíveis, sem estado entre execuções nem
+# limites de proteção) mudam alguns deles. As variáveis de ambiente mandam
+# sempre sobre o perfil.
+PROFILES = {
+    "production": {},
+    "local": {
+        "LOG_FORMAT": "text",
+        "LOG_LEVEL": "DEBUG",
+        "LOG_SAMPLE_RATE": 1,
+        "RATE_LIMIT_ENABLED": False,
+        "HTTP_PREWARM_CONNECTIONS": 0,
+    },
+    "benchmark": {
+        "LOG_LEVEL": "WARNING",
+        "PRELOAD_WARMUP": False,
+        "DISK_CACHE_ENABLED": False,
+        "RATE_LIMIT_ENABLED": False,
+        "ADMISSION_ENABLED": False,
+        "CAPTURE_ENABLED": False,
+        "HTTP_PREWARM_CONNECTIONS": 0,
+    },
+}
+APP_PROFILE = os.environ.get("APP_PROFILE", "production")
+
+# Origem de cada valor ('env', 'profile' ou 'default') e problemas encontrados
+_sources = {}
+_errors = [] if APP_PROFILE in PROFILES else [
+    f"APP_PROFILE={APP_PROFILE!r}: perfis válidos: {', '.join(PROFILES)}."
+]
+_profile = PROFILES.get(APP_PROFILE, {})
+
+
+def _raw(name, default):
+    if name in os.environ:
+        _sources[name] = "env"
+        return os.environ[name]
+    if name in _profile:
+        _sources[name] = "profile"
+        return _profile[name]
+    _sources[name] = "default"
+    return default
+
+
+def _str(name, default=None):
+    return _raw(name, default)
+
+
+def _bool(name, default):
+    value = _raw(name, default)
+    if isinstance(value, bool):
+        return value
+    if value.strip().lower() in ("1", "true", "yes", "on"):
+        return True
+    if value.strip().lower() not in ("0", "false", "no", "off", ""):
+        _errors.append(f"{name}={value!r}: esperado 1 ou 0.")
+    return False
+
+
+def _number(kind, name, default, minimum, maximum):
+    value = _raw(name, default)
+    try:
+        value = kind(value)
+    except (TypeError, ValueError):
+        _errors.append(f"{name}={value!r}: esperado um número{' inteiro' if kind is int else ''}.")
+        return kind(default)
+    if minimum is not None and value < minimum:
+        _errors.append(f"{name}={value}: o mínimo é {minimum}.")
+    elif maximum is not None and value > maximum:
+        _errors.append(f"{name}={value}: o máximo é {maximum}.")
+    return value
+
+
+def _int(name, default, minimum=0, maximum=None):
+    return _number(int, name, default, minimum, maximum)
+
+
+def _float(name, default, minimum=0, maximum=None):
+    return _number(float, name, default, minimum, maximum)
+
+
+def _choice(name, default, choices):
+    value = _raw(name, default)
+    # Retorna a opção tal como declarada (LOG_FORMAT=JSON -> "json")
+    for choice in choices:
+        if value.lower() == choice.lower():
+            return choice
+    _errors.append(f"{name}={value!r}: opções válidas: {', '.join(choices)}.")
+    return default
+
+
+# --- Supabase ---
+SUPABASE_URL = _str("SUPABASE_URL")
+SUPABASE_KEY = _str("SUPABASE_KEY")
+
+# --- Paginação ---
+# Itens por página quando o pedido não traz `limit` e o máximo aceite.
+DEFAULT_PAGE_SIZE = _int("DEFAULT_PAGE_SIZE", 10, minimum=1)
+MAX_PAGE_SIZE = _int("MAX_PAGE_SIZE", 100, minimum=1)
+
+# --- Snapshot colunar (Arrow IPC) ---
+# Diretório com o snapshot gerado por `flask --app run snapshot build <dir>`.
+# Quando definido, cada worker do Gunicorn faz mmap (somente leitura) dos
+# ficheiros .arrow: todos os processos partilham a mesma cópia física dos
+# dados através da page cache do sistema operativo.
+SNAPSHOT_DIR = _str("SNAPSHOT_DIR")
+
+# --- Cache em memória ---
+# TTL padrão (segundos) das entradas do cache e TTL dos KPIs (funções RPC).
+CACHE_DEFAULT_TTL = _int("CACHE_DEFAULT_TTL", 300)
+KPI_CACHE_TTL = _int("KPI_CACHE_TTL", 3600)
+CACHE_MAX_ENTRIES = _int("CACHE_MAX_ENTRIES", 5000, minimum=1)
+
+# --- Pedidos condicionais (ETag) ---
+# As respostas JSON 200 a GET levam um ETag (hash do corpo); um pedido com
+# If-None-Match igual recebe 304 sem corpo (ver ancine_client/).
+ETAG_ENABLED = _bool("ETAG_ENABLED", True)
+
+# --- Cache em disco (SQLite) ---
+# Guarda KPIs, contagens e primeiras páginas no diretório temporário da
+# instância (o único gravável no App Engine), para que uma instância
+# reiniciada arranque com dados quentes sem chamar o Supabase.
+DISK_CACHE_ENABLED = _bool("DISK_CACHE_ENABLED", True)
+DISK_CACHE_PATH = _str("DISK_CACHE_PATH", os.path.join(tempfile.gettempdir(), "ancine-api-cache.sqlite3")
+)
+DISK_CACHE_TTL = _int("DISK_CACHE_TTL", 86400)
+# Limites do ficheiro (no App Engine o /tmp ocupa memória da instância);
+# acima deles são descartadas as entradas lidas há mais tempo
+DISK_CACHE_MAX_ENTRIES = _int("DISK_CACHE_MAX_ENTRIES", 2000, minimum=1)
+DISK_CACHE_MAX_BYTES = _int("DISK_CACHE_MAX_BYTES", 32 * 1024 * 1024, minimum=1)
+# Ficheiro de cache incluído no deploy, copiado para DISK_CACHE_PATH se este não existir
+DISK_CACHE_SEED_FILE = _str("DISK_CACHE_SEED_FILE")
+# Versão do dataset (chave do cache em disco). Se vazia, usa a versão do snapshot.
+DATASET_VERSION = _str("DATASET_VERSION")
+
+# --- Pré-carregamento da página seguinte ---
+# Desligado por padrão. Ligado, cada página de /data/<tabela> e de
+# /pesquisa-obras com `has_next` lê em segundo plano as PREFETCH_DEPTH
+# páginas seguintes, guardadas por PREFETCH_TTL_SECONDS (no máximo
+# PREFETCH_MAX_PAGES); no máximo PREFETCH_MAX_CONCURRENT varrimentos em
+# simultâneo, e só com o backend e o controlo de admissão folgados.
+PREFETCH_ENABLED = _bool("PREFETCH_ENABLED", False)
+PREFETCH_DEPTH = _int("PREFETCH_DEPTH", 1, minimum=1, maximum=10)
+PREFETCH_MAX_CONCURRENT = _int("PREFETCH_MAX_CONCURRENT", 2, minimum=1)
+PREFETCH_TTL_SECONDS = _float("PREFETCH_TTL_SECONDS", 30, minimum=1)
+PREFETCH_MAX_PAGES = _int("PREFETCH_MAX_PAGES", 200, minimum=1)
+
+# --- Pré-carregamento ---
+# Quando "1", create_app() aquece snapshot, caches e KPIs antes de servir
+# (com `gunicorn --preload` isto acontece uma vez no master, antes do fork).
+PRELOAD_WARMUP = _bool("PRELOAD_WARMUP", False)
+
+# --- Backend: deadline e circuit breaker ---
+# Tempo máximo (segundos) de cada chamada ao Supabase e tamanho do pool onde
+# as chamadas correm (as threads do Gunicorn só esperam até ao deadline).
+BACKEND_TIMEOUT = _float("BACKEND_TIMEOUT", 10, minimum=0.1)
+BACKEND_MAX_WORKERS = _int("BACKEND_MAX_WORKERS", 16, minimum=1)
+# O circuito abre quando, nos últimos BREAKER_WINDOW_SECONDS, houve pelo menos
+# BREAKER_MIN_CALLS chamadas e a fração de falhas atingiu BREAKER_FAILURE_RATE.
+BREAKER_FAILURE_RATE = _float("BREAKER_FAILURE_RATE", 0.5, maximum=1)
+BREAKER_MIN_CALLS = _int("BREAKER_MIN_CALLS", 5, minimum=1)
+BREAKER_WINDOW_SECONDS = _float("BREAKER_WINDOW_SECONDS", 30, minimum=1)
+BREAKER_OPEN_SECONDS = _float("BREAKER_OPEN_SECONDS", 30)
+BREAKER_HALF_OPEN_MAX_CALLS = _int("BREAKER_HALF_OPEN_MAX_CALLS", 1, minimum=1)
+# Intervalo (segundos) entre tentativas de criar o cliente Supabase após uma falha
+CLIENT_RETRY_SECONDS = _float("CLIENT_RETRY_SECONDS", 30)
+
+# --- Backend: transporte HTTP ---
+# Pool de ligações partilhado pelas chamadas ao Supabase (ver
+# http_pool_service): no máximo HTTP_MAX_CONNECTIONS ligações (por omissão, o
+# tamanho do pool do backend), mantidas abertas HTTP_KEEPALIVE_SECONDS sem
+# uso; uma chamada espera no máximo HTTP_POOL_TIMEOUT por uma ligação livre.
+# Com HTTP/2 as chamadas em simultâneo são multiplexadas na mesma ligação.
+# A leitura e a escrita usam BACKEND_TIMEOUT; a ligação, HTTP_CONNECT_TIMEOUT.
+HTTP2_ENABLED = _bool("HTTP2_ENABLED", True)
+HTTP_MAX_CONNECTIONS = _int("HTTP_MAX_CONNECTIONS", BACKEND_MAX_WORKERS, minimum=1)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = _int("HTTP_MAX_KEEPALIVE_CONNECTIONS", HTTP_MAX_CONNECTIONS)
+HTTP_KEEPALIVE_SECONDS = _float("HTTP_KEEPALIVE_SECONDS", 90)
+HTTP_CONNECT_TIMEOUT = _float("HTTP_CONNECT_TIMEOUT", 3, minimum=0.1)
+HTTP_POOL_TIMEOUT = _float("HTTP_POOL_TIMEOUT", 2, minimum=0.01)
+# Pedidos HEAD que abrem ligações no aquecimento e após o fork (0 desativa)
+HTTP_PREWARM_CONNECTIONS = _int("HTTP_PREWARM_CONNECTIONS", 1)
+
+# --- Varrimentos completos e exportação ---
+# Os varrimentos de tabelas inteiras (/export/<tabela>, snapshot build) leem
+# SCAN_PARTITIONS intervalos da chave primária em paralelo, com
+# SCAN_CONCURRENCY threads por varrimento e páginas de SCAN_PAGE_SIZE
+# registos (no máximo SCAN_BUFFER_PAGES à espera por partição). Todos os
+# varrimentos juntos fazem no máximo SCAN_MAX_CONCURRENT_FETCHES leituras em
+# simultâneo (por omissão, metade do pool do backend).
+SCAN_PARTITIONS = _int("SCAN_PARTITIONS", 8, minimum=1, maximum=64)
+SCAN_CONCURRENCY = _int("SCAN_CONCURRENCY", 4, minimum=1)
+SCAN_PAGE_SIZE = _int("SCAN_PAGE_SIZE", 1000, minimum=1)
+SCAN_BUFFER_PAGES = _int("SCAN_BUFFER_PAGES", 2, minimum=1)
+SCAN_MAX_CONCURRENT_FETCHES = _int("SCAN_MAX_CONCURRENT_FETCHES", max(1, BACKEND_MAX_WORKERS // 2), minimum=1)
+# Prazo de uma exportação e o seu custo no rate limiting
+EXPORT_DEADLINE_SECONDS = _float("EXPORT_DEADLINE_SECONDS", 300)
+EXPORT_RATE_LIMIT_COST = _int("EXPORT_RATE_LIMIT_COST", 20, minimum=1)
+
+# --- Novas tentativas e pedidos de cobertura (leituras) ---
+# Tentativas no total (incluindo a primeira) e backoff exponencial com jitter
+RETRY_MAX_ATTEMPTS = _int("RETRY_MAX_ATTEMPTS", 3, minimum=1)
+RETRY_BASE_DELAY = _float("RETRY_BASE_DELAY", 0.1)
+RETRY_MAX_DELAY = _float("RETRY_MAX_DELAY", 2)
+# Orçamento: cada chamada acrescenta RETRY_BUDGET_RATIO fichas (mais
+# RETRY_BUDGET_MIN_PER_SECOND por segundo); cada nova tentativa gasta uma.
+RETRY_BUDGET_RATIO = _float("RETRY_BUDGET_RATIO", 0.1)
+RETRY_BUDGET_MIN_PER_SECOND = _float("RETRY_BUDGET_MIN_PER_SECOND", 0.5)
+RETRY_BUDGET_MAX_TOKENS = _int("RETRY_BUDGET_MAX_TOKENS", 10)
+# Hedging: segundo pedido quando a leitura passa do percentil HEDGE_PERCENTILE
+# das últimas latências da mesma operação (com pelo menos HEDGE_MIN_SAMPLES).
+HEDGE_ENABLED = _bool("HEDGE_ENABLED", False)
+HEDGE_PERCENTILE = _float("HEDGE_PERCENTILE", 95, maximum=100)
+HEDGE_MIN_SAMPLES = _int("HEDGE_MIN_SAMPLES", 20, minimum=1)
+HEDGE_MIN_DELAY = _float("HEDGE_MIN_DELAY", 0.05)
+
+# --- Deadline por pedido ---
+# Prazo (segundos) de cada pedido, partilhado por todas as chamadas ao backend
+# que o pedido faz; esgotado, a resposta é 504. 0 desativa.
+REQUEST_DEADLINE_SECONDS = _float("REQUEST_DEADLINE_SECONDS", 20)
+# Prazo do handler /_ah/warmup, que calcula vários KPIs seguidos
+WARMUP_DEADLINE_SECONDS = _float("WARMUP_DEADLINE_SECONDS", 60)
+
+# --- Rate limiting por cliente ---
+# Balde de RATE_LIMIT_CAPACITY unidades por API key válida (X-API-Key) ou IP, reposto
+# a RATE_LIMIT_REFILL_PER_SECOND unidades/s; cada pedido gasta o seu custo
+# estimado. RATE_LIMIT_STORE: 'memory' (por processo) ou 'redis://host:6379/0'.
+RATE_LIMIT_ENABLED = _bool("RATE_LIMIT_ENABLED", True)
+RATE_LIMIT_CAPACITY = _int("RATE_LIMIT_CAPACITY", 60, minimum=1)
+# Tem de ser positivo: a espera (Retry-After) e a limpeza dos baldes dividem por ele
+RATE_LIMIT_REFILL_PER_SECOND = _float("RATE_LIMIT_REFILL_PER_SECOND", 1, minimum=0.001)
+RATE_LIMIT_STORE = _str("RATE_LIMIT_STORE", "memory")
+# Origem do IP do cliente: 'appengine' (X-AppEngine-User-IP, definido pelo
+# front-end do App Engine), 'forwarded' (o RATE_LIMIT_PROXY_HOPS-ésimo IP a
+# contar do fim do X-Forwarded-For, acrescentado pelos proxies de confiança)
+# ou 'remote' (o endereço da ligação). Os primeiros IPs do X-Forwarded-For
+# vêm do próprio cliente e nunca são usados.
+RATE_LIMIT_CLIENT_IP = _choice("RATE_LIMIT_CLIENT_IP", "appengine" if os.environ.get("GAE_ENV") else "remote",
+                               ("appengine", "forwarded", "remote"))
+RATE_LIMIT_PROXY_HOPS = _int("RATE_LIMIT_PROXY_HOPS", 1, minimum=1)
+# API keys aceites (separadas por vírgulas), cada uma com o seu balde; uma
+# X-API-Key fora desta lista é ignorada e o pedido conta pelo IP
+RATE_LIMIT_API_KEYS = _str("RATE_LIMIT_API_KEYS", "")
+
+# --- Tracing ---
+# TRACE_EXPORTER: 'none', 'console', 'file:<caminho>', 'otlp' ou 'memory'.
+# Fração de pedidos amostrados (um `traceparent` recebido decide por si).
+TRACE_EXPORTER = _str("TRACE_EXPORTER", "none")
+TRACE_SAMPLE_RATE = _float("TRACE_SAMPLE_RATE", 0.1, maximum=1)
+TRACE_OTLP_ENDPOINT = _str("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+
+# --- Rotas de administração ---
+# As rotas de estado com detalhe interno (/status/queries, ...) exigem
+# `X-Admin-Token: <ADMIN_TOKEN>`; sem token configurado ficam fechadas (403).
+ADMIN_TOKEN = _str("ADMIN_TOKEN", "")
+
+# --- Profiling a pedido ---
+# Desligado por padrão (sem custo). Ligado, um pedido com `X-Profile: <token>`
+# é perfilado; PROFILING_SAMPLE_RATE perfila também uma fração dos pedidos
+# e grava os perfis em PROFILE_DIR. PROFILING_MODE: 'cprofile' ou 'sample'.
+PROFILING_ENABLED = _bool("PROFILING_ENABLED", False)
+PROFILING_TOKEN = _str("PROFILING_TOKEN", "")
+PROFILING_MODE = _choice("PROFILING_MODE", "cprofile", ("cprofile", "sample"))
+PROFILING_SAMPLE_RATE = _float("PROFILING_SAMPLE_RATE", 0, maximum=1)
+PROFILING_SAMPLE_INTERVAL = _float("PROFILING_SAMPLE_INTERVAL", 0.001, minimum=0.0001)
+PROFILE_DIR = _str("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "ancine-api-profiles"))
+
+# --- Controlo de admissão ---
+# Pedidos em curso no máximo (as threads restantes do Gunicorn só esperam ou
+# rejeitam). Os pedidos normais deixam ADMISSION_RESERVED_FOR_CHEAP vagas para
+# os baratos (cache) e os caros (páginas seguintes, exportações) ocupam no
+# máximo ADMISSION_EXPENSIVE_MAX. Se a espera estimada passar de
+# ADMISSION_QUEUE_TARGET_MS, o pedido recebe 503 com Retry-After.
+ADMISSION_ENABLED = _bool("ADMISSION_ENABLED", True)
+ADMISSION_MAX_CONCURRENT = _int("ADMISSION_MAX_CONCURRENT", 8, minimum=1)
+ADMISSION_RESERVED_FOR_CHEAP = _int("ADMISSION_RESERVED_FOR_CHEAP", 2)
+ADMISSION_EXPENSIVE_MAX = _int("ADMISSION_EXPENSIVE_MAX", 3, minimum=1)
+ADMISSION_QUEUE_TARGET_MS = _float("ADMISSION_QUEUE_TARGET_MS", 250)
+
+# --- Modo ASGI (asgi.py) ---
+# Servido por um servidor ASGI (uvicorn), as rotas com versão assíncrona
+# esperam pelo Supabase no event loop, sem ocupar uma thread. As partes
+# síncronas do pedido (hooks, rotas sem versão assíncrona, serialização)
+# correm num pool de ASGI_SYNC_THREADS threads. Neste modo,
+# ADMISSION_MAX_CONCURRENT pode (e deve) ser muito maior do que as threads.
+ASGI_SYNC_THREADS = _int("ASGI_SYNC_THREADS", 32, minimum=1)
+
+# --- Logging ---
+# LOG_FORMAT: 'json' (uma linha JSON por registo) ou 'text'. As linhas de
+# acesso de pedidos com sucesso e rápidos são amostradas (LOG_SAMPLE_RATE);
+# erros e pedidos acima de LOG_SLOW_REQUEST_MS são sempre registados. Com a
+# fila de LOG_QUEUE_SIZE registos cheia, os novos são descartados.
+LOG_LEVEL = _choice("LOG_LEVEL", "INFO", ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"))
+LOG_FORMAT = _choice("LOG_FORMAT", "json", ("json", "text"))
+LOG_SAMPLE_RATE = _float("LOG_SAMPLE_RATE", 0.1, maximum=1)
+LOG_SLOW_REQUEST_MS = _float("LOG_SLOW_REQUEST_MS", 1000)
+LOG_QUEUE_SIZE = _int("LOG_QUEUE_SIZE", 10000, minimum=1)
+
+# --- Registo de queries lentas ---
+# Cada chamada ao backend é agregada pela sua assinatura normalizada
+# (/status/queries); acima de SLOW_QUERY_MS é registada como lenta. O
+# conselheiro de índices só considera assinaturas com pelo menos
+# INDEX_ADVISOR_MIN_CALLS execuções.
+QUERY_LOG_ENABLED = _bool("QUERY_LOG_ENABLED", True)
+SLOW_QUERY_MS = _float("SLOW_QUERY_MS", 500)
+QUERY_LOG_MAX_SIGNATURES = _int("QUERY_LOG_MAX_SIGNATURES", 500, minimum=1)
+INDEX_ADVISOR_MIN_CALLS = _int("INDEX_ADVISOR_MIN_CALLS", 20, minimum=1)
+
+# --- Captura de tráfego ---
+# Desligada por padrão. Ligada, cada pedido à API (sem cabeçalhos, corpo nem
+# IP; parâmetros sensíveis mascarados) é gravado como uma linha JSON em
+# CAPTURE_FILE, rodado a cada CAPTURE_MAX_BYTES (CAPTURE_BACKUP_COUNT cópias).
+# Os ficheiros são reproduzidos por `benchmarks/replay.py`.
+CAPTURE_ENABLED = _bool("CAPTURE_ENABLED", False)
+CAPTURE_FILE = _str("CAPTURE_FILE", os.path.join(tempfile.gettempdir(), "ancine-api-traffic.jsonl"))
+CAPTURE_SAMPLE_RATE = _float("CAPTURE_SAMPLE_RATE", 1, maximum=1)
+CAPTURE_MAX_BYTES = _int("CAPTURE_MAX_BYTES", 50 * 1024 * 1024)
+CAPTURE_BACKUP_COUNT = _int("CAPTURE_BACKUP_COUNT", 5)
+
+# --- Documentação (OpenAPI) ---
+# Especificação pré-gerada por `flask --app run openapi build` (passo de build,
+# antes do deploy). Se o ficheiro existir, /apispec.json e /docs/ são servidos
+# a partir dele e o flasgger nem chega a ser importado.
+OPENAPI_SPEC_FILE = _str("OPENAPI_SPEC_FILE", os.path.join(BASE_DIR, "app", "static", "apispec.json")
+)
+OPENAPI_CACHE_MAX_AGE = _int("OPENAPI_CACHE_MAX_AGE", 86400)
+
+
+def validate() -> list:
+    """
+    Verifica a configuração: os problemas de conversão reunidos na
+    importação e as relações entre valores. Levanta SettingsError com todos
+    os problemas; retorna os avisos (configurações válidas mas suspeitas).
+    """
+    errors = list(_errors)
+    if DEFAULT_PAGE_SIZE > MAX_PAGE_SIZE:
+        errors.append(f"DEFAULT_PAGE_SIZE ({DEFAULT_PAGE_SIZE}) é maior do que MAX_PAGE_SIZE ({MAX_PAGE_SIZE}).")
+    if HTTP_MAX_KEEPALIVE_CONNECTIONS > HTTP_MAX_CONNECTIONS:
+        errors.append("HTTP_MAX_KEEPALIVE_CONNECTIONS é maior do que HTTP_MAX_CONNECTIONS.")
+    if RETRY_BASE_DELAY > RETRY_MAX_DELAY:
+        errors.append("RETRY_BASE_DELAY é maior do que RETRY_MAX_DELAY.")
+    if TRACE_EXPORTER not in ("none", "console", "otlp", "memory") and not TRACE_EXPORTER.startswith("file:"):
+        errors.append(f"TRACE_EXPORTER={TRACE_EXPORTER!r}: opções válidas: none, console, file:<caminho>, otlp, memory.")
+    if RATE_LIMIT_STORE != "memory" and not RATE_LIMIT_STORE.startswith(("redis://", "rediss://")):
+        errors.append("RATE_LIMIT_STORE: esperado 'memory' ou um URL redis://.")
+    if errors:
+        raise SettingsError("Configuração inválida:\n  " + "\n  ".join(errors))
+
+    warnings = []
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        warnings.append("SUPABASE_URL/SUPABASE_KEY não definidos: as rotas que chamam o Supabase respondem 503.")
+    if REQUEST_DEADLINE_SECONDS and BACKEND_TIMEOUT >= REQUEST_DEADLINE_SECONDS:
+        warnings.append("BACKEND_TIMEOUT não é menor do que REQUEST_DEADLINE_SECONDS: não há tempo para novas tentativas.")
+    if ADMISSION_RESERVED_FOR_CHEAP >= ADMISSION_MAX_CONCURRENT:
+        warnings.append("ADMISSION_RESERVED_FOR_CHEAP não é menor do que ADMISSION_MAX_CONCURRENT: "
+                        "os pedidos normais só têm uma vaga.")
+    if PROFILING_ENABLED and not PROFILING_TOKEN and not PROFILING_SAMPLE_RATE:
+        warnings.append("PROFILING_ENABLED=1 sem PROFILING_TOKEN nem PROFILING_SAMPLE_RATE: nenhum pedido é perfilado.")
+    return warnings
+
+
+# Valores nunca mostrados em /status/settings
+_SECRET_NAME = re.compile(r"KEY|TOKEN|SECRET|PASSWORD")
+_URL_PASSWORD = re.compile(r"(://[^:/@]*:)[^@]*@")
+
+
+def _public_value(name, value):
+    if isinstance(value, str):
+        if _SECRET_NAME.search(name):
+            return "***" if value else value
+        return _URL_PASSWORD.sub(r"\1***@", value)
+    return value
+
+
+def effective() -> dict:
+    """Valores efetivos e a sua origem, com os segredos mascarados (/status/settings)."""
+    values = globals()
+    return {
+        "profile": APP_PROFILE,
+        "settings": {
+            name: {"value": _public_value(name, values[name]), "source": source}
+            for name, source in sorted(_sources.items())
+        }
+    }
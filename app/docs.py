@@ -0,0 +1,177 @@
+# app/docs.py
+
+"""
+Documentação da API: especificação OpenAPI (/apispec.json) e Swagger UI (/docs/).
+
+O flasgger só é usado para *gerar* a especificação a partir das docstrings.
+Em produção a especificação é pré-gerada no build (flask --app run openapi build)
+e servida como ficheiro estático com cache longo; sem o ficheiro, é gerada no
+primeiro acesso e mantida em memória. Em nenhum dos casos o flasgger é
+importado durante o arranque.
+"""
+
+import importlib.util
+import json
+import os
+import threading
+
+from flask import Response, abort, jsonify, send_file, send_from_directory
+
+# Configuração do Flasgger/Swagger
+SWAGGER_CONFIG = {
+    "headers": [],
+    "specs": [
+        {
+            "endpoint": 'apispec',
+            "route": '/apispec.json',
+            "rule_filter": lambda rule: True,
+            "model_filter": lambda tag: True,
+        }
+    ],
+    "static_url_path": "/flasgger_static",
+    "swagger_ui": True,
+    "specs_route": "/docs/"
+}
+
+SWAGGER_TEMPLATE = {
+    "swagger": "2.0",
+    "info": {
+        "title": "API de Dados Abertos da ANCINE",
+        "description": "API centralizada para acesso aos dados públicos da Agência Nacional do Cinema (ANCINE). Permite consultas detalhadas sobre salas de cinema, obras brasileiras, lançamentos comerciais e estatísticas do setor audiovisual.",
+        "version": "1.0.0",
+        "contact": {
+            "name": "API ANCINE",
+            "url": "https://genuine-flight-472304-e1.rj.r.appspot.com"
+        },
+        "license": {
+            "name": "MIT",
+            "url": "https://opensource.org/licenses/MIT"
+        }
+    },
+    "host": "genuine-flight-472304-e1.rj.r.appspot.com",
+    "basePath": "/",
+    "schemes": ["https", "http"],
+    "consumes": ["application/json"],
+    "produces": ["application/json"],
+    "tags": [
+        {
+            "name": "Exibição",
+            "description": "Endpoints relacionados a salas de cinema, complexos e exibidores"
+        },
+        {
+            "name": "Produção", 
+            "description": "Endpoints de obras brasileiras e filmagens estrangeiras"
+        },
+        {
+            "name": "Distribuição",
+            "description": "Endpoints de lançamentos comerciais e dados de bilheteria"
+        },
+        {
+            "name": "KPIs",
+            "description": "Endpoints de estatísticas e indicadores agregados"
+        },
+        {
+            "name": "Acesso Direto",
+            "description": "Endpoints genéricos para acesso direto a tabelas"
+        }
+    ]
+}
+_SWAGGER_UI_HTML = '''<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+    <link rel="stylesheet" type="text/css" href="{static}/swagger-ui.css">
+    <link rel="icon" type="image/png" href="{static}/favicon-32x32.png" sizes="32x32">
+</head>
+<body>
+    <div id="swagger-ui"></div>
+    <script src="{static}/swagger-ui-bundle.js"></script>
+    <script src="{static}/swagger-ui-standalone-preset.js"></script>
+    <script>
+        window.ui = SwaggerUIBundle({{
+            url: "{spec_url}",
+            dom_id: "#swagger-ui",
+            deepLinking: true,
+            presets: [SwaggerUIBundle.presets.apis, SwaggerUIStandalonePreset],
+            layout: "StandaloneLayout"
+        }});
+    </script>
+</body>
+</html>
+'''
+
+_spec = None
+_spec_lock = threading.Lock()
+
+
+def build_spec(app) -> dict:
+    """
+    Gera a especificação OpenAPI com o flasgger, sem registar as suas rotas.
+    """
+    from flasgger import Swagger
+
+    swagger = Swagger(config=SWAGGER_CONFIG, template=SWAGGER_TEMPLATE)
+    swagger.app = app
+    with app.app_context():
+        return swagger.get_apispecs(SWAGGER_CONFIG['specs'][0]['endpoint'])
+
+
+def write_spec(app, path: str) -> dict:
+    """Gera a especificação e grava-a em `path` (passo de build)."""
+    spec = build_spec(app)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(spec, f, ensure_ascii=False, sort_keys=True)
+    return spec
+
+
+def _swagger_ui_static_dir():
+    """Diretório com os ficheiros do Swagger UI distribuídos com o flasgger."""
+    spec = importlib.util.find_spec('flasgger')
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    return os.path.join(spec.submodule_search_locations[0], 'ui3', 'static')
+
+
+def register_docs(app):
+    """
+    Regista /apispec.json, /docs/ e os ficheiros estáticos do Swagger UI.
+    """
+    spec_route = SWAGGER_CONFIG['specs'][0]['route']
+    static_url_path = SWAGGER_CONFIG['static_url_path']
+    max_age = app.config['OPENAPI_CACHE_MAX_AGE']
+
+    @app.route(spec_route)
+    def apispec():
+        spec_file = app.config['OPENAPI_SPEC_FILE']
+        if spec_file and os.path.exists(spec_file):
+            # Especificação pré-gerada: ficheiro estático com ETag e cache longo
+            return send_file(spec_file, mimetype='application/json',
+                             max_age=max_age, conditional=True, etag=True)
+
+        global _spec
+        if _spec is None:
+            with _spec_lock:
+                if _spec is None:
+                    _spec = build_spec(app)
+        return jsonify(_spec)
+
+    @app.route(SWAGGER_CONFIG['specs_route'])
+    def apidocs():
+        html = _SWAGGER_UI_HTML.format(
+            title=SWAGGER_TEMPLATE['info']['title'],
+            static=static_url_path,
+            spec_url=spec_route
+        )
+        response = Response(html, mimetype='text/html')
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        return response
+
+    @app.route(f"{static_url_path}/<path:filename>")
+    def apidocs_static(filename):
+        static_dir = _swagger_ui_static_dir()
+        if static_dir is None:
+            abort(404)
+        return send_from_directory(static_dir, filename, max_age=max_age)
@@ -0,0 +1,254 @@
+# app/middleware.py
+
+# Hooks executados em todos os pedidos (before_request / after_request).
+
+import random
+import time
+
+from flask import current_app, g, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+
+from app.config import settings
+from app.services import (admission_service, capture_service, deadline_service, logging_service,
+                          metrics_service, profiling_service, ratelimit_service, tracing_service)
+from app.services.admission_service import AdmissionRejected
+
+
+class TracedJSONProvider(DefaultJSONProvider):
+    """Provider JSON do Flask com um span para a codificação da resposta."""
+
+    def dumps(self, obj, **kwargs):
+        with tracing_service.span('response.encode') as span:
+            encoded = super().dumps(obj, **kwargs)
+            span.set_attribute('response.bytes', len(encoded))
+        return encoded
+
+
+def register_middleware(app):
+    """
+    Regista os hooks globais da aplicação.
+    """
+
+    app.json = TracedJSONProvider(app)
+
+    @app.before_request
+    def assign_request_id():
+        # X-Request-ID recebido (ou gerado), incluído em todos os logs do pedido
+        logging_service.assign_request_id()
+
+    @app.before_request
+    def start_request_metrics():
+        metrics_service.http_in_flight.inc()
+        g.metrics_started = time.perf_counter()
+
+    @app.before_request
+    def start_request_trace():
+        # Span raiz do pedido (só se amostrado; continua um `traceparent` recebido)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        g.trace_span = tracing_service.start_trace(
+            f"{request.method} {route}",
+            traceparent=request.headers.get('traceparent'),
+            attributes={'http.method': request.method, 'http.route': route, 'http.target': request.full_path}
+        )
+
+    @app.before_request
+    def start_request_deadline():
+        # Prazo padrão do pedido; rotas com @with_deadline substituem-no
+        deadline_service.start()
+
+    @app.before_request
+    def apply_rate_limit():
+        # Token bucket por cliente; o custo depende da forma do pedido
+        if not settings.RATE_LIMIT_ENABLED or ratelimit_service.is_exempt(request):
+            return None
+        view = current_app.view_functions.get(request.endpoint)
+        g.rate_limit = ratelimit_service.check(request, view)
+        if not g.rate_limit['allowed']:
+            metrics_service.http_rejected.inc(reason='rate_limited')
+            response = jsonify({'error': "Limite de pedidos excedido. Tente novamente mais tarde."})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(g.rate_limit['retry_after'])
+            return response
+        return None
+
+    @app.before_request
+    def admit_request():
+        # Controlo de admissão: rejeita com 503 antes de o pedido ficar em fila
+        if not settings.ADMISSION_ENABLED:
+            return None
+        view = current_app.view_functions.get(request.endpoint)
+        priority = admission_service.classify(request, view)
+        try:
+            g.admission_wait = admission_service.controller.acquire(priority)
+        except AdmissionRejected as e:
+            metrics_service.http_rejected.inc(reason='overloaded')
+            response = jsonify({'error': str(e)})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        metrics_service.http_queue_wait.observe(g.admission_wait, priority=priority)
+        g.admission_priority = priority
+        g.admitted_at = time.monotonic()
+        return None
+
+    @app.teardown_request
+    def release_admission_slot(error=None):
+        priority = g.pop('admission_priority', None)
+        if priority is not None:
+            admission_service.controller.release(priority, time.monotonic() - g.admitted_at)
+
+    @app.teardown_request
+    def finish_request_trace(error=None):
+        span = g.pop('trace_span', None)
+        if span is not None:
+            if error is not None:
+                span.set_error(error)
+            span.end()
+
+    @app.teardown_request
+    def finish_request_metrics(error=None):
+        if g.pop('metrics_started', None) is not None:
+            metrics_service.http_in_flight.dec()
+
+    @app.after_request
+    def record_request_metrics(response):
+        # Rota pelo padrão do URL (ex.: /api/v1/data/<string:table_name>)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        started = g.get('metrics_started')
+        if started is not None:
+            metrics_service.http_request_duration.observe(
+                time.perf_counter() - started, route=route, method=request.method
+            )
+        metrics_service.http_requests.inc(route=route, method=request.method, status=response.status_code)
+        if response.content_length is not None:
+            metrics_service.http_response_size.observe(response.content_length, route=route)
+        metrics_service.http_backend_time.observe(g.get('backend_seconds', 0.0), route=route)
+
+        span = g.get('trace_span')
+        if span is not None and span.trace_id is not None:
+            span.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                span.set_error(Exception(f"HTTP {response.status_code}"))
+            response.headers['X-Trace-Id'] = span.trace_id
+        return response
+
+    @app.after_request
+    def log_request(response):
+        # Linha de acesso estruturada (sucessos rápidos são amostrados)
+        request_id = g.get('request_id')
+        if request_id is not None:
+            response.headers['X-Request-ID'] = request_id
+        started = g.get('metrics_started')
+        if started is not None:
+            logging_service.log_request(response, time.perf_counter() - started)
+        return response
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        # Orçamento restante do cliente (também nas respostas 429)
+        rate_limit = g.get('rate_limit')
+        if rate_limit is not None and rate_limit['remaining'] is not None:
+            response.headers['X-RateLimit-Limit'] = str(rate_limit['limit'])
+            response.headers['X-RateLimit-Remaining'] = str(rate_limit['remaining'])
+            response.headers['X-RateLimit-Cost'] = str(rate_limit['cost'])
+        return response
+
+    @app.after_request
+    def add_stale_data_headers(response):
+        # Dados servidos do cache/snapshot porque o Supabase está indisponível
+        stale_age = g.get('stale_data_age')
+        if stale_age is not None:
+            response.headers['X-Data-Stale'] = 'true'
+            response.headers['X-Data-Age'] = str(int(stale_age))
+        return response
+
+    if settings.ETAG_ENABLED:
+        @app.after_request
+        def add_etag(response):
+            # Pedido condicional: 304 sem corpo se o cliente já tem esta versão
+            if (request.method == 'GET' and response.status_code == 200 and 'ETag' not in response.headers
+                    and not response.is_streamed and not response.direct_passthrough
+                    and response.mimetype == 'application/json'):
+                response.add_etag()
+                response.make_conditional(request)
+            return response
+
+    if settings.PROFILING_ENABLED:
+        _register_profiling(app)
+
+    if settings.CAPTURE_ENABLED:
+        _register_capture(app)
+
+
+def _register_capture(app):
+    """
+    Captura do tráfego para reprodução (só registada com CAPTURE_ENABLED=1).
+    """
+
+    capture_service.setup()
+
+    @app.after_request
+    def capture_request(response):
+        started = g.get('metrics_started')
+        if started is not None:
+            capture_service.capture_request(response, time.perf_counter() - started)
+        return response
+
+
+def _register_profiling(app):
+    """
+    Hooks de profiling a pedido (só registados com PROFILING_ENABLED=1).
+    """
+
+    @app.before_request
+    def start_profiling():
+        # As rotas de estado (incluindo /status/tracemalloc) não são perfiladas
+        if request.path.startswith(('/status/', '/metrics')):
+            return None
+        # No modo ASGI os hooks e a rota correm em threads diferentes do pool
+        # (ou no event loop, partilhado com outros pedidos): o cProfile e a
+        # amostragem seguem uma só thread e não isolariam o pedido
+        if 'asgi.scope' in request.environ:
+            return None
+        requested = 'X-Profile' in request.headers
+        if requested:
+            if not profiling_service.is_authorized(request):
+                return None
+            output = request.headers.get('X-Profile-Output', 'inline')
+        elif settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            output = 'store'
+        else:
+            return None
+
+        profiler = profiling_service.start(request.headers.get('X-Profile-Mode'))
+        if profiler is not None:
+            g.profiler = profiler
+            g.profile_output = output
+        return None
+
+    @app.after_request
+    def finish_profiling(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+
+        route = request.url_rule.rule if request.url_rule is not None else request.path
+        name = f"{request.method} {route}"
+        profile = profiling_service.finish(profiler, name)
+        if g.profile_output == 'store':
+            response.headers['X-Profile-File'] = profiling_service.store(profile, profiler, name)
+            return response
+
+        # Substitui o corpo da resposta pelo perfil
+        profile_response = current_app.response_class(profile, mimetype=profiler.mimetype)
+        profile_response.headers['Content-Disposition'] = f'attachment; filename="profile.{profiler.extension}"'
+        profile_response.headers['X-Profile-Mode'] = profiler.mode
+        profile_response.headers['X-Profiled-Status'] = str(response.status_code)
+        return profile_response
+
+    @app.teardown_request
+    def abort_profiling(error=None):
+        # Pedido terminado sem passar pelo after_request: liberta o profiler
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiling_service.finish(profiler)
@@ -0,0 +1,193 @@
+# app/services/admission_service.py
+
+"""
+Controlo de admissão (load shedding).
+
+A instância F1 tem poucas threads; sob rajadas, os pedidos acumulam-se em
+fila e a latência sobe para todos. O controlador limita o trabalho em curso
+(ADMISSION_MAX_CONCURRENT) e classifica cada pedido por custo:
+
+  - 'cheap':     primeiras páginas sem filtros, KPIs, documentação e estado
+                 (servidos do cache/snapshot);
+  - 'normal':    pesquisas com filtros;
+  - 'expensive': páginas seguintes (varrimentos profundos com `last_id`) e
+                 rotas marcadas com `@admission_priority('expensive')`, como
+                 exportações.
+
+Os pedidos caros só podem ocupar ADMISSION_EXPENSIVE_MAX vagas e os
+normais deixam ADMISSION_RESERVED_FOR_CHEAP vagas livres para os baratos.
+Sem vaga, o pedido espera; se a espera estimada passar do alvo
+(ADMISSION_QUEUE_TARGET_MS) é rejeitado de imediato com 503 e Retry-After,
+antes de ficar preso na fila.
+"""
+
+import math
+import threading
+import time
+
+from app.config import settings
+from app.services import metrics_service
+
+PRIORITIES = ('cheap', 'normal', 'expensive')
+
+# Caminhos sempre baratos (conteúdo estático ou estado em memória)
+CHEAP_PATH_PREFIXES = ('/docs', '/apispec.json', '/flasgger_static', '/status/', '/metrics')
+
+# Parâmetros de query que não são filtros
+_PAGINATION_ARGS = {'limit', 'last_id'}
+
+
+class AdmissionRejected(Exception):
+    """Pedido rejeitado por sobrecarga."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Vagas de trabalho partilhadas, com limites por prioridade e espera
+    limitada. O tempo médio de serviço (EWMA) serve para estimar a espera.
+    """
+
+    def __init__(self, max_concurrent=8, reserved_for_cheap=2, expensive_max=3, queue_target=0.25):
+        self.max_concurrent = max_concurrent
+        self.reserved_for_cheap = reserved_for_cheap
+        self.expensive_max = expensive_max
+        self.queue_target = queue_target
+
+        self._inflight = dict.fromkeys(PRIORITIES, 0)
+        self._waiting = dict.fromkeys(PRIORITIES, 0)
+        self._admitted = dict.fromkeys(PRIORITIES, 0)
+        self._shed = dict.fromkeys(PRIORITIES, 0)
+        self._queue_wait_total = 0.0
+        self._service_time = 0.05  # EWMA (segundos), valor inicial conservador
+        self._cond = threading.Condition()
+
+    def _total_inflight(self):
+        return sum(self._inflight.values())
+
+    def _has_slot(self, priority):
+        total = self._total_inflight()
+        if priority == 'cheap':
+            return total < self.max_concurrent
+        limit = max(1, self.max_concurrent - self.reserved_for_cheap)
+        if priority == 'expensive' and self._inflight['expensive'] >= self.expensive_max:
+            return False
+        return total < limit
+
+    def _estimated_wait(self, priority):
+        # Pedidos à frente: os que já esperam com prioridade igual ou superior
+        rank = PRIORITIES.index(priority)
+        ahead = sum(self._waiting[p] for p in PRIORITIES[:rank + 1]) + 1
+        return ahead * self._service_time / max(1, self.max_concurrent)
+
+    def acquire(self, priority):
+        """
+        Ocupa uma vaga para um pedido com esta prioridade. Retorna o tempo de
+        espera (segundos) ou levanta AdmissionRejected.
+        """
+        started = time.monotonic()
+        with self._cond:
+            if not self._has_slot(priority):
+                estimated = self._estimated_wait(priority)
+                if estimated > self.queue_target:
+                    self._shed[priority] += 1
+                    raise AdmissionRejected(
+                        "Servidor sobrecarregado. Tente novamente em instantes.",
+                        retry_after=max(1, math.ceil(estimated))
+                    )
+
+                give_up_at = started + self.queue_target
+                self._waiting[priority] += 1
+                try:
+                    while not self._has_slot(priority):
+                        left = give_up_at - time.monotonic()
+                        if left <= 0:
+                            self._shed[priority] += 1
+                            raise AdmissionRejected(
+                                "Servidor sobrecarregado. Tente novamente em instantes.",
+                                retry_after=max(1, math.ceil(self._estimated_wait(priority)))
+                            )
+                        self._cond.wait(left)
+                finally:
+                    self._waiting[priority] -= 1
+
+            self._inflight[priority] += 1
+            self._admitted[priority] += 1
+            waited = time.monotonic() - started
+            self._queue_wait_total += waited
+            return waited
+
+    def release(self, priority, service_seconds=None):
+        with self._cond:
+            self._inflight[priority] -= 1
+            if service_seconds is not None:
+                self._service_time = 0.9 * self._service_time + 0.1 * service_seconds
+            self._cond.notify_all()
+
+    def busy(self) -> bool:
+        """Se um pedido normal teria de esperar por uma vaga agora."""
+        with self._cond:
+            return not self._has_slot('normal')
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            admitted = sum(self._admitted.values())
+            return {
+                'max_concurrent': self.max_concurrent,
+                'inflight': dict(self._inflight),
+                'waiting': dict(self._waiting),
+                'admitted': dict(self._admitted),
+                'shed': dict(self._shed),
+                'avg_queue_wait_ms': round(self._queue_wait_total / admitted * 1000, 2) if admitted else 0,
+                'avg_service_time_ms': round(self._service_time * 1000, 2)
+            }
+
+
+controller = AdmissionController(
+    max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+    reserved_for_cheap=settings.ADMISSION_RESERVED_FOR_CHEAP,
+    expensive_max=settings.ADMISSION_EXPENSIVE_MAX,
+    queue_target=settings.ADMISSION_QUEUE_TARGET_MS / 1000
+)
+
+
+metrics_service.Gauge(
+    'ancine_admission_in_flight', 'Pedidos admitidos em curso, por prioridade.', ('priority',),
+    function=lambda: {(p,): n for p, n in controller.snapshot()['inflight'].items()}
+)
+metrics_service.Gauge(
+    'ancine_admission_waiting', 'Pedidos à espera de uma vaga, por prioridade.', ('priority',),
+    function=lambda: {(p,): n for p, n in controller.snapshot()['waiting'].items()}
+)
+metrics_service.Gauge(
+    'ancine_admission_max_concurrent', 'Vagas de trabalho do controlo de admissão.',
+    function=lambda: controller.max_concurrent
+)
+
+
+def admission_priority(priority):
+    """Decorador de rota: fixa a prioridade de admissão da rota."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Prioridade inválida: {priority}")
+
+    def decorator(view):
+        view.admission_priority = priority
+        return view
+    return decorator
+
+
+def classify(request, view=None) -> str:
+    """Prioridade de um pedido, pela rota e pelos parâmetros."""
+    priority = getattr(view, 'admission_priority', None)
+    if priority:
+        return priority
+    if request.path == '/' or request.path.startswith(CHEAP_PATH_PREFIXES):
+        return 'cheap'
+    if request.args.get('last_id'):
+        return 'expensive'
+    if any(key not in _PAGINATION_ARGS for key in request.args):
+        return 'normal'
+    return 'cheap'
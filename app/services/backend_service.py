@@ -0,0 +1,760 @@
+# app/services/backend_service.py
+
+"""
+Execução das chamadas ao backend (Supabase/PostgREST).
+
+Todas as queries e RPCs dos serviços passam por `execute()`, que aplica:
+  - um deadline por chamada (a chamada corre num pool próprio, por isso uma
+    query presa nunca ocupa indefinidamente uma thread do Gunicorn), limitado
+    ao tempo que resta ao pedido (ver deadline_service);
+  - um circuit breaker: quando a taxa de falhas numa janela recente passa do
+    limite, o circuito abre e as chamadas falham de imediato durante
+    BREAKER_OPEN_SECONDS; depois, um número limitado de chamadas de teste
+    (meio-aberto) decide se fecha de novo;
+  - novas tentativas para leituras que falhem por erros transitórios, com
+    backoff exponencial e jitter, limitadas por um orçamento global (para
+    não multiplicar a carga sobre um backend já em dificuldades);
+  - pedidos de cobertura (hedging, HEDGE_ENABLED=1): se uma leitura demorar
+    mais do que o p95 recente da mesma operação, é enviado um segundo pedido
+    igual e usa-se a primeira resposta.
+
+Os contadores por rota (tentativas, coberturas, orçamento esgotado) estão
+disponíveis em `stats()` e na rota /status/backend.
+
+Os serviços descrevem as suas queries como planos (geradores, ver `run`):
+`run()` executa-os com o cliente síncrono e `execute()`, e `run_async()`
+com o cliente assíncrono e `execute_async()`, usado no modo ASGI.
+
+Quando o backend falha, os serviços com cache devolvem o último valor
+conhecido (ver cache_service) e a resposta é marcada como desatualizada.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+from flask import g, has_request_context, request
+
+from app.config import settings
+from app.services import deadline_service, http_pool_service, metrics_service, query_log_service, tracing_service
+from app.services.deadline_service import DeadlineExceededError
+from app.services.supabase_service import SupabaseUnavailableError, get_async_supabase, get_supabase
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamError(SupabaseUnavailableError):
+    """Falha de rede, timeout ou erro 5xx ao chamar o backend."""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CircuitOpenError(SupabaseUnavailableError):
+    """O circuito está aberto: o backend não é chamado."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Códigos do PostgREST/PostgreSQL que indicam indisponibilidade do servidor
+# (e não um erro do pedido, como uma coluna inexistente).
+_UNAVAILABLE_ERROR_CODES = {
+    'PGRST000', 'PGRST001', 'PGRST002', 'PGRST003',  # ligação ao banco / pool
+    '57014',  # query_canceled (statement_timeout)
+    '57P01', '57P02', '57P03',  # servidor a reiniciar / indisponível
+    '53300',  # too_many_connections
+}
+
+
+def is_backend_failure(error: Exception) -> bool:
+    """
+    Indica se a exceção conta como falha do backend para o circuit breaker.
+    Erros do pedido (4xx, filtros inválidos) não contam: o backend respondeu.
+    """
+    if isinstance(error, (UpstreamError, FuturesTimeoutError, TimeoutError, OSError)):
+        return True
+
+    code = getattr(error, 'code', None)
+    if code is not None and not isinstance(error, SupabaseUnavailableError):
+        code = str(code)
+        return code in _UNAVAILABLE_ERROR_CODES or (code.isdigit() and code.startswith('5'))
+
+    # Erros de transporte do httpx (ligação recusada, reset, timeouts)
+    module = type(error).__module__ or ''
+    return module.startswith(('httpx', 'httpcore'))
+
+
+# Erros transitórios em que vale a pena repetir uma leitura. O statement
+# timeout (57014) fica de fora: a mesma query voltaria a esgotar o tempo.
+_RETRYABLE_ERROR_CODES = {
+    '502', '503', '504', '520', '522', '524',  # gateway / Cloudflare
+    'PGRST000', 'PGRST001', 'PGRST002', 'PGRST003',
+    '57P01', '57P02', '57P03', '53300',
+}
+
+
+def is_retryable(error: Exception) -> bool:
+    """Indica se uma leitura que falhou com este erro pode ser repetida."""
+    if isinstance(error, (CircuitOpenError, DeadlineExceededError)):
+        return False
+    if isinstance(error, UpstreamError):
+        return error.retryable
+
+    code = getattr(error, 'code', None)
+    if code is not None:
+        return str(code) in _RETRYABLE_ERROR_CODES
+
+    if isinstance(error, (FuturesTimeoutError, TimeoutError, OSError)):
+        return True
+    module = type(error).__module__ or ''
+    return module.startswith(('httpx', 'httpcore'))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por taxa de falhas numa janela deslizante de tempo.
+
+    Estados: 'closed' (normal), 'open' (falha de imediato) e 'half_open'
+    (deixa passar até `half_open_max_calls` chamadas de teste).
+    """
+
+    def __init__(self, failure_rate=0.5, min_calls=5, window_seconds=30,
+                 open_seconds=30, half_open_max_calls=1):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = 'closed'
+        self._outcomes = deque()  # (instante, sucesso)
+        self._opened_at = None
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+
+    def _trim(self, now):
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def retry_after(self) -> float:
+        """Segundos até o circuito aceitar uma chamada de teste."""
+        if self.state != 'open' or self._opened_at is None:
+            return 0
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    return False
+                self.state = 'half_open'
+                self._half_open_calls = 0
+
+            if self.state == 'half_open':
+                if self._half_open_calls >= self.half_open_max_calls:
+                    return False
+                self._half_open_calls += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == 'half_open':
+                # A chamada de teste correu bem: fecha o circuito
+                self.state = 'closed'
+                self._outcomes.clear()
+            self._outcomes.append((now, True))
+            self._trim(now)
+
+    def release(self):
+        """
+        A chamada terminou sem resultado conclusivo (ex.: o prazo do pedido
+        esgotou antes do timeout do backend): liberta a vaga de teste.
+        """
+        with self._lock:
+            if self.state == 'half_open' and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == 'half_open':
+                self._open(now)
+                return
+            self._outcomes.append((now, False))
+            self._trim(now)
+
+            total = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if total >= self.min_calls and failures / total >= self.failure_rate:
+                self._open(now)
+
+    def _open(self, now):
+        if self.state != 'open':
+            logger.warning(f"Circuit breaker do backend ABERTO por {self.open_seconds}s.")
+        self.state = 'open'
+        self._opened_at = now
+        self._outcomes.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'recent_calls': len(self._outcomes),
+                'recent_failures': sum(1 for _, ok in self._outcomes if not ok),
+                'retry_after': round(self.retry_after(), 1)
+            }
+
+
+class RetryBudget:
+    """
+    Orçamento de novas tentativas: cada chamada deposita `ratio` fichas e cada
+    nova tentativa (ou pedido de cobertura) gasta uma. Com o backend em baixo,
+    as tentativas extra ficam limitadas a ~`ratio` do tráfego em vez de o
+    multiplicarem. `min_per_second` garante algumas tentativas com pouco tráfego.
+    """
+
+    def __init__(self, ratio=0.1, min_per_second=0.5, max_tokens=10):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = float(max_tokens)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated_at) * self.min_per_second)
+        self._updated_at = now
+
+    def deposit(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return round(self._tokens, 2)
+
+
+class LatencyTracker:
+    """Latências recentes das chamadas com sucesso, por operação (rota + recurso)."""
+
+    def __init__(self, max_samples=200):
+        self.max_samples = max_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation, seconds):
+        with self._lock:
+            samples = self._samples.get(operation)
+            if samples is None:
+                samples = self._samples[operation] = deque(maxlen=self.max_samples)
+            samples.append(seconds)
+
+    def percentile(self, operation, percentile, min_samples=1):
+        with self._lock:
+            samples = sorted(self._samples.get(operation, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+breaker = CircuitBreaker(
+    failure_rate=settings.BREAKER_FAILURE_RATE,
+    min_calls=settings.BREAKER_MIN_CALLS,
+    window_seconds=settings.BREAKER_WINDOW_SECONDS,
+    open_seconds=settings.BREAKER_OPEN_SECONDS,
+    half_open_max_calls=settings.BREAKER_HALF_OPEN_MAX_CALLS
+)
+
+retry_budget = RetryBudget(
+    ratio=settings.RETRY_BUDGET_RATIO,
+    min_per_second=settings.RETRY_BUDGET_MIN_PER_SECOND,
+    max_tokens=settings.RETRY_BUDGET_MAX_TOKENS
+)
+
+latencies = LatencyTracker()
+
+# Pool onde as chamadas correm; a thread do pedido espera no máximo o deadline.
+# Um por processo: com preload_app o aquecimento corre no master, e um worker
+# do Gunicorn herdaria o pool sem as threads (as chamadas ficariam em fila
+# até ao timeout).
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=settings.BACKEND_MAX_WORKERS, thread_name_prefix='backend')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+metrics_service.Gauge(
+    'ancine_backend_pool_max_threads', 'Tamanho do pool de chamadas ao backend.',
+    function=lambda: settings.BACKEND_MAX_WORKERS
+)
+metrics_service.Gauge(
+    'ancine_backend_pool_queued_calls', 'Chamadas ao backend à espera de uma thread do pool.',
+    function=lambda: _executor._work_queue.qsize() if _executor_pid == os.getpid() else 0
+)
+metrics_service.Gauge(
+    'ancine_backend_circuit_open', 'Estado do circuit breaker (0 fechado, 0.5 meio-aberto, 1 aberto).',
+    function=lambda: {'closed': 0, 'half_open': 0.5, 'open': 1}[breaker.state]
+)
+metrics_service.Gauge(
+    'ancine_backend_retry_budget_tokens', 'Fichas disponíveis no orçamento de novas tentativas.',
+    function=lambda: retry_budget.available()
+)
+
+# Contadores por rota: chamadas, tentativas, novas tentativas, coberturas...
+_route_stats = {}
+_route_stats_lock = threading.Lock()
+
+_STAT_FIELDS = ('calls', 'attempts', 'retries', 'hedges', 'hedge_wins', 'budget_exhausted', 'failures')
+
+
+def _route_name() -> str:
+    if has_request_context():
+        return request.endpoint or request.path
+    return 'background'
+
+
+def _count(route, field, amount=1):
+    with _route_stats_lock:
+        stats = _route_stats.get(route)
+        if stats is None:
+            stats = _route_stats[route] = dict.fromkeys(_STAT_FIELDS, 0)
+        stats[field] += amount
+    metrics_service.backend_events.inc(amount, route=route, event=field)
+
+
+def stats() -> dict:
+    """Estado do circuit breaker, do orçamento de tentativas, do pool HTTP e contadores por rota."""
+    with _route_stats_lock:
+        routes = {route: dict(counters) for route, counters in _route_stats.items()}
+    return {
+        'breaker': breaker.snapshot(),
+        'retry_budget': retry_budget.available(),
+        'http_pool': http_pool_service.stats(),
+        'routes': routes
+    }
+
+
+def _is_read(query_builder) -> bool:
+    """Selects (GET/HEAD) são leituras; RPCs só se o chamador o indicar."""
+    method = getattr(getattr(query_builder, 'request', None), 'http_method', None)
+    return method in ('GET', 'HEAD')
+
+
+def _operation(route, query_builder):
+    path = getattr(getattr(query_builder, 'request', None), 'path', None)
+    return route, str(path) if path is not None else type(query_builder).__name__
+
+
+def describe(query_builder):
+    """
+    (recurso, forma) de uma chamada, para as métricas: o recurso é a tabela
+    ou 'rpc:<nome>'; a forma indica JOINs (embedded selects) e count='exact'.
+    """
+    config = getattr(query_builder, 'request', None)
+    path = str(getattr(config, 'path', '') or '').rstrip('/')
+    parts = path.split('/')
+    if len(parts) >= 2 and parts[-2] == 'rpc':
+        return f"rpc:{parts[-1]}", 'rpc'
+    resource = parts[-1] if parts[-1] else type(query_builder).__name__
+
+    params = getattr(config, 'params', None)
+    headers = getattr(config, 'headers', None)
+    select = (params.get('select') if params is not None else None) or ''
+    prefer = (headers.get('prefer') if headers is not None else None) or ''
+    shape = 'inner_join' if '!inner' in select else 'join' if '(' in select else 'plain'
+    if 'count=exact' in prefer:
+        shape += '+count'
+    return resource, shape
+
+
+def _backoff_delay(attempt) -> float:
+    """Backoff exponencial com jitter completo."""
+    return random.uniform(0, min(settings.RETRY_MAX_DELAY, settings.RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _hedge_delay(operation):
+    if not settings.HEDGE_ENABLED:
+        return None
+    delay = latencies.percentile(operation, settings.HEDGE_PERCENTILE, settings.HEDGE_MIN_SAMPLES)
+    if delay is None:
+        return None
+    return max(delay, settings.HEDGE_MIN_DELAY)
+
+
+def _timed_call(query_builder, resource, shape):
+    metrics_service.backend_pool_active.inc()
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        response = query_builder.execute()
+        outcome = 'ok'
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics_service.backend_pool_active.dec()
+        metrics_service.backend_duration.observe(elapsed, resource=resource, shape=shape, outcome=outcome)
+    return response, elapsed
+
+
+def _begin_attempt(timeout, route, operation, hedge):
+    """
+    Verificações de uma tentativa (prazo do pedido e circuit breaker) e os
+    seus limites: (timeout, limitado pelo pedido, expira em, cobertura em).
+    """
+    deadline_service.check()
+    if not breaker.allow_request():
+        raise CircuitOpenError(
+            "Serviço Supabase temporariamente indisponível.",
+            retry_after=breaker.retry_after()
+        )
+
+    timeout = settings.BACKEND_TIMEOUT if timeout is None else timeout
+    # A chamada nunca espera mais do que o tempo que resta ao pedido
+    left = deadline_service.remaining()
+    limited_by_request = left is not None and left < timeout
+    if limited_by_request:
+        timeout = max(left, 0)
+
+    _count(route, 'attempts')
+    started = time.monotonic()
+    hedge_at = None
+    if hedge:
+        hedge_delay = _hedge_delay(operation)
+        if hedge_delay is not None and hedge_delay < timeout:
+            hedge_at = started + hedge_delay
+    return timeout, limited_by_request, started + timeout, hedge_at
+
+
+def _attempt_succeeded(route, operation, elapsed, hedge_won):
+    breaker.record_success()
+    latencies.record(operation, elapsed)
+    if hedge_won:
+        _count(route, 'hedge_wins')
+        tracing_service.current_span().set_attribute('db.hedge_won', True)
+
+
+def _attempt_unanswered(error, timeout, limited_by_request):
+    """
+    Levanta o erro de uma tentativa que terminou sem resposta: `error` é a
+    falha da última chamada, ou None se o tempo esgotou com chamadas pendentes.
+    """
+    if error is not None:
+        breaker.record_failure()
+        raise UpstreamError(
+            f"Falha ao contactar o Supabase: {error}", retryable=is_retryable(error)
+        ) from error
+
+    if limited_by_request:
+        # O backend ainda tinha margem: não conta como falha dele
+        breaker.release()
+        raise DeadlineExceededError(
+            "O prazo do pedido esgotou à espera do Supabase.",
+            progress=deadline_service.progress()
+        )
+    breaker.record_failure()
+    raise UpstreamError(f"O Supabase não respondeu em {timeout:g}s.", retryable=True)
+
+
+def _execute_once(query_builder, timeout, route, operation, shape, hedge):
+    """
+    Uma tentativa, com deadline e circuit breaker. Com `hedge`, se a resposta
+    demorar mais do que o p95 recente desta operação, é feito um segundo
+    pedido igual e usa-se o primeiro que responder.
+    """
+    timeout, limited_by_request, expires_at, hedge_at = _begin_attempt(timeout, route, operation, hedge)
+
+    primary = _get_executor().submit(_timed_call, query_builder, *shape)
+    pending = {primary}
+    error = None
+    while pending:
+        now = time.monotonic()
+        if now >= expires_at:
+            break
+        wait_until = expires_at if hedge_at is None else min(expires_at, hedge_at)
+        done, pending = wait(pending, timeout=max(0, wait_until - now), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            if future.exception() is None:
+                response, elapsed = future.result()
+                for other in pending:
+                    other.cancel()
+                _attempt_succeeded(route, operation, elapsed, hedge_won=future is not primary)
+                return response
+            error = future.exception()
+            if not is_backend_failure(error):
+                # Erro do pedido (ex.: filtro inválido): o backend respondeu
+                breaker.record_success()
+                raise error
+
+        if hedge_at is not None and time.monotonic() >= hedge_at:
+            hedge_at = None
+            if pending and retry_budget.try_withdraw():
+                _count(route, 'hedges')
+                pending.add(_get_executor().submit(_timed_call, query_builder, *shape))
+
+    for future in pending:
+        future.cancel()
+    _attempt_unanswered(error if not pending else None, timeout, limited_by_request)
+
+
+def _prepare_call(query_builder, idempotent):
+    """Preparação comum a `execute` e `execute_async`."""
+    if idempotent is None:
+        idempotent = _is_read(query_builder)
+    if hasattr(query_builder, 'retry'):
+        # O retry interno do postgrest dorme até 30s em 503/520, sem orçamento
+        # nem deadline: as novas tentativas ficam a cargo desta função.
+        query_builder = query_builder.retry(False)
+
+    route = _route_name()
+    operation = _operation(route, query_builder)
+    shape = describe(query_builder)
+    _count(route, 'calls')
+    retry_budget.deposit()
+
+    span = tracing_service.span(
+        'backend.execute', kind=tracing_service.KIND_CLIENT,
+        **{'db.resource': shape[0], 'db.shape': shape[1]}
+    )
+    return query_builder, idempotent, route, operation, shape, span
+
+
+def _finish_call(query_builder, started, ok):
+    elapsed = time.perf_counter() - started
+    # Tempo total do pedido à espera do backend (métrica por rota)
+    if has_request_context():
+        g.backend_seconds = g.get('backend_seconds', 0.0) + elapsed
+    # Assinatura normalizada da query para o registo de queries lentas
+    query_log_service.record(query_builder, elapsed, ok=ok)
+
+
+def execute(query_builder, timeout=None, idempotent=None):
+    """
+    Executa `query_builder.execute()` com deadline e circuit breaker.
+    Leituras (selects, ou RPCs com `idempotent=True`) que falhem por um erro
+    transitório são repetidas com backoff exponencial e jitter, dentro do
+    orçamento de tentativas e do prazo do pedido.
+    Retorna a resposta do postgrest (com .data e .count).
+    """
+    query_builder, idempotent, route, operation, shape, span = _prepare_call(query_builder, idempotent)
+    started = time.perf_counter()
+    ok = False
+    try:
+        with span:
+            response = _execute_with_retries(query_builder, timeout, route, operation, shape, idempotent)
+            if isinstance(getattr(response, 'data', None), list):
+                span.set_attribute('db.rows', len(response.data))
+            ok = True
+            return response
+    finally:
+        _finish_call(query_builder, started, ok)
+
+
+def _retry_delay(error, idempotent, attempt, route):
+    """Espera (s) antes de repetir a chamada que falhou, ou None se o erro deve subir."""
+    if not (idempotent and is_retryable(error)) or attempt + 1 >= settings.RETRY_MAX_ATTEMPTS:
+        if is_backend_failure(error) or isinstance(error, SupabaseUnavailableError):
+            _count(route, 'failures')
+        return None
+
+    delay = _backoff_delay(attempt)
+    left = deadline_service.remaining()
+    if left is not None and left <= delay:
+        return None
+    if not retry_budget.try_withdraw():
+        _count(route, 'budget_exhausted')
+        _count(route, 'failures')
+        return None
+
+    _count(route, 'retries')
+    return delay
+
+
+def _execute_with_retries(query_builder, timeout, route, operation, shape, idempotent):
+    attempt = 0
+    while True:
+        try:
+            response = _execute_once(query_builder, timeout, route, operation, shape, hedge=idempotent)
+            break
+        except Exception as e:
+            delay = _retry_delay(e, idempotent, attempt, route)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            attempt += 1
+            tracing_service.current_span().set_attribute('db.attempts', attempt + 1)
+
+    deadline_service.count_backend_call()
+    return response
+
+
+# --- Modo assíncrono (ASGI) ---
+
+async def _timed_call_async(query_builder, resource, shape):
+    metrics_service.backend_pool_active.inc()
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        response = await query_builder.execute()
+        outcome = 'ok'
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics_service.backend_pool_active.dec()
+        metrics_service.backend_duration.observe(elapsed, resource=resource, shape=shape, outcome=outcome)
+    return response, elapsed
+
+
+async def _execute_once_async(query_builder, timeout, route, operation, shape, hedge):
+    """Como `_execute_once`, com a chamada (e a de cobertura) como tarefas do event loop."""
+    timeout, limited_by_request, expires_at, hedge_at = _begin_attempt(timeout, route, operation, hedge)
+
+    primary = asyncio.ensure_future(_timed_call_async(query_builder, *shape))
+    pending = {primary}
+    error = None
+    try:
+        while pending:
+            now = time.monotonic()
+            if now >= expires_at:
+                break
+            wait_until = expires_at if hedge_at is None else min(expires_at, hedge_at)
+            done, pending = await asyncio.wait(pending, timeout=max(0, wait_until - now),
+                                               return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task.exception() is None:
+                    response, elapsed = task.result()
+                    _attempt_succeeded(route, operation, elapsed, hedge_won=task is not primary)
+                    return response
+                error = task.exception()
+                if not is_backend_failure(error):
+                    breaker.record_success()
+                    raise error
+
+            if hedge_at is not None and time.monotonic() >= hedge_at:
+                hedge_at = None
+                if pending and retry_budget.try_withdraw():
+                    _count(route, 'hedges')
+                    pending.add(asyncio.ensure_future(_timed_call_async(query_builder, *shape)))
+    finally:
+        # Ao contrário das threads, a chamada HTTP pendente é mesmo interrompida
+        for task in pending:
+            task.cancel()
+    _attempt_unanswered(error if not pending else None, timeout, limited_by_request)
+
+
+async def execute_async(query_builder, timeout=None, idempotent=None):
+    """
+    Versão assíncrona de `execute()`, para os builders do cliente assíncrono
+    (`execute()` é uma corrotina): o mesmo deadline, circuit breaker, novas
+    tentativas e cobertura, sem ocupar uma thread enquanto espera.
+    """
+    query_builder, idempotent, route, operation, shape, span = _prepare_call(query_builder, idempotent)
+    started = time.perf_counter()
+    ok = False
+    try:
+        with span:
+            response = await _execute_with_retries_async(query_builder, timeout, route, operation, shape, idempotent)
+            if isinstance(getattr(response, 'data', None), list):
+                span.set_attribute('db.rows', len(response.data))
+            ok = True
+            return response
+    finally:
+        _finish_call(query_builder, started, ok)
+
+
+async def _execute_with_retries_async(query_builder, timeout, route, operation, shape, idempotent):
+    attempt = 0
+    while True:
+        try:
+            response = await _execute_once_async(query_builder, timeout, route, operation, shape, hedge=idempotent)
+            break
+        except Exception as e:
+            delay = _retry_delay(e, idempotent, attempt, route)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+            tracing_service.current_span().set_attribute('db.attempts', attempt + 1)
+
+    deadline_service.count_backend_call()
+    return response
+
+
+# --- Planos de queries ---
+
+class Call:
+    """Chamada pedida por um plano, com os argumentos de `execute()`."""
+
+    __slots__ = ('query_builder', 'timeout', 'idempotent')
+
+    def __init__(self, query_builder, timeout=None, idempotent=None):
+        self.query_builder = query_builder
+        self.timeout = timeout
+        self.idempotent = idempotent
+
+
+def _as_call(step):
+    return step if isinstance(step, Call) else Call(step)
+
+
+def run(plan, *args):
+    """
+    Executa um plano de queries com o cliente síncrono. Um plano é um gerador
+    `plan(supabase, *args)` que faz `yield` de cada query builder (ou de um
+    `Call`, para passar timeout/idempotent) e recebe a resposta de volta; o
+    valor retornado pelo gerador é o resultado. Assim a mesma lógica serve o
+    modo síncrono (`run`) e o assíncrono (`run_async`).
+    """
+    steps = plan(get_supabase(), *args)
+    response = None
+    try:
+        while True:
+            call = _as_call(steps.send(response))
+            response = execute(call.query_builder, call.timeout, call.idempotent)
+    except StopIteration as done:
+        return done.value
+    finally:
+        steps.close()
+
+
+async def run_async(plan, *args):
+    """Executa um plano de queries (ver `run`) com o cliente assíncrono."""
+    steps = plan(await get_async_supabase(), *args)
+    response = None
+    try:
+        while True:
+            call = _as_call(steps.send(response))
+            response = await execute_async(call.query_builder, call.timeout, call.idempotent)
+    except StopIteration as done:
+        return done.value
+    finally:
+        steps.close()
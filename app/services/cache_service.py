@@ -0,0 +1,397 @@
+# app/services/cache_service.py
+
+"""
+Cache em dois níveis: memória (por processo) e disco (SQLite).
+
+O nível em memória tem expiração por TTL. Quando a aplicação é pré-carregada
+no master do Gunicorn, o cache aquecido antes do fork é partilhado pelos
+workers via copy-on-write.
+
+Entradas expiradas não são apagadas de imediato: se o backend falhar, o
+último valor conhecido é devolvido e a resposta é marcada como desatualizada.
+
+As entradas marcadas com `persist=True` (KPIs, contagens e primeiras páginas)
+também são gravadas num ficheiro SQLite no diretório temporário da instância,
+com chave pela versão do dataset. Uma instância reiniciada (ex.: após escalar
+para zero) encontra estes valores no disco e não precisa de ir ao Supabase.
+No App Engine o /tmp ocupa memória, por isso o ficheiro também é limitado
+(DISK_CACHE_MAX_ENTRIES e DISK_CACHE_MAX_BYTES, descartando as entradas
+usadas há mais tempo) e as entradas expiradas há mais de DISK_CACHE_TTL são
+apagadas.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from flask import g, has_request_context
+
+from app.config import settings
+from app.services import metrics_service, tracing_service
+from app.services.supabase_service import SupabaseUnavailableError
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+_store = {}
+_lock = threading.Lock()
+
+_disk = None
+_disk_checked = False
+_disk_lock = threading.Lock()
+
+# Versão do esquema da tabela SQLite (PRAGMA user_version)
+_DISK_SCHEMA_VERSION = 2
+
+
+# --- Versão do dataset ---
+
+def dataset_version() -> str:
+    """
+    Versão dos dados usada nas chaves do cache em disco: DATASET_VERSION,
+    senão a versão do snapshot Arrow, senão 'default'.
+    """
+    if settings.DATASET_VERSION:
+        return settings.DATASET_VERSION
+    from app.services.snapshot_service import get_snapshot
+    snapshot = get_snapshot()
+    if snapshot is not None and snapshot.version:
+        return str(snapshot.version)
+    return 'default'
+
+
+# --- Nível em disco (SQLite) ---
+
+def _open_disk():
+    """Abre (uma vez por processo) a base SQLite do cache em disco."""
+    global _disk, _disk_checked
+    if _disk_checked:
+        return _disk
+
+    with _disk_lock:
+        if _disk_checked:
+            return _disk
+        _disk_checked = True
+        if not settings.DISK_CACHE_ENABLED:
+            return None
+
+        path = settings.DISK_CACHE_PATH
+        try:
+            # Um ficheiro de cache incluído no deploy pode servir de semente
+            seed = settings.DISK_CACHE_SEED_FILE
+            if seed and os.path.exists(seed) and not os.path.exists(path):
+                shutil.copyfile(seed, path)
+
+            connection = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+            # WAL permite leituras concorrentes de vários workers
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            if connection.execute('PRAGMA user_version').fetchone()[0] != _DISK_SCHEMA_VERSION:
+                # Esquema anterior (ou ficheiro novo): o cache é descartável
+                connection.execute('DROP TABLE IF EXISTS cache')
+                connection.execute(f'PRAGMA user_version = {_DISK_SCHEMA_VERSION}')
+            # `ttl` é o TTL em memória da entrada (repõe-na com o mesmo TTL) e
+            # `accessed_at` a última leitura (para descartar as menos usadas)
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                ' key TEXT PRIMARY KEY, version TEXT NOT NULL, value TEXT NOT NULL,'
+                ' size INTEGER NOT NULL, ttl REAL, stored_at REAL NOT NULL,'
+                ' expires_at REAL, accessed_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)')
+            # Entradas de outras versões do dataset já não servem
+            connection.execute('DELETE FROM cache WHERE version != ?', (dataset_version(),))
+            _disk = connection
+        except Exception as e:
+            logger.warning(f"Cache em disco indisponível ({path}): {e}")
+            _disk = None
+    return _disk
+
+
+metrics_service.Gauge(
+    'ancine_cache_entries', 'Entradas no cache em memória.',
+    function=lambda: len(_store)
+)
+
+
+def _disk_key(key) -> str:
+    return json.dumps(key, sort_keys=True, default=str, ensure_ascii=False)
+
+
+def _disk_get(key, allow_expired=False):
+    """
+    Lê uma entrada do disco. Retorna (valor, TTL em memória) ou, com
+    `allow_expired=True`, também entradas expiradas como (valor, idade em
+    segundos).
+    """
+    connection = _open_disk()
+    if connection is None:
+        return _MISSING
+    now = time.time()
+    disk_key = _disk_key(key)
+    try:
+        with _disk_lock:
+            row = connection.execute(
+                'SELECT value, ttl, stored_at, expires_at FROM cache WHERE key = ? AND version = ?',
+                (disk_key, dataset_version())
+            ).fetchone()
+            if row is not None and not allow_expired:
+                connection.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, disk_key))
+    except sqlite3.Error as e:
+        logger.warning(f"Falha ao ler o cache em disco: {e}")
+        return _MISSING
+    if row is None:
+        return _MISSING
+    value, ttl, stored_at, expires_at = row
+    if allow_expired:
+        return json.loads(value), now - stored_at
+    if expires_at is not None and expires_at < now:
+        return _MISSING
+    return json.loads(value), ttl
+
+
+def _disk_set(key, value, ttl, memory_ttl):
+    connection = _open_disk()
+    if connection is None:
+        return
+    now = time.time()
+    expires_at = now + ttl if ttl else None
+    try:
+        serialized = json.dumps(value, default=str, ensure_ascii=False)
+        with _disk_lock:
+            connection.execute(
+                'INSERT OR REPLACE INTO cache'
+                ' (key, version, value, size, ttl, stored_at, expires_at, accessed_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (_disk_key(key), dataset_version(), serialized, len(serialized), memory_ttl, now, expires_at, now)
+            )
+            _disk_evict(connection, now)
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        logger.warning(f"Falha ao gravar no cache em disco: {e}")
+
+
+def _disk_evict(connection, now):
+    """
+    Apaga as entradas expiradas há mais de DISK_CACHE_TTL (já não servem nem
+    de último valor conhecido) e, acima dos limites de entradas ou de bytes,
+    as lidas há mais tempo.
+    """
+    connection.execute('DELETE FROM cache WHERE expires_at < ?', (now - settings.DISK_CACHE_TTL,))
+    entries, total_bytes = connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+    if entries <= settings.DISK_CACHE_MAX_ENTRIES and total_bytes <= settings.DISK_CACHE_MAX_BYTES:
+        return
+    # Mantém as mais recentes dentro dos dois limites
+    connection.execute(
+        'DELETE FROM cache WHERE key NOT IN ('
+        ' SELECT key FROM ('
+        '  SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS running_bytes FROM cache'
+        '  ORDER BY accessed_at DESC, key LIMIT ?'
+        ' ) WHERE running_bytes <= ?)',
+        (settings.DISK_CACHE_MAX_ENTRIES, settings.DISK_CACHE_MAX_BYTES)
+    )
+
+
+# --- API pública ---
+
+def get(key, default=None, persist=False):
+    """
+    Retorna o valor guardado em `key` ou `default` se não existir/expirou.
+    Com `persist=True`, uma falta em memória é procurada no disco.
+    """
+    with tracing_service.span('cache.get', persist=persist) as span:
+        value, result = _lookup(key, persist)
+        span.set_attribute('cache.result', result)
+    if has_request_context():
+        # Resultado da última consulta ao cache (linha de acesso do log)
+        g.cache_status = result
+    return default if value is _MISSING else value
+
+
+def _lookup(key, persist):
+    """Procura `key` em memória e, com `persist`, no disco. Retorna (valor, resultado)."""
+    entry = _store.get(key)
+    if entry is not None:
+        value, expires_at, _ = entry
+        if expires_at is None or expires_at >= time.monotonic():
+            metrics_service.cache_requests.inc(tier='memory', result='hit')
+            return value, 'memory_hit'
+    metrics_service.cache_requests.inc(tier='memory', result='miss')
+
+    if persist:
+        entry = _disk_get(key)
+        if entry is not _MISSING:
+            value, ttl = entry
+            metrics_service.cache_requests.inc(tier='disk', result='hit')
+            # De volta à memória com o TTL com que foi guardada (ex.: KPI_CACHE_TTL)
+            set(key, value, ttl)
+            return value, 'disk_hit'
+        metrics_service.cache_requests.inc(tier='disk', result='miss')
+    return _MISSING, 'miss'
+
+
+def set(key, value, ttl=None, persist=False):
+    """
+    Guarda `value` em `key`. `ttl=None` usa settings.CACHE_DEFAULT_TTL; `ttl=0`
+    não expira. Com `persist=True` também grava no disco (TTL DISK_CACHE_TTL).
+    """
+    if ttl is None:
+        ttl = settings.CACHE_DEFAULT_TTL
+    expires_at = time.monotonic() + ttl if ttl else None
+    with _lock:
+        _store.pop(key, None)
+        _store[key] = (value, expires_at, time.time())
+        # Limite de entradas: descarta as mais antigas (ordem de inserção)
+        while len(_store) > settings.CACHE_MAX_ENTRIES:
+            _store.pop(next(iter(_store)))
+    if persist:
+        _disk_set(key, value, settings.DISK_CACHE_TTL, ttl)
+
+
+def get_stale(key, persist=False):
+    """
+    Retorna (valor, idade em segundos) da última entrada conhecida, mesmo
+    expirada, ou None se não houver nenhuma.
+    """
+    entry = _store.get(key)
+    if entry is not None:
+        value, _, stored_at = entry
+        return value, time.time() - stored_at
+    if persist:
+        stale = _disk_get(key, allow_expired=True)
+        if stale is not _MISSING:
+            return stale
+    return None
+
+
+def mark_stale(age_seconds: float):
+    """Marca a resposta do pedido atual como desatualizada (cabeçalhos X-Data-Stale/X-Data-Age)."""
+    if has_request_context():
+        g.stale_data_age = max(getattr(g, 'stale_data_age', 0), age_seconds)
+
+
+def get_or_set(key, loader, ttl=None, persist=False):
+    """
+    Retorna o valor em cache ou chama `loader()` e guarda o resultado.
+    Se o backend estiver indisponível, devolve o último valor conhecido.
+    """
+    value = get(key, _MISSING, persist=persist)
+    if value is _MISSING:
+        try:
+            value = loader()
+        except SupabaseUnavailableError as e:
+            return _stale_fallback(key, persist, e)
+        set(key, value, ttl, persist=persist)
+    return value
+
+
+async def get_or_set_async(key, loader, ttl=None, persist=False):
+    """Como `get_or_set`, com `loader()` a retornar uma corrotina (modo ASGI)."""
+    value = get(key, _MISSING, persist=persist)
+    if value is _MISSING:
+        try:
+            value = await loader()
+        except SupabaseUnavailableError as e:
+            return _stale_fallback(key, persist, e)
+        set(key, value, ttl, persist=persist)
+    return value
+
+
+def _stale_fallback(key, persist, error):
+    """Último valor conhecido de `key` (marcado como desatualizado), ou volta a levantar `error`."""
+    stale = get_stale(key, persist=persist)
+    if stale is None:
+        raise error
+    value, age = stale
+    metrics_service.cache_requests.inc(tier='fallback', result='stale')
+    mark_stale(age)
+    return value
+
+
+def clear(disk=False):
+    with _lock:
+        _store.clear()
+    if disk:
+        connection = _open_disk()
+        if connection is not None:
+            with _disk_lock:
+                connection.execute('DELETE FROM cache')
+
+
+def keys():
+    return list(_store.keys())
+
+
+def count_key(table_name: str, select_query: str, filter_params: dict):
+    """Chave da contagem (count='exact') de uma consulta com estes filtros."""
+    return ('count', table_name, select_query, tuple(sorted(filter_params.items())))
+
+
+def _key_prefix(func) -> str:
+    # A versão assíncrona (sufixo _async) partilha as entradas da síncrona
+    name = func.__name__
+    if inspect.iscoroutinefunction(func) and name.endswith('_async'):
+        name = name[:-len('_async')]
+    return f"{func.__module__}.{name}"
+
+
+def cached(ttl=None, prefix=None, persist=False):
+    """
+    Decorador: guarda o resultado da função em cache, com chave formada pelo
+    nome da função e pelos argumentos. Também aceita funções assíncronas.
+    """
+    def decorator(func):
+        key_prefix = prefix or _key_prefix(func)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = (key_prefix, args, tuple(sorted(kwargs.items())))
+                return await get_or_set_async(key, lambda: func(*args, **kwargs), ttl, persist=persist)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = (key_prefix, args, tuple(sorted(kwargs.items())))
+                return get_or_set(key, lambda: func(*args, **kwargs), ttl, persist=persist)
+
+        wrapper.cache_prefix = key_prefix
+        return wrapper
+    return decorator
+
+
+def cached_first_page(ttl=None):
+    """
+    Decorador para funções de pesquisa paginada que recebem `params: dict`
+    como último argumento: apenas a primeira página (sem `last_id`) é
+    guardada em cache, em memória e em disco. Também aceita funções assíncronas.
+    """
+    def decorator(func):
+        key_prefix = _key_prefix(func)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args):
+                params = args[-1]
+                if params.get('last_id'):
+                    return await func(*args)
+                key = (key_prefix, args[:-1], tuple(sorted(params.items())))
+                docs, pagination = await get_or_set_async(key, lambda: func(*args), ttl, persist=True)
+                return docs, pagination
+        else:
+            @functools.wraps(func)
+            def wrapper(*args):
+                params = args[-1]
+                if params.get('last_id'):
+                    return func(*args)
+                key = (key_prefix, args[:-1], tuple(sorted(params.items())))
+                docs, pagination = get_or_set(key, lambda: func(*args), ttl, persist=True)
+                return docs, pagination
+
+        return wrapper
+    return decorator
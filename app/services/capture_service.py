@@ -0,0 +1,115 @@
+# app/services/capture_service.py
+
+"""
+Captura do tráfego real para reprodução em testes de carga.
+
+Com CAPTURE_ENABLED=1, cada pedido às rotas da API é gravado como uma linha
+JSON em CAPTURE_FILE (rodado por tamanho, como os logs):
+
+    {"ts": 1729350000.123, "method": "GET", "path": "/api/v1/pesquisa-salas",
+     "route": "/api/v1/pesquisa-salas", "args": [["limit", "10"]],
+     "status": 200, "latency_ms": 12.4, "cache": "miss", "bytes": 5321}
+
+A linha é sanitizada: não leva cabeçalhos, corpo nem endereço do cliente, e
+os parâmetros com nomes sensíveis (token, key, password, ...) são
+mascarados. A escrita passa pela mesma fila sem bloqueio do logging: o
+pedido nunca espera pelo disco e, com a fila cheia, a linha é descartada.
+
+`benchmarks/replay.py` lê estes ficheiros (incluindo os rodados) e volta a
+enviar os pedidos com o mesmo ritmo, acelerado ou não.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import time
+
+from flask import g, request
+
+from app.config import settings
+from app.services import logging_service
+
+capture_logger = logging.getLogger('app.capture')
+
+# Nomes de parâmetros cujo valor nunca é gravado
+_SENSITIVE_PARAM = re.compile(r'token|key|secret|password|passwd|auth|session|signature', re.IGNORECASE)
+REDACTED = '***'
+
+# Rotas de estado, métricas e documentação não fazem parte da carga a reproduzir
+_SKIPPED_PREFIXES = ('/status/', '/metrics', '/apispec', '/docs', '/flasgger_static', '/_ah/')
+
+_handler = None
+
+
+class _LineFormatter(logging.Formatter):
+    """A mensagem já é a linha JSON."""
+
+    def format(self, record) -> str:
+        return record.getMessage()
+
+
+def setup():
+    """Liga o logger de captura ao ficheiro rotativo (idempotente)."""
+    global _handler
+    if _handler is not None:
+        return _handler
+
+    directory = os.path.dirname(settings.CAPTURE_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    output = logging.handlers.RotatingFileHandler(
+        settings.CAPTURE_FILE, maxBytes=settings.CAPTURE_MAX_BYTES,
+        backupCount=settings.CAPTURE_BACKUP_COUNT, encoding='utf-8'
+    )
+    output.setFormatter(_LineFormatter())
+
+    _handler = logging_service.NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE), [output])
+    capture_logger.setLevel(logging.INFO)
+    capture_logger.addHandler(_handler)
+    # Não passa para o logger 'app' (stdout)
+    capture_logger.propagate = False
+    return _handler
+
+
+def shutdown():
+    """Esvazia a fila e fecha o ficheiro."""
+    global _handler
+    if _handler is not None:
+        capture_logger.removeHandler(_handler)
+        _handler.stop()
+        _handler = None
+
+
+def sanitize_args(args) -> list:
+    """Parâmetros da query string como pares, com os sensíveis mascarados."""
+    return [[name, REDACTED if _SENSITIVE_PARAM.search(name) else value]
+            for name, value in args.items(multi=True)]
+
+
+def should_capture(path) -> bool:
+    if path.startswith(_SKIPPED_PREFIXES):
+        return False
+    return settings.CAPTURE_SAMPLE_RATE >= 1 or random.random() < settings.CAPTURE_SAMPLE_RATE
+
+
+def capture_request(response, elapsed_seconds):
+    """Grava a linha do pedido atual (chamada no after_request)."""
+    if not should_capture(request.path):
+        return
+    stale_age = g.get('stale_data_age')
+    entry = {
+        'ts': round(time.time() - elapsed_seconds, 3),
+        'method': request.method,
+        'path': request.path,
+        'route': request.url_rule.rule if request.url_rule is not None else None,
+        'args': sanitize_args(request.args),
+        'status': response.status_code,
+        'latency_ms': round(elapsed_seconds * 1000, 1),
+        'cache': 'stale' if stale_age is not None else g.get('cache_status'),
+        'bytes': response.content_length
+    }
+    capture_logger.info(json.dumps(entry, ensure_ascii=False))
@@ -0,0 +1,119 @@
+# app/services/deadline_service.py
+
+"""
+Deadline por pedido.
+
+Cada pedido recebe um prazo (REQUEST_DEADLINE_SECONDS, que uma rota pode
+alterar com o decorador `with_deadline`, e que o cliente pode encurtar com o
+cabeçalho `X-Request-Timeout`). O prazo é guardado em `flask.g` e consultado
+por `backend_service.execute()` e pelos ciclos de trabalho em lotes: cada
+chamada ao backend só espera o tempo que resta ao pedido, e quando o prazo
+acaba o trabalho é interrompido com `DeadlineExceededError` (resposta 504 com
+o progresso já feito).
+
+Fora de um pedido (CLI, aquecimento no arranque) não há deadline.
+"""
+
+import functools
+import time
+
+from flask import g, has_request_context, request
+
+from app.config import settings
+from app.services.supabase_service import SupabaseUnavailableError
+
+
+class DeadlineExceededError(SupabaseUnavailableError):
+    """O prazo do pedido esgotou antes de o trabalho terminar."""
+
+    def __init__(self, message, progress=None):
+        super().__init__(message)
+        self.progress = progress or {}
+
+
+def _client_timeout():
+    """Prazo pedido pelo cliente no cabeçalho X-Request-Timeout (segundos), se válido."""
+    try:
+        value = float(request.headers.get('X-Request-Timeout', ''))
+    except ValueError:
+        return None
+    return value if value > 0 else None
+
+
+def start(seconds=None):
+    """
+    Define o prazo do pedido atual, contado a partir do início do pedido.
+    `seconds=None` usa settings.REQUEST_DEADLINE_SECONDS; 0 desativa o prazo.
+    """
+    if not has_request_context():
+        return
+    if 'request_started' not in g:
+        g.request_started = time.monotonic()
+        g.request_progress = {'backend_calls': 0}
+
+    seconds = settings.REQUEST_DEADLINE_SECONDS if seconds is None else seconds
+    client_seconds = _client_timeout()
+    if client_seconds is not None:
+        # O cliente só pode encurtar o prazo, nunca alargá-lo
+        seconds = min(seconds, client_seconds) if seconds else client_seconds
+
+    g.deadline_seconds = seconds or None
+    g.deadline = g.request_started + seconds if seconds else None
+
+
+def remaining():
+    """Segundos que restam ao pedido atual, ou None se não houver prazo."""
+    if not has_request_context() or g.get('deadline') is None:
+        return None
+    return g.deadline - time.monotonic()
+
+
+def record_progress(**fields):
+    """Regista o progresso do pedido (ex.: linhas exportadas) para a resposta 504."""
+    if has_request_context() and 'request_progress' in g:
+        g.request_progress.update(fields)
+
+
+def count_backend_call():
+    if has_request_context() and 'request_progress' in g:
+        g.request_progress['backend_calls'] += 1
+
+
+def progress() -> dict:
+    """Resumo do progresso do pedido atual."""
+    if not has_request_context() or 'request_started' not in g:
+        return {}
+    summary = dict(g.request_progress)
+    summary['elapsed_ms'] = round((time.monotonic() - g.request_started) * 1000, 1)
+    if g.get('deadline_seconds'):
+        summary['deadline_ms'] = round(g.deadline_seconds * 1000, 1)
+    return summary
+
+
+def check(stage=None):
+    """
+    Interrompe o trabalho se o prazo do pedido já esgotou. Chamado entre
+    lotes (sub-pedidos, páginas de exportação, aquecimento).
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        if stage:
+            record_progress(stage=stage)
+        raise DeadlineExceededError(
+            "O prazo do pedido esgotou antes de concluir o trabalho.",
+            progress=progress()
+        )
+
+
+def with_deadline(seconds):
+    """
+    Decorador de rota: usa `seconds` como prazo em vez do padrão
+    (0 para rotas sem prazo).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            start(seconds)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,14 +1,15 @@
 # app/services/filmagem_service.py
 
-from app.services.supabase_service import supabase
+from app.services.supabase_service import SupabaseUnavailableError, get_supabase
 
 # TODO: Implementar a lógica de busca para filmagem estrangeira
 def get_filmagens_estrangeiras(params: dict):
     """
     Busca dados da tabela 'filmagem_estrangeira' com filtros e paginação.
     """
+    supabase = get_supabase()
     if supabase is None:
-        raise Exception("Serviço Supabase não está disponível.")
+        raise SupabaseUnavailableError("Serviço Supabase não está disponível.")
     
     # Lógica de paginação e filtro (similar aos outros serviços)
     # ...
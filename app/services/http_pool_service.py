@@ -0,0 +1,257 @@
+# app/services/http_pool_service.py
+
+"""
+Transporte HTTP das chamadas ao Supabase (PostgREST).
+
+O cliente síncrono usa um único `httpx.Client` por processo, partilhado por
+todas as threads do pool do backend (o pool de ligações do httpx é seguro
+entre threads), com:
+  - no máximo HTTP_MAX_CONNECTIONS ligações (por omissão, o tamanho do pool
+    do backend: cada thread usa no máximo uma) e espera máxima de
+    HTTP_POOL_TIMEOUT por uma ligação livre;
+  - keep-alive de HTTP_KEEPALIVE_SECONDS: os pedidos seguintes reutilizam a
+    ligação TLS em vez de repetirem o handshake;
+  - HTTP/2 (HTTP2_ENABLED): os pedidos em simultâneo partilham a mesma
+    ligação, multiplexados;
+  - timeouts separados de ligação (HTTP_CONNECT_TIMEOUT) e de leitura e
+    escrita (BACKEND_TIMEOUT).
+
+Cada cliente assíncrono (modo ASGI, um por event loop) tem um pool próprio
+com a mesma configuração.
+
+`prewarm()` abre as ligações antes do primeiro pedido (aquecimento e
+post_fork do Gunicorn), para que a latência dos pedidos nunca inclua o
+estabelecimento da ligação. As métricas (espera por uma ligação, ligações
+novas e reutilizadas, tempo de ligação, ligações abertas) estão em /metrics
+e em /status/backend.
+
+O httpx só é importado quando o primeiro cliente é criado.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+from app.services import metrics_service
+
+logger = logging.getLogger(__name__)
+
+# Limites dos histogramas de espera e de ligação (segundos)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+pool_wait = metrics_service.Histogram(
+    'ancine_backend_http_pool_wait_seconds',
+    'Espera de cada chamada ao backend por uma ligação do pool HTTP.',
+    buckets=POOL_WAIT_BUCKETS
+)
+connect_duration = metrics_service.Histogram(
+    'ancine_backend_http_connect_seconds',
+    'Estabelecimento de uma ligação nova ao backend (TCP, TLS e HTTP/2).',
+    buckets=POOL_WAIT_BUCKETS
+)
+connections_used = metrics_service.Counter(
+    'ancine_backend_http_connections_total',
+    'Chamadas ao backend por ligação usada (nova ou reutilizada).',
+    ('connection',)
+)
+
+# Chamadas por ligação usada, desde o arranque (para /status/backend)
+_connection_counts = {'new': 0, 'reused': 0}
+
+_sync_client = None
+_sync_lock = threading.Lock()
+# Transportes vivos (síncrono e assíncronos), para as métricas do pool
+_transports = weakref.WeakSet()
+
+
+class _Trace:
+    """
+    Callback de trace do httpcore de uma chamada: a espera pelo pool acaba
+    quando a chamada começa a abrir uma ligação nova ou a enviar o pedido
+    numa ligação já aberta.
+    """
+
+    __slots__ = ('started', 'connect_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.connect_started = None
+
+    def record(self, name):
+        if name == 'connection.connect_tcp.started' and self.started is not None:
+            now = time.perf_counter()
+            pool_wait.observe(now - self.started)
+            connections_used.inc(connection='new')
+            _connection_counts['new'] += 1
+            self.started, self.connect_started = None, now
+        elif name.endswith('.send_request_headers.started'):
+            now = time.perf_counter()
+            if self.connect_started is not None:
+                connect_duration.observe(now - self.connect_started)
+                self.connect_started = None
+            elif self.started is not None:
+                pool_wait.observe(now - self.started)
+                connections_used.inc(connection='reused')
+                _connection_counts['reused'] += 1
+            self.started = None
+
+    def __call__(self, name, info):
+        self.record(name)
+
+
+class _AsyncTrace(_Trace):
+    __slots__ = ()
+
+    async def __call__(self, name, info):
+        self.record(name)
+
+
+def _trace_request(request):
+    request.extensions = {**request.extensions, 'trace': _Trace()}
+
+
+async def _trace_request_async(request):
+    request.extensions = {**request.extensions, 'trace': _AsyncTrace()}
+
+
+def _http2_available() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401 (dependência opcional do httpx)
+        return True
+    except ImportError:
+        logger.warning("HTTP2_ENABLED=1 mas o pacote 'h2' não está instalado: a usar HTTP/1.1.")
+        return False
+
+
+def _client_arguments(transport_class) -> dict:
+    import httpx
+
+    transport = transport_class(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_SECONDS
+        )
+    )
+    _transports.add(transport)
+    return {
+        'transport': transport,
+        'timeout': httpx.Timeout(
+            settings.BACKEND_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT, pool=settings.HTTP_POOL_TIMEOUT
+        ),
+        # Como o cliente que o postgrest cria por omissão
+        'follow_redirects': True
+    }
+
+
+def get_client():
+    """O `httpx.Client` partilhado do processo, criado no primeiro uso."""
+    global _sync_client
+    if _sync_client is None:
+        with _sync_lock:
+            if _sync_client is None:
+                import httpx
+                _sync_client = httpx.Client(
+                    event_hooks={'request': [_trace_request]}, **_client_arguments(httpx.HTTPTransport)
+                )
+    return _sync_client
+
+
+def new_async_client():
+    """Um `httpx.AsyncClient` com a mesma configuração (um por event loop)."""
+    import httpx
+    return httpx.AsyncClient(
+        event_hooks={'request': [_trace_request_async]}, **_client_arguments(httpx.AsyncHTTPTransport)
+    )
+
+
+def reset():
+    """
+    Descarta o cliente (sem fechar as ligações, que pertencem ao processo
+    master) e retorna um novo. Chamado em cada worker logo após o fork.
+    """
+    global _sync_client
+    with _sync_lock:
+        if _sync_client is not None:
+            _transports.discard(_sync_client._transport)
+        _sync_client = None
+    return get_client()
+
+
+def prewarm(connections=None) -> dict:
+    """
+    Abre ligações ao Supabase com `connections` (HTTP_PREWARM_CONNECTIONS)
+    pedidos HEAD em simultâneo, que ficam no pool. Com HTTP/2 basta um: os
+    pedidos seguintes são multiplexados na mesma ligação. Retorna um resumo.
+    """
+    connections = settings.HTTP_PREWARM_CONNECTIONS if connections is None else connections
+    if connections <= 0 or not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+        return {'requests': 0}
+
+    client = get_client()
+    url = f"{settings.SUPABASE_URL.rstrip('/')}/rest/v1/"
+    headers = {'apikey': settings.SUPABASE_KEY, 'Authorization': f"Bearer {settings.SUPABASE_KEY}"}
+    started = time.perf_counter()
+
+    def head(_):
+        try:
+            client.head(url, headers=headers, timeout=settings.HTTP_CONNECT_TIMEOUT + 2)
+            return True
+        except Exception as e:
+            logger.warning(f"Falha ao abrir ligação ao Supabase no aquecimento: {e}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        succeeded = sum(pool.map(head, range(connections)))
+    state = _pool_state()
+    summary = {
+        'requests': succeeded,
+        'connections': state['active'] + state['idle'],
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+    logger.info(f"Ligações ao Supabase abertas: {summary['connections']} em {summary['duration_ms']} ms.")
+    return summary
+
+
+def prewarm_in_background():
+    threading.Thread(target=prewarm, name='http-prewarm', daemon=True).start()
+
+
+def _pool_state() -> dict:
+    """Ligações abertas (ativas/inativas) e chamadas em fila em todos os pools."""
+    state = {'active': 0, 'idle': 0, 'queued': 0}
+    for transport in list(_transports):
+        pool = getattr(transport, '_pool', None)
+        if pool is None:
+            continue
+        for connection in list(pool.connections):
+            state['idle' if connection.is_idle() else 'active'] += 1
+        state['queued'] += sum(1 for request in list(pool._requests) if request.is_queued())
+    return state
+
+
+metrics_service.Gauge(
+    'ancine_backend_http_connections', 'Ligações HTTP abertas ao backend, por estado.', ('state',),
+    function=lambda: {(state,): count for state, count in _pool_state().items() if state != 'queued'}
+)
+metrics_service.Gauge(
+    'ancine_backend_http_pool_queued_calls', 'Chamadas ao backend à espera de uma ligação do pool HTTP.',
+    function=lambda: _pool_state()['queued']
+)
+
+
+def stats() -> dict:
+    """Configuração e estado do pool HTTP (para /status/backend)."""
+    return {
+        'http2': settings.HTTP2_ENABLED,
+        'max_connections': settings.HTTP_MAX_CONNECTIONS,
+        'keepalive_seconds': settings.HTTP_KEEPALIVE_SECONDS,
+        'connections': _pool_state(),
+        'connections_used': dict(_connection_counts)
+    }
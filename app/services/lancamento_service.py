@@ -1,13 +1,14 @@
-from app.services.supabase_service import supabase
+from app.config import settings
+from app.services import backend_service, cache_service, tracing_service
+from app.services.cache_service import cached, cached_first_page
+from app.services.supabase_service import SupabaseUnavailableError
 
-def get_lancamentos_com_join(params: dict):
-    """
-    Busca Lançamentos com JOIN em Distribuidoras e Obras.
-    """
+def _lancamentos_com_join(supabase, params: dict):
+    # Plano de queries (ver backend_service.run)
     if supabase is None:
-        raise Exception("Serviço Supabase não está disponível.")
+        raise SupabaseUnavailableError("Serviço Supabase não está disponível.")
 
-    limit = min(int(params.get('limit', 10)), 100)
+    limit = min(int(params.get('limit', settings.DEFAULT_PAGE_SIZE)), settings.MAX_PAGE_SIZE)
     last_id = params.get('last_id')
     primary_key_column = 'id' # Chave SERIAL da tabela 'lancamentos'
     
@@ -16,24 +17,34 @@ def get_lancamentos_com_join(params: dict):
     # Traz os dados da Obra (opcional, pois pode ser filme estrangeiro)
     select_query = '*, distribuidoras!inner(*), obras(*)'
     
-    query_builder = supabase.table('lancamentos').select(select_query, count='exact')
+    with tracing_service.span('query.build', table='lancamentos'):
+        filter_params = {k: v for k, v in params.items() if k not in ['limit', 'last_id']}
+
+        # Reaproveita a contagem já conhecida para estes filtros, só na primeira
+        # página: com last_id, o count='exact' conta apenas as linhas depois do cursor
+        count_key = cache_service.count_key('lancamentos', select_query, filter_params) if not last_id else None
+        known_count = cache_service.get(count_key, persist=True) if count_key else None
+        query_builder = supabase.table('lancamentos').select(select_query, count=None if known_count is not None else 'exact')
     
-    filter_params = {k: v for k, v in params.items() if k not in ['limit', 'last_id']}
-    for key, value in filter_params.items():
-        query_builder = query_builder.eq(key, value)
+        for key, value in filter_params.items():
+            query_builder = query_builder.eq(key, value)
     
-    # Ordena por ID (data de inserção) ou data de lançamento
-    query_builder = query_builder.order('data_lancamento', desc=True)
-    if last_id:
-        # Cursor por ID ainda é mais seguro que por data
-        query_builder = query_builder.order(primary_key_column)
-        query_builder = query_builder.gt(primary_key_column, last_id)
+        # Ordena por ID (data de inserção) ou data de lançamento
+        query_builder = query_builder.order('data_lancamento', desc=True)
+        if last_id:
+            # Cursor por ID ainda é mais seguro que por data
+            query_builder = query_builder.order(primary_key_column)
+            query_builder = query_builder.gt(primary_key_column, last_id)
     
-    response = query_builder.limit(limit + 1).execute()
+    response = yield query_builder.limit(limit + 1)
     
     # Processa e Retorna
     docs_with_extra = response.data
-    total_count = response.count
+    total_count = known_count
+    if total_count is None:
+        total_count = response.count
+        if count_key is not None:
+            cache_service.set(count_key, total_count, persist=True)
     has_next = len(docs_with_extra) > limit
     docs_for_page = docs_with_extra[:limit]
     
@@ -48,4 +59,60 @@ def get_lancamentos_com_join(params: dict):
         'has_next': has_next
     }
     
-    return docs_for_page, pagination_info
\ No newline at end of file
+    return docs_for_page, pagination_info
+
+
+@cached_first_page()
+def get_lancamentos_com_join(params: dict):
+    """
+    Busca Lançamentos com JOIN em Distribuidoras e Obras.
+    """
+    return backend_service.run(_lancamentos_com_join, params)
+
+
+@cached_first_page()
+async def get_lancamentos_com_join_async(params: dict):
+    """Versão assíncrona (modo ASGI) de `get_lancamentos_com_join`."""
+    return await backend_service.run_async(_lancamentos_com_join, params)
+
+
+def _market_share_nacional(supabase):
+    # Plano de queries (ver backend_service.run)
+    if supabase is None:
+        raise SupabaseUnavailableError("Serviço Supabase não está disponível.")
+
+    response = yield backend_service.Call(supabase.rpc('calcular_market_share_nacional'), idempotent=True)
+    return response.data
+
+
+@cached(ttl=settings.KPI_CACHE_TTL, persist=True)
+def get_market_share_nacional():
+    """Chama a função RPC 'calcular_market_share_nacional' do banco."""
+    return backend_service.run(_market_share_nacional)
+
+
+@cached(ttl=settings.KPI_CACHE_TTL, persist=True)
+async def get_market_share_nacional_async():
+    """Versão assíncrona (modo ASGI) de `get_market_share_nacional`."""
+    return await backend_service.run_async(_market_share_nacional)
+
+
+def _ranking_distribuidoras(supabase):
+    # Plano de queries (ver backend_service.run)
+    if supabase is None:
+        raise SupabaseUnavailableError("Serviço Supabase não está disponível.")
+
+    response = yield backend_service.Call(supabase.rpc('ranking_distribuidoras'), idempotent=True)
+    return response.data
+
+
+@cached(ttl=settings.KPI_CACHE_TTL, persist=True)
+def get_ranking_distribuidoras():
+    """Chama a função RPC 'ranking_distribuidoras' do banco."""
+    return backend_service.run(_ranking_distribuidoras)
+
+
+@cached(ttl=settings.KPI_CACHE_TTL, persist=True)
+async def get_ranking_distribuidoras_async():
+    """Versão assíncrona (modo ASGI) de `get_ranking_distribuidoras`."""
+    return await backend_service.run_async(_ranking_distribuidoras)
@@ -0,0 +1,212 @@
+# app/services/logging_service.py
+
+"""
+Logging estruturado e sem bloqueio.
+
+Os módulos da aplicação usam `logging.getLogger(__name__)` (loggers 'app.*').
+`setup()` liga esses loggers a um `QueueHandler`: a thread do pedido só
+coloca o registo numa fila limitada e uma thread própria (`QueueListener`)
+formata-o e escreve-o no stdout. Com a fila cheia o registo é descartado
+(métrica `ancine_log_dropped_total`) em vez de bloquear o pedido.
+
+Cada registo feito durante um pedido leva o `request_id` (cabeçalho
+X-Request-ID recebido ou gerado), a rota e, se o pedido for amostrado pelo
+tracing, o `trace_id`/`span_id`. LOG_FORMAT: 'json' (uma linha JSON por
+registo, padrão) ou 'text'.
+
+A linha de acesso de cada pedido (`log_request`) inclui estado, latência,
+tempo passado no backend e estado do cache. As respostas com sucesso e
+rápidas são amostradas (LOG_SAMPLE_RATE); erros e pedidos lentos
+(>= LOG_SLOW_REQUEST_MS) são sempre registados.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+from app.config import settings
+from app.services import metrics_service, tracing_service
+
+ROOT_LOGGER = 'app'
+
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+# Atributos padrão de um LogRecord (o resto veio de `extra=`)
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+access_logger = logging.getLogger('app.access')
+
+
+class JSONFormatter(logging.Formatter):
+    """Uma linha JSON por registo, com os campos passados em `extra=`."""
+
+    def format(self, record) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_') and value is not None:
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legível para desenvolvimento local."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record) -> str:
+        line = super().format(record)
+        request_id = getattr(record, 'request_id', None)
+        return f"{line} [{request_id}]" if request_id else line
+
+
+class RequestContextFilter(logging.Filter):
+    """Junta o contexto do pedido ao registo (corre na thread que faz o log)."""
+
+    def filter(self, record) -> bool:
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.route = request.url_rule.rule if request.url_rule is not None else request.path
+        span = tracing_service.current_span()
+        if span.trace_id is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que nunca espera: com a fila cheia descarta o registo.
+    O listener é (re)iniciado no primeiro registo de cada processo, para
+    funcionar com o preload do Gunicorn (as threads não sobrevivem ao fork).
+    """
+
+    def __init__(self, log_queue, handlers):
+        super().__init__(log_queue)
+        self._handlers = handlers
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._listener = logging.handlers.QueueListener(
+                    self.queue, *self._handlers, respect_handler_level=True
+                )
+                self._listener.start()
+                self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Formata a mensagem e a exceção aqui (os argumentos podem mudar
+        # depois), mas deixa a serialização para a thread do listener.
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.stack_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics_service.log_dropped.inc()
+            return
+        metrics_service.log_records.inc(level=record.levelname)
+
+    def stop(self):
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._pid = None
+
+
+_handler = None
+
+
+def setup(level=None, fmt=None):
+    """
+    Liga os loggers 'app.*' à fila (idempotente). Chamado em `create_app()`.
+    """
+    global _handler
+    if _handler is not None:
+        return _handler
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if (fmt or settings.LOG_FORMAT) == 'text' else JSONFormatter())
+
+    _handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE), [output])
+    _handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel((level or settings.LOG_LEVEL).upper())
+    root.addHandler(_handler)
+    root.propagate = False
+    return _handler
+
+
+def shutdown():
+    """Esvazia a fila e para o listener (ex.: no fim de um script)."""
+    global _handler
+    if _handler is not None:
+        logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+        _handler.stop()
+        _handler = None
+
+
+def assign_request_id() -> str:
+    """ID do pedido: o X-Request-ID recebido (se válido) ou um novo."""
+    supplied = request.headers.get('X-Request-ID', '')
+    g.request_id = supplied if _REQUEST_ID_PATTERN.match(supplied) else uuid.uuid4().hex
+    return g.request_id
+
+
+def should_log_request(status, elapsed_ms) -> bool:
+    """Erros e pedidos lentos sempre; sucessos rápidos por amostragem."""
+    if status >= 400 or elapsed_ms >= settings.LOG_SLOW_REQUEST_MS:
+        return True
+    return random.random() < settings.LOG_SAMPLE_RATE
+
+
+def log_request(response, elapsed_seconds):
+    """Linha de acesso do pedido atual (chamada no after_request)."""
+    elapsed_ms = elapsed_seconds * 1000
+    if not should_log_request(response.status_code, elapsed_ms):
+        return
+    stale_age = g.get('stale_data_age')
+    access_logger.info(
+        f"{request.method} {request.path} {response.status_code}",
+        extra={
+            'method': request.method,
+            'status': response.status_code,
+            'latency_ms': round(elapsed_ms, 1),
+            'backend_ms': round(g.get('backend_seconds', 0.0) * 1000, 1),
+            'cache': 'stale' if stale_age is not None else g.get('cache_status'),
+            'bytes': response.content_length,
+            'priority': g.get('admission_priority'),
+            'sampled': response.status_code < 400 and elapsed_ms < settings.LOG_SLOW_REQUEST_MS
+        }
+    )
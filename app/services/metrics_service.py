@@ -0,0 +1,224 @@
+# app/services/metrics_service.py
+
+"""
+Métricas no formato de exposição do Prometheus (texto, versão 0.0.4).
+
+Registo mínimo em memória (contadores, gauges e histogramas com labels),
+sem dependências externas, exposto em /metrics. Com um único worker do
+Gunicorn os valores são os do processo; com vários, cada worker expõe os
+seus e o Prometheus agrega por instância.
+
+Métricas principais:
+  - pedidos HTTP por rota: contagem, latência, tamanho da resposta, espera
+    na admissão e tempo passado em chamadas ao backend (o resto é Flask e
+    codificação JSON);
+  - chamadas ao backend por recurso (tabela ou RPC) e forma do select;
+  - acessos ao cache por nível (memória/disco) e resultado;
+  - saturação do pool de chamadas ao backend e das vagas de admissão;
+  - registos de log emitidos e descartados (fila cheia).
+"""
+
+import bisect
+import logging
+import threading
+
+# Limites dos histogramas de latência (segundos) e de tamanho (bytes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_registry = []
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self._header()
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge com valores definidos por `set()` ou calculados por `function()` na recolha."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self):
+        if self.function is not None:
+            # A função retorna um número ou {tupla de labels: valor}
+            try:
+                result = self.function()
+            except Exception as e:
+                logger.warning(f"Falha ao recolher a métrica {self.name}: {e}")
+                result = {}
+            items = sorted(result.items()) if isinstance(result, dict) else [((), result)]
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        lines = self._header()
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, n)) for key, (counts, total, n) in self._values.items())
+        lines = self._header()
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+def render() -> str:
+    """Todas as métricas registadas, no formato de texto do Prometheus."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# --- Pedidos HTTP ---
+
+http_requests = Counter(
+    'ancine_http_requests_total', 'Pedidos HTTP por rota, método e estado.',
+    ('route', 'method', 'status')
+)
+http_request_duration = Histogram(
+    'ancine_http_request_duration_seconds', 'Duração dos pedidos HTTP (da admissão à resposta).',
+    ('route', 'method')
+)
+http_response_size = Histogram(
+    'ancine_http_response_size_bytes', 'Tamanho do corpo das respostas.',
+    ('route',), buckets=SIZE_BUCKETS
+)
+http_backend_time = Histogram(
+    'ancine_http_request_backend_seconds', 'Tempo de cada pedido passado à espera do backend.',
+    ('route',)
+)
+http_queue_wait = Histogram(
+    'ancine_http_request_queue_wait_seconds', 'Espera por uma vaga no controlo de admissão.',
+    ('priority',)
+)
+http_rejected = Counter(
+    'ancine_http_rejected_total', 'Pedidos rejeitados (rate limit ou sobrecarga).',
+    ('reason',)
+)
+http_in_flight = Gauge(
+    'ancine_http_requests_in_flight', 'Pedidos em processamento.'
+)
+
+# --- Backend (Supabase/PostgREST) ---
+
+backend_duration = Histogram(
+    'ancine_backend_request_duration_seconds', 'Duração de cada chamada ao backend.',
+    ('resource', 'shape', 'outcome')
+)
+backend_pool_active = Gauge(
+    'ancine_backend_pool_active_threads', 'Threads do pool do backend com uma chamada em curso.'
+)
+backend_events = Counter(
+    'ancine_backend_events_total', 'Chamadas, tentativas, novas tentativas, coberturas e falhas por rota.',
+    ('route', 'event')
+)
+
+# --- Cache ---
+
+cache_requests = Counter(
+    'ancine_cache_requests_total', 'Consultas ao cache por nível e resultado (hit/miss/stale).',
+    ('tier', 'result')
+)
+
+# --- Logging ---
+
+log_records = Counter(
+    'ancine_log_records_total', 'Registos de log colocados na fila, por nível.',
+    ('level',)
+)
+log_dropped = Counter(
+    'ancine_log_dropped_total', 'Registos de log descartados por a fila estar cheia.'
+)
@@ -1,17 +1,18 @@
 # app/services/obra_service.py
 
-from app.services.supabase_service import supabase
+from app.config import settings
+from app.services import backend_service, cache_service, tracing_service
+from app.services.cache_service import cached, cached_first_page
+from app.services.prefetch_service import prefetch_next_page
+from app.services.supabase_service import SupabaseUnavailableError
 
-def get_obras_com_join(params: dict):
-    """
-    Busca obras com JOIN em paises_origem.
-    Permite filtros dinâmicos.
-    """
+def _obras_com_join(supabase, params: dict):
+    # Plano de queries (ver backend_service.run)
     if supabase is None:
-        raise Exception("Serviço Supabase não está disponível.")
+        raise SupabaseUnavailableError("Serviço Supabase não está disponível.")
 
     # 1. Parâmetros de paginação
-    limit = min(int(params.get('limit', 10)), 100)
+    limit = min(int(params.get('limit', settings.DEFAULT_PAGE_SIZE)), settings.MAX_PAGE_SIZE)
     last_id = params.get('last_id')
     primary_key_column = 'cpb' # Chave primária da tabela 'obras'
     
@@ -21,30 +22,39 @@ def get_obras_com_join(params: dict):
     select_query = '*, paises_origem(*)'
     
     # 3. Filtros
-    filter_params = {k: v for k, v in params.items() if k not in ['limit', 'last_id']}
+    with tracing_service.span('query.build', table='obras'):
+        filter_params = {k: v for k, v in params.items() if k not in ['limit', 'last_id']}
     
-    # Se houver um filtro na tabela 'paises_origem',
-    # forçamos um 'inner join' para que apenas as obras que 
-    # correspondem ao país sejam retornadas.
-    if any(key.startswith('paises_origem.') for key in filter_params):
-        select_query = '*, paises_origem!inner(*)'
+        # Se houver um filtro na tabela 'paises_origem',
+        # forçamos um 'inner join' para que apenas as obras que 
+        # correspondem ao país sejam retornadas.
+        if any(key.startswith('paises_origem.') for key in filter_params):
+            select_query = '*, paises_origem!inner(*)'
 
-    query_builder = supabase.table('obras').select(select_query, count='exact')
+        # Reaproveita a contagem já conhecida para estes filtros, só na primeira
+        # página: com last_id, o count='exact' conta apenas as linhas depois do cursor
+        count_key = cache_service.count_key('obras', select_query, filter_params) if not last_id else None
+        known_count = cache_service.get(count_key, persist=True) if count_key else None
+        query_builder = supabase.table('obras').select(select_query, count=None if known_count is not None else 'exact')
 
-    for key, value in filter_params.items():
-        query_builder = query_builder.eq(key, value)
+        for key, value in filter_params.items():
+            query_builder = query_builder.eq(key, value)
     
-    # 4. Paginação
-    query_builder = query_builder.order(primary_key_column)
-    if last_id:
-        query_builder = query_builder.gt(primary_key_column, last_id)
+        # 4. Paginação
+        query_builder = query_builder.order(primary_key_column)
+        if last_id:
+            query_builder = query_builder.gt(primary_key_column, last_id)
     
     # 5. Executa
-    response = query_builder.limit(limit + 1).execute()
+    response = yield query_builder.limit(limit + 1)
     
     # 6. Processa e Retorna
     docs_with_extra = response.data
-    total_count = response.count
+    total_count = known_count
+    if total_count is None:
+        total_count = response.count
+        if count_key is not None:
+            cache_service.set(count_key, total_count, persist=True)
     
     has_next = len(docs_with_extra) > limit
     docs_for_page = docs_with_extra[:limit]
@@ -63,10 +73,39 @@ def get_obras_com_join(params: dict):
     return docs_for_page, pagination_info
 
 
-def get_stats_obras_por_tipo():
-    """Chama a função RPC 'contar_obras_por_tipo' do banco."""
+@prefetch_next_page()
+@cached_first_page()
+def get_obras_com_join(params: dict):
+    """
+    Busca obras com JOIN em paises_origem.
+    Permite filtros dinâmicos.
+    """
+    return backend_service.run(_obras_com_join, params)
+
+
+@prefetch_next_page()
+@cached_first_page()
+async def get_obras_com_join_async(params: dict):
+    """Versão assíncrona (modo ASGI) de `get_obras_com_join`."""
+    return await backend_service.run_async(_obras_com_join, params)
+
+
+def _stats_obras_por_tipo(supabase):
+    # Plano de queries (ver backend_service.run)
     if supabase is None:
-        raise Exception("Serviço Supabase não está disponível.")
+        raise SupabaseUnavailableError("Serviço Supabase não está disponível.")
         
-    response = supabase.rpc('contar_obras_por_tipo').execute()
-    return response.data
\ No newline at end of file
+    response = yield backend_service.Call(supabase.rpc('contar_obras_por_tipo'), idempotent=True)
+    return response.data
+
+
+@cached(ttl=settings.KPI_CACHE_TTL, persist=True)
+def get_stats_obras_por_tipo():
+    """Chama a função RPC 'contar_obras_por_tipo' do banco."""
+    return backend_service.run(_stats_obras_por_tipo)
+
+
+@cached(ttl=settings.KPI_CACHE_TTL, persist=True)
+async def get_stats_obras_por_tipo_async():
+    """Versão assíncrona (modo ASGI) de `get_stats_obras_por_tipo`."""
+    return await backend_service.run_async(_stats_obras_por_tipo)
@@ -0,0 +1,280 @@
+# app/services/prefetch_service.py
+
+"""
+Pré-carregamento especulativo da página seguinte das pesquisas paginadas.
+
+Quem percorre `/data/<tabela>` ou `/pesquisa-obras` pede quase sempre o
+`next_cursor` logo a seguir a receber uma página. Com PREFETCH_ENABLED=1,
+cada página servida com `has_next` agenda em segundo plano a leitura das
+PREFETCH_DEPTH páginas seguintes, guardadas por PREFETCH_TTL_SECONDS numa
+área própria (chave: função, argumentos e parâmetros, incluindo o cursor).
+O pedido pela página seguinte leva-a desta área (ou espera pela leitura já
+em curso, em vez de a repetir), e um varrimento sequencial só paga a
+latência do Supabase na primeira página.
+
+Para nunca sobrecarregar o backend, há no máximo PREFETCH_MAX_CONCURRENT
+varrimentos em segundo plano (os excedentes são descartados, não ficam em
+fila), cada um com uma leitura de cada vez, e só começam com o circuit
+breaker fechado e vagas livres no controlo de admissão.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import has_request_context
+
+from app.config import settings
+from app.services import admission_service, backend_service, metrics_service
+
+logger = logging.getLogger(__name__)
+
+pages = metrics_service.Counter(
+    'ancine_prefetch_pages_total',
+    'Páginas seguintes pré-carregadas (fetched, failed, skipped) e servidas (hit, waited, miss).',
+    ('result',)
+)
+
+# Chave -> (resultado, expira em)
+_pages = OrderedDict()
+# Chave -> evento, das leituras em curso
+_inflight = {}
+_active = 0
+_lock = threading.Lock()
+
+_executor = None
+_tasks = set()
+
+metrics_service.Gauge(
+    'ancine_prefetch_stored_pages', 'Páginas pré-carregadas à espera de serem pedidas.',
+    function=lambda: len(_pages)
+)
+
+
+def _get_executor():
+    # Criado no primeiro uso: as threads não sobrevivem ao fork do Gunicorn
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PREFETCH_MAX_CONCURRENT, thread_name_prefix='prefetch'
+                )
+    return _executor
+
+
+def _key(key_prefix, args):
+    return (key_prefix, args[:-1], tuple(sorted(args[-1].items())))
+
+
+def _next_page(key_prefix, args, result):
+    """Argumentos e chave da página seguinte a `result`, ou None se for a última."""
+    pagination = result[1]
+    if not pagination.get('has_next') or pagination.get('next_cursor') is None:
+        return None
+    next_args = (*args[:-1], {**args[-1], 'last_id': str(pagination['next_cursor'])})
+    return next_args, _key(key_prefix, next_args)
+
+
+def _pop(key):
+    with _lock:
+        entry = _pages.pop(key, None)
+        if entry is None or entry[1] < time.monotonic():
+            return None, _inflight.get(key)
+        return entry[0], None
+
+
+def _put(key, result):
+    with _lock:
+        _pages[key] = (result, time.monotonic() + settings.PREFETCH_TTL_SECONDS)
+        while len(_pages) > settings.PREFETCH_MAX_PAGES:
+            _pages.popitem(last=False)
+
+
+def _peek(key):
+    with _lock:
+        entry = _pages.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+
+def _claim(key):
+    """Marca a página como em leitura; None se já houver uma leitura em curso."""
+    with _lock:
+        if key in _inflight:
+            return None
+        event = _inflight[key] = threading.Event()
+        return event
+
+
+def _release(key, event):
+    with _lock:
+        _inflight.pop(key, None)
+    event.set()
+
+
+def _has_headroom() -> bool:
+    if backend_service.breaker.state != 'closed':
+        return False
+    return not (settings.ADMISSION_ENABLED and admission_service.controller.busy())
+
+
+def _start_scan() -> bool:
+    """Reserva um varrimento em segundo plano, se houver folga."""
+    global _active
+    with _lock:
+        if _active >= settings.PREFETCH_MAX_CONCURRENT:
+            return False
+        if not _has_headroom():
+            return False
+        _active += 1
+        return True
+
+
+def _end_scan():
+    global _active
+    with _lock:
+        _active -= 1
+
+
+def _take(key):
+    """A página pré-carregada `key` (esperando pela leitura em curso), ou None."""
+    result, event = _pop(key)
+    if result is None and event is not None:
+        if event.wait(settings.BACKEND_TIMEOUT):
+            result, _ = _pop(key)
+        pages.inc(result='waited' if result is not None else 'miss')
+        return result
+    pages.inc(result='hit' if result is not None else 'miss')
+    return result
+
+
+async def _take_async(key):
+    result, event = _pop(key)
+    if result is None and event is not None:
+        if await asyncio.to_thread(event.wait, settings.BACKEND_TIMEOUT):
+            result, _ = _pop(key)
+        pages.inc(result='waited' if result is not None else 'miss')
+        return result
+    pages.inc(result='hit' if result is not None else 'miss')
+    return result
+
+
+def _scan(func, key_prefix, args, result):
+    """Lê (uma de cada vez) as PREFETCH_DEPTH páginas a seguir a `result`."""
+    try:
+        for _ in range(settings.PREFETCH_DEPTH):
+            step = _next_page(key_prefix, args, result)
+            if step is None:
+                return
+            args, key = step
+            stored = _peek(key)
+            if stored is None:
+                event = _claim(key)
+                if event is None:
+                    return
+                try:
+                    stored = func(*args)
+                    _put(key, stored)
+                    pages.inc(result='fetched')
+                except Exception as e:
+                    pages.inc(result='failed')
+                    logger.debug(f"Pré-carregamento da página seguinte falhou: {e}")
+                    return
+                finally:
+                    _release(key, event)
+            result = stored
+    finally:
+        _end_scan()
+
+
+async def _scan_async(func, key_prefix, args, result):
+    try:
+        for _ in range(settings.PREFETCH_DEPTH):
+            step = _next_page(key_prefix, args, result)
+            if step is None:
+                return
+            args, key = step
+            stored = _peek(key)
+            if stored is None:
+                event = _claim(key)
+                if event is None:
+                    return
+                try:
+                    stored = await func(*args)
+                    _put(key, stored)
+                    pages.inc(result='fetched')
+                except Exception as e:
+                    pages.inc(result='failed')
+                    logger.debug(f"Pré-carregamento da página seguinte falhou: {e}")
+                    return
+                finally:
+                    _release(key, event)
+            result = stored
+    finally:
+        _end_scan()
+
+
+def _enabled(when, args) -> bool:
+    # Só para pedidos (o aquecimento não agenda varrimentos)
+    return settings.PREFETCH_ENABLED and has_request_context() and (when is None or when(*args))
+
+
+def prefetch_next_page(when=None):
+    """
+    Decorador para funções de pesquisa paginada que recebem `params: dict`
+    como último argumento e retornam (dados, paginação): ver a descrição do
+    módulo. `when(*args)` pode excluir chamadas (ex.: páginas servidas do
+    snapshot, que não custam nada). Também aceita funções assíncronas.
+    """
+    def decorator(func):
+        key_prefix = f"{func.__module__}.{func.__name__}"
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args):
+                if not _enabled(when, args):
+                    return await func(*args)
+                result = await _take_async(_key(key_prefix, args)) if args[-1].get('last_id') else None
+                if result is None:
+                    result = await func(*args)
+                if _next_page(key_prefix, args, result) is not None:
+                    if _start_scan():
+                        # Fora do contexto do pedido (deadline, span e request)
+                        task = asyncio.get_running_loop().create_task(
+                            _scan_async(func, key_prefix, args, result), context=contextvars.Context()
+                        )
+                        _tasks.add(task)
+                        task.add_done_callback(_tasks.discard)
+                    else:
+                        pages.inc(result='skipped')
+                return result
+        else:
+            @functools.wraps(func)
+            def wrapper(*args):
+                if not _enabled(when, args):
+                    return func(*args)
+                result = _take(_key(key_prefix, args)) if args[-1].get('last_id') else None
+                if result is None:
+                    result = func(*args)
+                if _next_page(key_prefix, args, result) is not None:
+                    if _start_scan():
+                        _get_executor().submit(_scan, func, key_prefix, args, result)
+                    else:
+                        pages.inc(result='skipped')
+                return result
+
+        return wrapper
+    return decorator
+
+
+def clear():
+    with _lock:
+        _pages.clear()
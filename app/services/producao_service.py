@@ -1,37 +1,43 @@
-from app.services.supabase_service import supabase
+from app.config import settings
+from app.services import backend_service, tracing_service
+from app.services.supabase_service import SupabaseUnavailableError, get_supabase
 
 # Você está tentando importar esta classe
 class FilmagemService:
     
-    def __init__(self):
+    @property
+    def supabase(self):
+        # O cliente só é obtido no primeiro uso (não no import do módulo)
+        supabase = get_supabase()
         if supabase is None:
-            raise Exception("Serviço Supabase não está disponível.")
-        self.supabase = supabase
+            raise SupabaseUnavailableError("Serviço Supabase não está disponível.")
+        return supabase
 
     def get_filmagens_estrangeiras(self, params: dict):
         """
         Busca dados da tabela 'filmagem_estrangeira' com filtros e paginação.
         """
         # 1. Parâmetros de paginação
-        limit = min(int(params.get('limit', 10)), 100)
+        limit = min(int(params.get('limit', settings.DEFAULT_PAGE_SIZE)), settings.MAX_PAGE_SIZE)
         last_id = params.get('last_id')
         primary_key_column = 'id_filmagem' # Chave da tabela
 
         # 2. Constrói a query
-        query_builder = self.supabase.table('filmagem_estrangeira').select('*', count='exact')
+        with tracing_service.span('query.build', table='filmagem_estrangeira'):
+            query_builder = self.supabase.table('filmagem_estrangeira').select('*', count='exact')
 
-        # 3. Filtros
-        filter_params = {k: v for k, v in params.items() if k not in ['limit', 'last_id']}
-        for key, value in filter_params.items():
-            query_builder = query_builder.eq(key, value)
+            # 3. Filtros
+            filter_params = {k: v for k, v in params.items() if k not in ['limit', 'last_id']}
+            for key, value in filter_params.items():
+                query_builder = query_builder.eq(key, value)
         
-        # 4. Paginação
-        query_builder = query_builder.order(primary_key_column)
-        if last_id:
-            query_builder = query_builder.gt(primary_key_column, last_id)
+            # 4. Paginação
+            query_builder = query_builder.order(primary_key_column)
+            if last_id:
+                query_builder = query_builder.gt(primary_key_column, last_id)
 
         # 5. Executa
-        response = query_builder.limit(limit + 1).execute()
+        response = backend_service.execute(query_builder.limit(limit + 1))
 
         # 6. Processa e Retorna (Lógica de paginação copiada dos outros serviços)
         docs_with_extra = response.data
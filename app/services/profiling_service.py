@@ -0,0 +1,264 @@
+# app/services/profiling_service.py
+
+"""
+Profiling a pedido, para reproduzir em produção os pontos quentes que
+dependem de combinações reais de filtros.
+
+Desligado por padrão (PROFILING_ENABLED=0): nesse caso os hooks nem são
+registados e não há custo nenhum. Ligado, um pedido é perfilado quando:
+  - traz `X-Profile: <PROFILING_TOKEN>` (opcionalmente `X-Profile-Mode:
+    cprofile|sample` e `X-Profile-Output: inline|store`); ou
+  - é escolhido pela amostragem PROFILING_SAMPLE_RATE (guardado em disco).
+
+Modos:
+  - 'cprofile': profiler determinístico; resultado em formato pstats
+    (abre-se com `python -m pstats` ou snakeviz);
+  - 'sample':   profiler por amostragem da stack da thread do pedido;
+    resultado em JSON do speedscope (https://www.speedscope.app).
+
+Com `inline` o corpo da resposta é substituído pelo perfil; com `store` o
+perfil é gravado em PROFILE_DIR e o caminho vem no cabeçalho X-Profile-File.
+
+Só no modo WSGI, onde o pedido corre todo na mesma thread: no modo ASGI os
+hooks e a rota passam por threads diferentes (ver app/asgi.py) e os pedidos
+não são perfilados.
+
+Também há snapshots do tracemalloc (rota /status/tracemalloc) para
+encontrar os pontos de alocação no caminho dos JOINs e da serialização.
+"""
+
+import cProfile
+import hmac
+import json
+import marshal
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+from app.config import settings
+
+MODES = ('cprofile', 'sample')
+
+# Só um profiler determinístico pode estar ativo por processo
+_profile_lock = threading.Lock()
+
+_last_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def is_authorized(request) -> bool:
+    """O pedido traz o token de profiling correto (comparação em tempo constante)."""
+    token = settings.PROFILING_TOKEN
+    supplied = request.headers.get('X-Profile', '')
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+class DeterministicProfiler:
+    """cProfile sobre a thread do pedido; exporta pstats."""
+
+    mode = 'cprofile'
+    extension = 'prof'
+    mimetype = 'application/octet-stream'
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def dump(self) -> bytes:
+        # Mesmo formato que pstats.Stats.dump_stats()
+        self._profile.create_stats()
+        return marshal.dumps(self._profile.stats)
+
+
+class SamplingProfiler:
+    """
+    Amostra a stack da thread do pedido a cada `interval` segundos a partir
+    de uma thread auxiliar; exporta no formato 'sampled' do speedscope.
+    """
+
+    mode = 'sample'
+    extension = 'speedscope.json'
+    mimetype = 'application/json'
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self._thread_id = threading.get_ident()
+        self._frames = []
+        self._frame_index = {}
+        self._samples = []
+        self._weights = []
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+        self._started = None
+        self._elapsed = 0.0
+
+    def _frame_id(self, code):
+        key = (code.co_filename, code.co_name, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self._frames)
+            self._frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+        return index
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()  # speedscope: da raiz para a folha
+            self._samples.append(stack)
+            self._weights.append(now - last)
+            last = now
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        self._elapsed = time.perf_counter() - self._started
+
+    def dump(self, name='request') -> bytes:
+        profile = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'ancine-api',
+            'shared': {'frames': self._frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': self._elapsed,
+                'samples': self._samples,
+                'weights': self._weights
+            }]
+        }
+        return json.dumps(profile).encode()
+
+
+def start(mode=None):
+    """
+    Inicia um profiler na thread atual. Retorna None se já houver um
+    profiler determinístico ativo noutro pedido.
+    """
+    mode = mode if mode in MODES else settings.PROFILING_MODE
+    if mode == 'sample':
+        profiler = SamplingProfiler(settings.PROFILING_SAMPLE_INTERVAL)
+    else:
+        if not _profile_lock.acquire(blocking=False):
+            return None
+        profiler = DeterministicProfiler()
+    try:
+        profiler.start()
+    except Exception:
+        if mode != 'sample':
+            _profile_lock.release()
+        raise
+    return profiler
+
+
+def finish(profiler, name='request'):
+    """Para o profiler e retorna o perfil serializado (bytes)."""
+    try:
+        profiler.stop()
+    finally:
+        if profiler.mode == 'cprofile':
+            _profile_lock.release()
+    return profiler.dump() if profiler.mode == 'cprofile' else profiler.dump(name)
+
+
+def store(profile_bytes, profiler, name='request') -> str:
+    """Grava o perfil em PROFILE_DIR e retorna o caminho."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_') or 'request'
+    filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{os.getpid()}.{profiler.extension}"
+    path = os.path.join(settings.PROFILE_DIR, filename)
+    with open(path, 'wb') as f:
+        f.write(profile_bytes)
+    return path
+
+
+# --- tracemalloc ---
+
+def tracemalloc_start(frames=10):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def tracemalloc_stop():
+    global _last_snapshot
+    with _snapshot_lock:
+        _last_snapshot = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def tracemalloc_report(limit=20, group_by='lineno', compare=False, app_only=False) -> dict:
+    """
+    Principais pontos de alocação desde o início do tracemalloc (ou, com
+    `compare=True`, a diferença em relação ao snapshot anterior).
+    """
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        return {'tracing': False}
+
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+    if app_only:
+        app_dir = os.path.join(settings.BASE_DIR, 'app', '*')
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(True, app_dir),))
+
+    with _snapshot_lock:
+        previous, _last_snapshot = _last_snapshot, snapshot
+
+    if compare and previous is not None:
+        stats = snapshot.compare_to(previous, group_by)[:limit]
+        top = [{
+            'location': _format_trace(stat.traceback, group_by),
+            'size_kb': round(stat.size / 1024, 1),
+            'size_diff_kb': round(stat.size_diff / 1024, 1),
+            'count': stat.count,
+            'count_diff': stat.count_diff
+        } for stat in stats]
+    else:
+        stats = snapshot.statistics(group_by)[:limit]
+        top = [{
+            'location': _format_trace(stat.traceback, group_by),
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count
+        } for stat in stats]
+
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        'tracing': True,
+        'group_by': group_by,
+        'compared': bool(compare and previous is not None),
+        'traced_current_kb': round(current / 1024, 1),
+        'traced_peak_kb': round(peak / 1024, 1),
+        'top': top
+    }
+
+
+def _format_trace(traceback, group_by):
+    if group_by == 'traceback':
+        return [f"{frame.filename}:{frame.lineno}" for frame in traceback]
+    frame = traceback[0]
+    return frame.filename if group_by == 'filename' else f"{frame.filename}:{frame.lineno}"
@@ -0,0 +1,262 @@
+# app/services/query_log_service.py
+
+"""
+Registo de queries ao backend por assinatura normalizada.
+
+Cada chamada feita por `backend_service.execute()` é reduzida a uma
+assinatura sem valores: tabela (ou RPC), colunas filtradas e operadores,
+ordenação, JOINs (embedded selects) e tipo de contagem. Por assinatura
+guardam-se frequência, latências e número de execuções lentas
+(>= SLOW_QUERY_MS); as queries lentas também são registadas no log.
+
+A rota /status/queries mostra as assinaturas mais lentas/frequentes e
+/status/queries/indexes sugere instruções CREATE INDEX para as colunas
+filtradas com frequência.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Parâmetros do PostgREST que não são filtros
+_RESERVED_PARAMS = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns'}
+
+# Operadores de igualdade (a coluna vai para o início do índice composto)
+_EQUALITY_OPS = {'eq', 'in', 'is'}
+_RANGE_OPS = {'gt', 'gte', 'lt', 'lte'}
+_PATTERN_OPS = {'like', 'ilike'}
+
+_stats = {}
+_slow_log = deque(maxlen=200)
+_lock = threading.Lock()
+
+
+def _parse_select(select):
+    """Recursos embutidos no select: 'a, complexos!inner(*, exibidores(*))' -> ['complexos!inner', 'exibidores']."""
+    joins = []
+    token = ''
+    for char in select or '':
+        if char == '(':
+            name = token.strip().split(':')[-1]
+            if name and name != '*':
+                joins.append(name)
+            token = ''
+        elif char in ',)':
+            token = ''
+        else:
+            token += char
+    return joins
+
+
+def _operator(value):
+    """'eq.SP' -> 'eq'; 'not.eq.SP' -> 'not.eq'."""
+    parts = str(value).split('.', 2)
+    if parts[0] == 'not' and len(parts) > 1:
+        return f"not.{parts[1]}"
+    return parts[0]
+
+
+def signature(query_builder) -> dict:
+    """Assinatura normalizada (sem valores) de uma chamada ao backend."""
+    from app.services.backend_service import describe
+
+    resource, shape = describe(query_builder)
+    config = getattr(query_builder, 'request', None)
+    params = getattr(config, 'params', None)
+    items = list(params.multi_items()) if params is not None and hasattr(params, 'multi_items') else []
+
+    filters = sorted(
+        (key, _operator(value)) for key, value in items if key not in _RESERVED_PARAMS
+    )
+    order = [value for key, value in items if key == 'order']
+    select = next((value for key, value in items if key == 'select'), '')
+    headers = getattr(config, 'headers', None)
+    prefer = (headers.get('prefer') if headers is not None else None) or ''
+
+    return {
+        'resource': resource,
+        'shape': shape,
+        'filters': filters,
+        'order': order,
+        'joins': _parse_select(select),
+        'count': 'exact' if 'count=exact' in prefer else None
+    }
+
+
+def signature_key(sig) -> str:
+    parts = [sig['resource']]
+    if sig['filters']:
+        parts.append('filtros: ' + ', '.join(f"{col} {op}" for col, op in sig['filters']))
+    if sig['order']:
+        parts.append('ordem: ' + ', '.join(sig['order']))
+    if sig['joins']:
+        parts.append('joins: ' + ', '.join(sig['joins']))
+    if sig['count']:
+        parts.append(f"count={sig['count']}")
+    return ' | '.join(parts)
+
+
+def record(query_builder, seconds, ok=True):
+    """Regista a execução de uma query (chamado por backend_service)."""
+    if not settings.QUERY_LOG_ENABLED:
+        return
+    try:
+        sig = signature(query_builder)
+    except Exception as e:
+        logger.warning(f"Falha ao normalizar a query: {e}")
+        return
+    key = signature_key(sig)
+    elapsed_ms = seconds * 1000
+    slow = elapsed_ms >= settings.SLOW_QUERY_MS
+
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            if len(_stats) >= settings.QUERY_LOG_MAX_SIGNATURES:
+                # Descarta a assinatura menos frequente
+                del _stats[min(_stats, key=lambda k: _stats[k]['calls'])]
+            entry = _stats[key] = {
+                'signature': key,
+                'detail': sig,
+                'calls': 0,
+                'errors': 0,
+                'slow': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'samples': deque(maxlen=100),
+                'last_seen': None
+            }
+        entry['calls'] += 1
+        entry['errors'] += 0 if ok else 1
+        entry['slow'] += 1 if slow else 0
+        entry['total_ms'] += elapsed_ms
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+        entry['samples'].append(elapsed_ms)
+        entry['last_seen'] = time.time()
+        if slow:
+            _slow_log.append({'signature': key, 'ms': round(elapsed_ms, 1), 'at': entry['last_seen']})
+
+    if slow:
+        logger.warning(f"Query lenta ({elapsed_ms:.0f} ms): {key}",
+                       extra={'query_signature': key, 'query_ms': round(elapsed_ms, 1), 'ok': ok})
+
+
+def _summary(entry) -> dict:
+    samples = sorted(entry['samples'])
+    p95 = samples[min(len(samples) - 1, int(0.95 * (len(samples) - 1) + 0.5))] if samples else 0
+    return {
+        'signature': entry['signature'],
+        'calls': entry['calls'],
+        'errors': entry['errors'],
+        'slow': entry['slow'],
+        'avg_ms': round(entry['total_ms'] / entry['calls'], 2),
+        'p95_ms': round(p95, 2),
+        'max_ms': round(entry['max_ms'], 2),
+        'total_ms': round(entry['total_ms'], 1),
+        'last_seen': entry['last_seen']
+    }
+
+
+def top(sort='total', limit=20) -> list:
+    """Assinaturas ordenadas por 'total' (tempo acumulado), 'slow', 'avg' ou 'calls'."""
+    sort_keys = {
+        'total': lambda s: s['total_ms'],
+        'slow': lambda s: (s['slow'], s['p95_ms']),
+        'avg': lambda s: s['avg_ms'],
+        'calls': lambda s: s['calls'],
+    }
+    with _lock:
+        summaries = [_summary(entry) for entry in _stats.values()]
+    summaries.sort(key=sort_keys.get(sort, sort_keys['total']), reverse=True)
+    return summaries[:limit]
+
+
+def slow_log(limit=50) -> list:
+    with _lock:
+        return list(_slow_log)[-limit:][::-1]
+
+
+def clear():
+    with _lock:
+        _stats.clear()
+        _slow_log.clear()
+
+
+def _index_name(table, columns):
+    return f"idx_{table}_{'_'.join(columns)}"[:63]
+
+
+def suggest_indexes(min_calls=None) -> list:
+    """
+    Sugestões de CREATE INDEX a partir das assinaturas registadas:
+      - colunas com igualdade primeiro, depois a de intervalo/ordenação
+        (o cursor de paginação), num índice composto;
+      - filtros em tabelas embutidas (ex.: complexos.uf_complexo) indexam a
+        tabela embutida;
+      - ilike/like usam um índice GIN com pg_trgm.
+    Índices que seriam só a chave primária são omitidos.
+    """
+    from app.services.sala_service import PRIMARY_KEY_MAP
+
+    min_calls = settings.INDEX_ADVISOR_MIN_CALLS if min_calls is None else min_calls
+    with _lock:
+        entries = [(entry['detail'], entry['calls'], entry['total_ms']) for entry in _stats.values()]
+
+    suggestions = {}
+
+    def add(table, columns, statement, calls, total_ms):
+        key = statement
+        suggestion = suggestions.get(key)
+        if suggestion is None:
+            suggestion = suggestions[key] = {
+                'table': table, 'columns': columns, 'statement': statement, 'calls': 0, 'total_ms': 0.0
+            }
+        suggestion['calls'] += calls
+        suggestion['total_ms'] += total_ms
+
+    for sig, calls, total_ms in entries:
+        table = sig['resource']
+        if calls < min_calls or table.startswith('rpc:'):
+            continue
+
+        equality, ranges, embedded = [], [], {}
+        for column, op in sig['filters']:
+            base_op = op.split('.')[-1]
+            if '.' in column:
+                # Filtro numa tabela embutida: 'complexos.uf_complexo'
+                embedded_table, embedded_column = column.rsplit('.', 1)
+                embedded.setdefault(embedded_table.split('.')[-1], []).append((embedded_column, base_op))
+            elif base_op in _PATTERN_OPS:
+                statement = (f"CREATE INDEX IF NOT EXISTS {_index_name(table, [column, 'trgm'])} "
+                             f"ON {table} USING gin ({column} gin_trgm_ops);")
+                add(table, [column], statement, calls, total_ms)
+            elif base_op in _EQUALITY_OPS:
+                equality.append(column)
+            elif base_op in _RANGE_OPS:
+                ranges.append(column)
+
+        # Coluna de ordenação/cursor no fim do índice composto
+        order_columns = [value.split('.')[0] for value in sig['order'] for value in value.split(',')]
+        trailing = next((c for c in ranges + order_columns if c not in equality), None)
+        columns = sorted(set(equality)) + ([trailing] if trailing else [])
+        if columns and columns != [PRIMARY_KEY_MAP.get(table)]:
+            statement = (f"CREATE INDEX IF NOT EXISTS {_index_name(table, columns)} "
+                         f"ON {table} ({', '.join(columns)});")
+            add(table, columns, statement, calls, total_ms)
+
+        for embedded_table, filters in embedded.items():
+            embedded_columns = sorted({column for column, op in filters if op not in _PATTERN_OPS})
+            if embedded_columns and embedded_columns != [PRIMARY_KEY_MAP.get(embedded_table)]:
+                statement = (f"CREATE INDEX IF NOT EXISTS {_index_name(embedded_table, embedded_columns)} "
+                             f"ON {embedded_table} ({', '.join(embedded_columns)});")
+                add(embedded_table, embedded_columns, statement, calls, total_ms)
+
+    result = sorted(suggestions.values(), key=lambda s: s['total_ms'], reverse=True)
+    for suggestion in result:
+        suggestion['total_ms'] = round(suggestion['total_ms'], 1)
+    return result
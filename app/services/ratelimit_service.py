@@ -0,0 +1,241 @@
+# app/services/ratelimit_service.py
+
+"""
+Rate limiting por cliente (token bucket) com custo por pedido.
+
+Cada cliente, identificado pela chave `X-API-Key` (se estiver em
+RATE_LIMIT_API_KEYS) ou, na falta dela, pelo IP, tem um balde de RATE_LIMIT_CAPACITY unidades que se repõe a
+RATE_LIMIT_REFILL_PER_SECOND unidades por segundo. Cada pedido gasta o seu
+custo estimado (ver `estimate_cost`): uma primeira página em cache custa 1,
+um varrimento com JOINs, filtros e limit=100 custa várias unidades.
+
+Os baldes vivem em memória por processo (`MemoryStore`). Com várias
+instâncias, RATE_LIMIT_STORE=redis://... partilha-os num Redis (o pacote
+`redis` só é necessário nesse caso).
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Caminhos sem limite (documentação, estado interno, handlers do App Engine)
+EXEMPT_PATH_PREFIXES = ('/docs', '/apispec.json', '/flasgger_static', '/status/', '/metrics', '/_ah/')
+
+# Rotas de pesquisa com JOINs (embedded selects no PostgREST)
+JOIN_PATH_MARKERS = ('/pesquisa',)
+
+_PAGINATION_ARGS = {'limit', 'last_id'}
+
+
+class MemoryStore:
+    """Baldes em memória (um dicionário por processo)."""
+
+    # Acima deste número de baldes, os que já estão cheios são descartados
+    MAX_BUCKETS = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, cost, capacity, refill_per_second):
+        """
+        Tenta gastar `cost` unidades do balde `key`.
+        Retorna (permitido, unidades restantes, segundos até haver `cost`).
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._prune(now, capacity, refill_per_second)
+
+        wait = 0.0 if allowed else (cost - tokens) / refill_per_second
+        return allowed, tokens, wait
+
+    def _prune(self, now, capacity, refill_per_second):
+        full_after = capacity / refill_per_second
+        for key, (_, updated_at) in list(self._buckets.items()):
+            if now - updated_at >= full_after:
+                del self._buckets[key]
+
+
+class RedisStore:
+    """Baldes partilhados num Redis (operação atómica em Lua)."""
+
+    _SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local now = tonumber(ARGV[4])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url):
+        import redis  # dependência opcional, só com RATE_LIMIT_STORE=redis://...
+        self._client = redis.Redis.from_url(url)
+        self._consume = self._client.register_script(self._SCRIPT)
+
+    def consume(self, key, cost, capacity, refill_per_second):
+        allowed, tokens = self._consume(
+            keys=[f"ratelimit:{key}"],
+            args=[capacity, refill_per_second, cost, time.time()]
+        )
+        tokens = float(tokens)
+        wait = 0.0 if allowed else (cost - tokens) / refill_per_second
+        return bool(allowed), tokens, wait
+
+
+def create_store(url=None):
+    """Store configurado em RATE_LIMIT_STORE ('memory' ou 'redis://...')."""
+    url = url or settings.RATE_LIMIT_STORE
+    if url.startswith(('redis://', 'rediss://')):
+        try:
+            return RedisStore(url)
+        except Exception as e:
+            logger.warning(f"Store de rate limiting '{url}' indisponível, a usar memória: {e}")
+    return MemoryStore()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_store()
+    return _store
+
+
+def rate_limit_cost(cost):
+    """
+    Decorador de rota: custo fixo (int) ou função `cost(request) -> int`
+    que substitui a estimativa (ex.: exportações, pelo tamanho pedido).
+    """
+    def decorator(view):
+        view.rate_limit_cost = cost
+        return view
+    return decorator
+
+
+def _hash_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+# Hashes das API keys aceites (RATE_LIMIT_API_KEYS)
+_api_keys = frozenset(_hash_key(key.strip()) for key in settings.RATE_LIMIT_API_KEYS.split(',') if key.strip())
+
+
+def client_ip(request) -> str:
+    """
+    IP do cliente, só a partir de cabeçalhos que ele não controla (ver
+    RATE_LIMIT_CLIENT_IP): um valor novo a cada pedido daria um balde novo.
+    """
+    if settings.RATE_LIMIT_CLIENT_IP == 'appengine':
+        address = request.headers.get('X-AppEngine-User-IP')
+    elif settings.RATE_LIMIT_CLIENT_IP == 'forwarded':
+        # Cada proxy acrescenta o IP de quem lhe ligou no fim da lista
+        hops = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+        address = hops[-settings.RATE_LIMIT_PROXY_HOPS] if len(hops) >= settings.RATE_LIMIT_PROXY_HOPS else None
+    else:
+        address = None
+    return address or request.remote_addr or 'unknown'
+
+
+def client_key(request) -> str:
+    """Identificador do cliente: hash da API key (se for aceite), senão o IP."""
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        hashed = _hash_key(api_key)
+        if hashed in _api_keys:
+            return 'key:' + hashed
+    return 'ip:' + client_ip(request)
+
+
+def estimate_cost(request, view=None) -> int:
+    """
+    Custo estimado de um pedido pela sua forma:
+      - primeira página sem filtros (servida do cache): 1;
+      - +1 por cada 25 registos pedidos (limit);
+      - +1 com filtros (count='exact' sobre o conjunto filtrado);
+      - +1 para páginas seguintes (last_id: nunca estão em cache);
+      - +2 para pesquisas com JOINs.
+    """
+    custom = getattr(view, 'rate_limit_cost', None)
+    if custom is not None:
+        return max(1, int(custom(request) if callable(custom) else custom))
+
+    args = request.args
+    has_filters = any(key not in _PAGINATION_ARGS for key in args)
+    deep_page = bool(args.get('last_id'))
+    if not has_filters and not deep_page:
+        return 1
+
+    try:
+        limit = min(int(args.get('limit', settings.DEFAULT_PAGE_SIZE)), settings.MAX_PAGE_SIZE)
+    except ValueError:
+        limit = settings.DEFAULT_PAGE_SIZE
+
+    cost = 1 + limit // 25
+    if has_filters:
+        cost += 1
+    if deep_page:
+        cost += 1
+    if any(marker in request.path for marker in JOIN_PATH_MARKERS):
+        cost += 2
+    return cost
+
+
+def is_exempt(request) -> bool:
+    return request.path == '/' or request.path.startswith(EXEMPT_PATH_PREFIXES)
+
+
+def check(request, view=None):
+    """
+    Gasta o custo do pedido do balde do cliente.
+    Retorna um dicionário com 'allowed', 'cost', 'remaining', 'limit' e
+    'retry_after' (segundos inteiros, quando não permitido).
+    """
+    cost = estimate_cost(request, view)
+    capacity = settings.RATE_LIMIT_CAPACITY
+    # Um pedido mais caro do que o balde inteiro nunca passaria
+    cost = min(cost, capacity)
+    try:
+        allowed, remaining, wait = get_store().consume(
+            client_key(request), cost, capacity, settings.RATE_LIMIT_REFILL_PER_SECOND
+        )
+    except Exception as e:
+        # Store partilhado em baixo: não bloqueia o tráfego
+        logger.warning(f"Falha no rate limiting: {e}")
+        return {'allowed': True, 'cost': cost, 'remaining': None, 'limit': capacity, 'retry_after': 0}
+
+    return {
+        'allowed': allowed,
+        'cost': cost,
+        'remaining': int(remaining),
+        'limit': capacity,
+        'retry_after': 0 if allowed else max(1, math.ceil(wait))
+    }
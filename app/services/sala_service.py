@@ -1,48 +1,75 @@
 # app/services/sala_service.py
 
-from app.services.supabase_service import supabase
+from app.config import settings
+from app.services import backend_service, cache_service, tracing_service
+from app.services.cache_service import cached, cached_first_page
+from app.services.prefetch_service import prefetch_next_page
+from app.services.snapshot_service import get_snapshot
+from app.services.supabase_service import SupabaseUnavailableError
 
-def get_generic_table_data(table_name: str, params: dict):
-    """
-    Busca dados de uma tabela genérica com filtros e paginação.
-    (Esta é a lógica do seu endpoint /data/<string:table_name>)
-    """
-    if supabase is None:
-        raise Exception("Serviço Supabase não está disponível.")
+# Tabelas acessíveis pelo endpoint genérico e as respetivas chaves primárias
+PRIMARY_KEY_MAP = {
+    'exibidores': 'registro_exibidor',
+    'complexos': 'registro_complexo',
+    'salas': 'registro_sala',
+    'obras': 'cpb',
+    'paises_origem': 'id', # Chave SERIAL da tabela
+    'distribuidoras': 'registro_distribuidora',
+    'lancamentos': 'id' # Chave SERIAL da tabela
+}
 
+
+def _generic_table_data(supabase, table_name: str, params: dict):
+    # Plano de queries (ver backend_service.run)
     # 1. Validação
-    primary_key_map = {
-        'exibidores': 'registro_exibidor',
-        'complexos': 'registro_complexo',
-        'salas': 'registro_sala'
-    }
-    if table_name not in primary_key_map:
+    if table_name not in PRIMARY_KEY_MAP:
         raise ValueError("Nome de tabela inválido.")
     
-    primary_key_column = primary_key_map[table_name]
+    primary_key_column = PRIMARY_KEY_MAP[table_name]
+
+    # Se houver um snapshot Arrow mapeado em memória, os dados "planos"
+    # são servidos diretamente dele, sem ir ao Supabase.
+    snapshot = get_snapshot()
+    if snapshot is not None and snapshot.has_table(table_name):
+        return snapshot.get_page(table_name, params)
+
+    if supabase is None:
+        raise SupabaseUnavailableError("Serviço Supabase não está disponível.")
 
     # 2. Parâmetros
-    limit = min(int(params.get('limit', 10)), 100)
+    limit = min(int(params.get('limit', settings.DEFAULT_PAGE_SIZE)), settings.MAX_PAGE_SIZE)
     last_id = params.get('last_id')
 
     # 3. Constrói a query
-    query_builder = supabase.table(table_name).select('*', count='exact')
-    
-    filter_params = {k: v for k, v in params.items() if k not in ['limit', 'last_id']}
-    for key, value in filter_params.items():
-        if '.' not in key:
-            query_builder = query_builder.eq(key, value)
-    
-    query_builder = query_builder.order(primary_key_column)
-    if last_id:
-        query_builder = query_builder.gt(primary_key_column, last_id)
+    with tracing_service.span('query.build', table=table_name):
+        filter_params = {k: v for k, v in params.items() if k not in ['limit', 'last_id']}
+
+        # Reaproveita a contagem já conhecida para estes filtros: sem
+        # count='exact' o banco não precisa de percorrer todas as linhas filtradas.
+        # Só na primeira página: com last_id, o count='exact' conta apenas as
+        # linhas depois do cursor e não serve para as outras.
+        count_key = cache_service.count_key(table_name, '*', filter_params) if not last_id else None
+        known_count = cache_service.get(count_key, persist=True) if count_key else None
+        query_builder = supabase.table(table_name).select('*', count=None if known_count is not None else 'exact')
+    
+        for key, value in filter_params.items():
+            if '.' not in key:
+                query_builder = query_builder.eq(key, value)
+    
+        query_builder = query_builder.order(primary_key_column)
+        if last_id:
+            query_builder = query_builder.gt(primary_key_column, last_id)
     
     # 4. Executa
-    response = query_builder.limit(limit + 1).execute()
+    response = yield query_builder.limit(limit + 1)
     
     # 5. Processa e Retorna os dados
     docs_with_extra = response.data
-    total_count = response.count
+    total_count = known_count
+    if total_count is None:
+        total_count = response.count
+        if count_key is not None:
+            cache_service.set(count_key, total_count, persist=True)
     
     has_next = len(docs_with_extra) > limit
     docs_for_page = docs_with_extra[:limit]
@@ -61,39 +88,70 @@ def get_generic_table_data(table_name: str, params: dict):
     return docs_for_page, pagination_info
 
 
-def get_salas_com_join(params: dict):
+def _from_backend(table_name: str, params: dict) -> bool:
+    # As páginas servidas do snapshot não precisam de pré-carregamento
+    snapshot = get_snapshot()
+    return snapshot is None or not snapshot.has_table(table_name)
+
+
+@prefetch_next_page(when=_from_backend)
+@cached_first_page()
+def get_generic_table_data(table_name: str, params: dict):
     """
-    Busca salas com JOIN em complexos e exibidores.
-    (Esta é a lógica do seu endpoint /pesquisa-salas)
+    Busca dados de uma tabela genérica com filtros e paginação.
+    (Esta é a lógica do seu endpoint /data/<string:table_name>)
     """
+    return backend_service.run(_generic_table_data, table_name, params)
+
+
+@prefetch_next_page(when=_from_backend)
+@cached_first_page()
+async def get_generic_table_data_async(table_name: str, params: dict):
+    """Versão assíncrona (modo ASGI) de `get_generic_table_data`."""
+    return await backend_service.run_async(_generic_table_data, table_name, params)
+
+
+def _salas_com_join(supabase, params: dict):
+    # Plano de queries (ver backend_service.run)
     if supabase is None:
-        raise Exception("Serviço Supabase não está disponível.")
+        raise SupabaseUnavailableError("Serviço Supabase não está disponível.")
 
     # 1. Parâmetros
-    limit = min(int(params.get('limit', 10)), 100)
+    limit = min(int(params.get('limit', settings.DEFAULT_PAGE_SIZE)), settings.MAX_PAGE_SIZE)
     last_id = params.get('last_id')
     primary_key_column = 'registro_sala'
     
     # 2. Query com JOINs
     select_query = '*, complexos!inner(*, exibidores(*))'
-    query_builder = supabase.table('salas').select(select_query, count='exact')
     
     # 3. Filtros
-    filter_params = {k: v for k, v in params.items() if k not in ['limit', 'last_id']}
-    for key, value in filter_params.items():
-        query_builder = query_builder.eq(key, value)
+    with tracing_service.span('query.build', table='salas'):
+        filter_params = {k: v for k, v in params.items() if k not in ['limit', 'last_id']}
+
+        # Reaproveita a contagem já conhecida para estes filtros, só na primeira
+        # página: com last_id, o count='exact' conta apenas as linhas depois do cursor
+        count_key = cache_service.count_key('salas', select_query, filter_params) if not last_id else None
+        known_count = cache_service.get(count_key, persist=True) if count_key else None
+        query_builder = supabase.table('salas').select(select_query, count=None if known_count is not None else 'exact')
+
+        for key, value in filter_params.items():
+            query_builder = query_builder.eq(key, value)
     
-    # 4. Paginação
-    query_builder = query_builder.order(primary_key_column)
-    if last_id:
-        query_builder = query_builder.gt(primary_key_column, last_id)
+        # 4. Paginação
+        query_builder = query_builder.order(primary_key_column)
+        if last_id:
+            query_builder = query_builder.gt(primary_key_column, last_id)
     
     # 5. Executa
-    response = query_builder.limit(limit + 1).execute()
+    response = yield query_builder.limit(limit + 1)
     
     # 6. Processa e Retorna
     docs_with_extra = response.data
-    total_count = response.count
+    total_count = known_count
+    if total_count is None:
+        total_count = response.count
+        if count_key is not None:
+            cache_service.set(count_key, total_count, persist=True)
     
     has_next = len(docs_with_extra) > limit
     docs_for_page = docs_with_extra[:limit]
@@ -109,4 +167,40 @@ def get_salas_com_join(params: dict):
         'has_next': has_next
     }
     
-    return docs_for_page, pagination_info
\ No newline at end of file
+    return docs_for_page, pagination_info
+
+
+@cached_first_page()
+def get_salas_com_join(params: dict):
+    """
+    Busca salas com JOIN em complexos e exibidores.
+    (Esta é a lógica do seu endpoint /pesquisa-salas)
+    """
+    return backend_service.run(_salas_com_join, params)
+
+
+@cached_first_page()
+async def get_salas_com_join_async(params: dict):
+    """Versão assíncrona (modo ASGI) de `get_salas_com_join`."""
+    return await backend_service.run_async(_salas_com_join, params)
+
+
+def _stats_salas_por_uf(supabase):
+    # Plano de queries (ver backend_service.run)
+    if supabase is None:
+        raise SupabaseUnavailableError("Serviço Supabase não está disponível.")
+
+    response = yield backend_service.Call(supabase.rpc('contar_salas_por_uf'), idempotent=True)
+    return response.data
+
+
+@cached(ttl=settings.KPI_CACHE_TTL, persist=True)
+def get_stats_salas_por_uf():
+    """Chama a função RPC 'contar_salas_por_uf' do banco."""
+    return backend_service.run(_stats_salas_por_uf)
+
+
+@cached(ttl=settings.KPI_CACHE_TTL, persist=True)
+async def get_stats_salas_por_uf_async():
+    """Versão assíncrona (modo ASGI) de `get_stats_salas_por_uf`."""
+    return await backend_service.run_async(_stats_salas_por_uf)
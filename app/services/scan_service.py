@@ -0,0 +1,193 @@
+# app/services/scan_service.py
+
+"""
+Varrimento completo de uma tabela em partições por intervalos da chave.
+
+Paginar pelo cursor é estritamente sequencial: cada página precisa do
+`next_cursor` da anterior. `scan()` divide o espaço da chave primária em
+intervalos contíguos e lê-os em paralelo:
+
+  - chaves inteiras (ex.: `lancamentos.id`): o intervalo entre o mínimo e o
+    máximo é dividido em partes iguais;
+  - outras chaves (ex.: `obras.cpb`): as fronteiras são amostradas por
+    posição (count e uma leitura de uma linha por fronteira, com offset).
+
+Cada partição é paginada pelo cursor dentro do seu intervalo, numa thread
+de um pool de SCAN_CONCURRENCY por varrimento, e as páginas são entregues
+por ordem da chave: primeiro todas as da primeira partição (à medida que
+chegam), depois as da segunda, que entretanto já foi sendo lida, e assim
+por diante. Cada partição guarda no máximo SCAN_BUFFER_PAGES páginas à
+espera do consumidor, por isso a memória não cresce com a tabela.
+
+Todos os varrimentos em curso partilham SCAN_MAX_CONCURRENT_FETCHES leituras
+em simultâneo, para nunca ocuparem o pool do backend inteiro. As leituras
+correm no contexto do pedido (deadline, tracing).
+"""
+
+import contextvars
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+from app.services import backend_service, metrics_service
+from app.services.supabase_service import SupabaseUnavailableError, get_supabase
+
+logger = logging.getLogger(__name__)
+
+scanned_rows = metrics_service.Counter(
+    'ancine_scan_rows_total', 'Registos lidos por varrimentos completos, por tabela.', ('table',)
+)
+
+# Leituras em simultâneo de todos os varrimentos
+_fetch_slots = threading.BoundedSemaphore(settings.SCAN_MAX_CONCURRENT_FETCHES)
+
+# Fim de uma partição
+_DONE = object()
+
+
+def _query(supabase, table_name, filters, columns='*', count=None):
+    query_builder = supabase.table(table_name).select(columns, count=count)
+    for key, value in (filters or {}).items():
+        query_builder = query_builder.eq(key, value)
+    return query_builder
+
+
+def _execute(query_builder):
+    with _fetch_slots:
+        return backend_service.execute(query_builder)
+
+
+def _is_integer(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _in_parallel(function, items) -> list:
+    """`function(item)` para cada item, em simultâneo, cada um no contexto do pedido."""
+    contexts = [contextvars.copy_context() for _ in items]
+    with ThreadPoolExecutor(max_workers=min(settings.SCAN_CONCURRENCY, len(items)), thread_name_prefix='scan') as pool:
+        return list(pool.map(lambda context, item: context.run(function, item), contexts, items))
+
+
+def key_ranges(supabase, table_name, primary_key, filters=None, partitions=None, page_size=None) -> list:
+    """
+    Intervalos [início, fim) da chave que cobrem a tabela (filtrada), por
+    ordem; None numa ponta = sem limite. Lista vazia se não houver linhas.
+    """
+    partitions = partitions or settings.SCAN_PARTITIONS
+    page_size = page_size or settings.SCAN_PAGE_SIZE
+
+    def edge(descending):
+        rows = _execute(
+            _query(supabase, table_name, filters, primary_key).order(primary_key, desc=descending).limit(1)
+        ).data
+        return rows[0][primary_key] if rows else None
+
+    low, high = _in_parallel(edge, [False, True]) if partitions > 1 else (edge(False), None)
+    if low is None:
+        return []
+    if partitions <= 1:
+        return [(None, None)]
+
+    if _is_integer(low):
+        step = max(page_size, -(-(high - low + 1) // partitions))
+        boundaries = list(range(low + step, high + 1, step))
+    else:
+        total = _execute(_query(supabase, table_name, filters, primary_key, count='exact').limit(1)).count or 0
+        # Com menos de duas páginas não compensa partir
+        partitions = min(partitions, max(1, total // page_size))
+
+        def probe(offset):
+            rows = _execute(
+                _query(supabase, table_name, filters, primary_key).order(primary_key).range(offset, offset)
+            ).data
+            return rows[0][primary_key] if rows else None
+
+        offsets = [part * total // partitions for part in range(1, partitions)]
+        boundaries = sorted({key for key in _in_parallel(probe, offsets) if key is not None} - {low}) if offsets else []
+
+    edges = [None, *boundaries, None]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _partition_pages(supabase, table_name, primary_key, filters, start, end, page_size, stop=None):
+    """Páginas do intervalo [start, end), paginadas pelo cursor."""
+    last_id = None
+    while stop is None or not stop.is_set():
+        query_builder = _query(supabase, table_name, filters).order(primary_key)
+        if last_id is not None:
+            query_builder = query_builder.gt(primary_key, last_id)
+        elif start is not None:
+            query_builder = query_builder.gte(primary_key, start)
+        if end is not None:
+            query_builder = query_builder.lt(primary_key, end)
+
+        page = _execute(query_builder.limit(page_size)).data
+        if page:
+            scanned_rows.inc(len(page), table=table_name)
+            yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1][primary_key]
+
+
+def _put(pages, stop, item) -> bool:
+    # Espera por espaço sem ficar presa se o consumidor desistir
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _fill(pages, stop, *partition):
+    """Lê uma partição para a sua fila (numa thread do pool)."""
+    try:
+        for page in _partition_pages(*partition, stop=stop):
+            if not _put(pages, stop, page):
+                return
+        item = _DONE
+    except Exception as e:
+        item = e
+    _put(pages, stop, item)
+
+
+def scan(table_name, primary_key, filters=None, partitions=None, page_size=None, supabase=None):
+    """
+    Gerador das páginas (listas de registos) de toda a tabela, por ordem de
+    `primary_key`, lidas em partições paralelas (ver a descrição do módulo).
+    `filters` são igualdades coluna -> valor.
+    """
+    page_size = page_size or settings.SCAN_PAGE_SIZE
+    supabase = supabase or get_supabase()
+    if supabase is None:
+        raise SupabaseUnavailableError("Serviço Supabase não está disponível.")
+
+    ranges = key_ranges(supabase, table_name, primary_key, filters, partitions, page_size)
+    if len(ranges) <= 1:
+        for start, end in ranges:
+            yield from _partition_pages(supabase, table_name, primary_key, filters, start, end, page_size)
+        return
+
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=settings.SCAN_BUFFER_PAGES) for _ in ranges]
+    pool = ThreadPoolExecutor(max_workers=min(settings.SCAN_CONCURRENCY, len(ranges)), thread_name_prefix='scan')
+    try:
+        for (start, end), pages in zip(ranges, queues):
+            # Um contexto por partição: o do pedido (deadline, span), copiado
+            pool.submit(contextvars.copy_context().run, _fill, pages, stop,
+                        supabase, table_name, primary_key, filters, start, end, page_size)
+        for pages in queues:
+            while True:
+                item = pages.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
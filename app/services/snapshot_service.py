@@ -0,0 +1,254 @@
+# app/services/snapshot_service.py
+
+"""
+Snapshot colunar do dataset em formato Arrow IPC.
+
+Cada tabela é gravada num ficheiro `<tabela>.arrow` (sem compressão, ordenado
+pela chave primária) e aberto com mmap em modo somente leitura. Como os dados
+ficam na page cache do sistema operativo, N workers do Gunicorn partilham uma
+única cópia física e o arranque de cada worker é um `mmap` em vez de um load.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+from app.config import settings
+from app.services import scan_service
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+
+# Tabelas incluídas no snapshot e as respetivas chaves primárias
+# (as mesmas usadas na paginação por cursor).
+SNAPSHOT_TABLES = {
+    'exibidores': 'registro_exibidor',
+    'complexos': 'registro_complexo',
+    'salas': 'registro_sala',
+    'obras': 'cpb',
+    'paises_origem': 'id',
+    'distribuidoras': 'registro_distribuidora',
+    'lancamentos': 'id'
+}
+
+_snapshot = None
+_snapshot_checked = False
+_snapshot_lock = threading.Lock()
+
+
+def _pyarrow():
+    """Importa o pyarrow só quando é necessário (evita custo no arranque)."""
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise Exception("O pacote 'pyarrow' é necessário para usar snapshots.")
+    return pyarrow
+
+
+class Snapshot:
+    """
+    Conjunto de tabelas Arrow mapeadas em memória a partir de um diretório.
+    """
+
+    def __init__(self, directory: str, manifest: dict, tables: dict):
+        self.directory = directory
+        self.manifest = manifest
+        self.version = manifest.get('version')
+        self.tables = tables
+
+    def has_table(self, table_name: str) -> bool:
+        return table_name in self.tables
+
+    def get_page(self, table_name: str, params: dict):
+        """
+        Devolve uma página da tabela com a mesma semântica da consulta no
+        Supabase: filtros de igualdade, ordem pela chave primária e cursor
+        `last_id` (maior que), que também entra na contagem, como no
+        count='exact' do PostgREST. Retorna (docs_for_page, pagination_info).
+        """
+        pa = _pyarrow()
+        pc = pa.compute
+
+        table = self.tables[table_name]
+        primary_key_column = SNAPSHOT_TABLES[table_name]
+
+        limit = min(int(params.get('limit', settings.DEFAULT_PAGE_SIZE)), settings.MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError("limit deve ser um número inteiro positivo.")
+        last_id = params.get('last_id')
+
+        # Os ficheiros são gravados ordenados pela chave primária: o cursor é
+        # uma pesquisa binária e a página uma fatia (zero-copy) do ficheiro.
+        start = 0
+        if last_id:
+            pk_type = table.schema.field(primary_key_column).type
+            cursor = _cast_value(pa, last_id, pk_type, primary_key_column).as_py()
+            start = _bisect_right(table[primary_key_column], cursor)
+
+        # Filtros (apenas colunas da própria tabela, como no endpoint genérico)
+        filter_params = {k: v for k, v in params.items() if k not in ['limit', 'last_id']}
+        mask = None
+        for key, value in filter_params.items():
+            if '.' in key:
+                continue
+            if key not in table.column_names:
+                # O PostgREST rejeitaria a coluna; aqui simplesmente não há resultados
+                return [], _pagination_info(0, limit, None, False)
+            value = _cast_value(pa, value, table.schema.field(key).type, key)
+            condition = pc.equal(table[key], value)
+            mask = condition if mask is None else pc.and_(mask, condition)
+
+        # A contagem é a das linhas depois do cursor, como no count='exact' do PostgREST
+        if mask is None:
+            total_count = table.num_rows - start
+            page = table.slice(start, limit + 1)
+        else:
+            # Só as linhas da página são copiadas (pelas posições), não o resto da tabela
+            mask = mask.slice(start)
+            total_count = pc.sum(mask).as_py() or 0
+            positions = pc.indices_nonzero(mask).slice(0, limit + 1)
+            page = table.take(pc.add(positions, start))
+
+        docs_with_extra = page.to_pylist()
+        has_next = len(docs_with_extra) > limit
+        docs_for_page = docs_with_extra[:limit]
+
+        next_cursor = None
+        if has_next and docs_for_page:
+            next_cursor = docs_for_page[-1].get(primary_key_column)
+
+        return docs_for_page, _pagination_info(total_count, limit, next_cursor, has_next)
+
+
+def _bisect_right(column, value) -> int:
+    """
+    Posição da primeira linha com chave maior que `value` numa coluna
+    ordenada (nulos no fim), lendo só ~log2(N) valores.
+    """
+    low, high = 0, len(column)
+    while low < high:
+        middle = (low + high) // 2
+        key = column[middle].as_py()
+        if key is not None and key <= value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _cast_value(pa, value, arrow_type, column=None):
+    """Converte o valor (string vinda da query string) para o tipo da coluna."""
+    if pa.types.is_null(arrow_type):
+        return pa.scalar(None)
+    if pa.types.is_boolean(arrow_type):
+        return pa.scalar(str(value).lower() in ('true', 't', '1'))
+    try:
+        return pa.scalar(str(value)).cast(arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # Ex.: last_id=abc numa chave inteira; as rotas respondem 400
+        raise ValueError(f"Valor inválido para '{column}': {value}") from None
+
+
+def _pagination_info(total_count, limit, next_cursor, has_next):
+    return {
+        'total_filtered_count': total_count,
+        'per_page': limit,
+        'next_cursor': next_cursor,
+        'has_next': has_next
+    }
+
+
+def write_snapshot(directory: str, tables: dict, version: str = None) -> dict:
+    """
+    Grava as tabelas (dict nome -> lista de registos) como ficheiros Arrow IPC.
+    A escrita é feita num diretório temporário e movida no fim, para que os
+    workers nunca vejam um snapshot incompleto.
+    """
+    pa = _pyarrow()
+
+    version = version or time.strftime('%Y%m%d%H%M%S')
+    tmp_directory = f"{directory.rstrip(os.sep)}.tmp-{os.getpid()}"
+    os.makedirs(tmp_directory, exist_ok=True)
+
+    manifest = {'version': version, 'created_at': time.time(), 'tables': {}}
+    for table_name, rows in tables.items():
+        primary_key_column = SNAPSHOT_TABLES.get(table_name)
+        if primary_key_column:
+            rows = sorted(rows, key=lambda row: (row.get(primary_key_column) is None, row.get(primary_key_column)))
+        arrow_table = pa.Table.from_pylist(rows)
+
+        path = os.path.join(tmp_directory, f"{table_name}.arrow")
+        # Formato "file" do IPC e sem compressão: permite leitura zero-copy via mmap
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+
+        manifest['tables'][table_name] = {
+            'rows': arrow_table.num_rows,
+            'primary_key': primary_key_column
+        }
+
+    with open(os.path.join(tmp_directory, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+    os.replace(tmp_directory, directory)
+    return manifest
+
+
+def dump_supabase_tables(client, page_size: int = 1000) -> dict:
+    """
+    Lê todas as tabelas do snapshot a partir do Supabase, em intervalos da
+    chave primária lidos em paralelo (ver scan_service). Retorna dict
+    nome -> lista de registos, por ordem da chave.
+    """
+    tables = {}
+    for table_name, primary_key_column in SNAPSHOT_TABLES.items():
+        pages = scan_service.scan(table_name, primary_key_column, page_size=page_size, supabase=client)
+        tables[table_name] = [row for page in pages for row in page]
+    return tables
+
+
+def open_snapshot(directory: str) -> Snapshot:
+    """
+    Abre um snapshot fazendo mmap (somente leitura) de cada ficheiro .arrow.
+    Nenhum dado é copiado para o heap do processo neste momento.
+    """
+    pa = _pyarrow()
+
+    with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    tables = {}
+    for table_name in manifest.get('tables', {}):
+        source = pa.memory_map(os.path.join(directory, f"{table_name}.arrow"), 'r')
+        tables[table_name] = pa.ipc.open_file(source).read_all()
+
+    return Snapshot(directory, manifest, tables)
+
+
+def get_snapshot():
+    """
+    Retorna o snapshot configurado em SNAPSHOT_DIR (aberto uma vez por
+    processo) ou None se não houver snapshot disponível.
+    """
+    global _snapshot, _snapshot_checked
+    if _snapshot_checked or not settings.SNAPSHOT_DIR:
+        return _snapshot
+
+    with _snapshot_lock:
+        if not _snapshot_checked:
+            _snapshot_checked = True
+            try:
+                _snapshot = open_snapshot(settings.SNAPSHOT_DIR)
+                logger.info(f"Snapshot '{_snapshot.version}' mapeado a partir de {settings.SNAPSHOT_DIR}.")
+            except Exception as e:
+                logger.warning(f"Não foi possível abrir o snapshot em {settings.SNAPSHOT_DIR}: {e}")
+    return _snapshot
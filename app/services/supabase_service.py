@@ -1,28 +1,149 @@
 # app/services/supabase_service.py
 
-import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
-
-# Carrega as variáveis do arquivo .env
-load_dotenv() 
-
-supabase = None
-url = os.environ.get("SUPABASE_URL")
-key = os.environ.get("SUPABASE_KEY")
-
-if not url:
-    print("Erro Fatal: A variável SUPABASE_URL não foi encontrada.")
-    print("Verifique se o seu arquivo .env está na pasta raiz e contém SUPABASE_URL.")
-elif not key:
-    print("Erro Fatal: A variável SUPABASE_KEY não foi encontrada.")
-    print("Verifique se o seu arquivo .env está na pasta raiz e contém SUPABASE_KEY.")
-else:
+import asyncio
+import logging
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SupabaseUnavailableError(Exception):
+    """O cliente Supabase não pôde ser criado (configuração em falta ou erro)."""
+
+
+# O cliente Supabase (e toda a pilha httpx/postgrest/auth) só é importado e
+# construído no primeiro uso: o arranque a frio não paga esse custo.
+# Se a criação falhar, volta a tentar após CLIENT_RETRY_SECONDS (em vez de
+# ficar sem cliente até o processo reiniciar).
+_client = None
+_client_initialized = False
+_client_retry_at = 0.0
+_client_lock = threading.Lock()
+
+
+# Cliente assíncrono (modo ASGI, ver app/asgi.py): o pool do httpx.AsyncClient
+# fica preso ao event loop em que foi criado, por isso é guardado com o loop.
+_async_client = None
+_async_client_loop = None
+_async_client_retry_at = 0.0
+
+
+def _credentials():
+    """(url, key) das configurações, ou None (com o erro no log) se faltarem."""
+    url = settings.SUPABASE_URL
+    key = settings.SUPABASE_KEY
+
+    if not url:
+        logger.error("A variável SUPABASE_URL não foi encontrada. "
+                     "Verifique se o seu arquivo .env está na pasta raiz e contém SUPABASE_URL.")
+        return None
+    if not key:
+        logger.error("A variável SUPABASE_KEY não foi encontrada. "
+                     "Verifique se o seu arquivo .env está na pasta raiz e contém SUPABASE_KEY.")
+        return None
+    return url, key
+
+
+def _create_client():
+    credentials = _credentials()
+    if credentials is None:
+        return None
+    url, key = credentials
+
     try:
         # Tenta criar a instância do cliente Supabase
-        supabase: Client = create_client(url, key)
-        print("Cliente Supabase inicializado com sucesso!") # Adicionamos um sucesso
-        
+        from supabase import ClientOptions, create_client
+
+        from app.services import http_pool_service
+        # Pool HTTP partilhado (keep-alive, HTTP/2 e timeouts de ligação e leitura)
+        options = ClientOptions(httpx_client=http_pool_service.get_client())
+        client = create_client(url, key, options=options)
+        logger.info("Cliente Supabase inicializado com sucesso!")
+        return client
+
     except Exception as e:
-        print(f"Erro ao inicializar o cliente Supabase (mesmo com as chaves): {e}")
-        supabase = None
\ No newline at end of file
+        logger.error(f"Erro ao inicializar o cliente Supabase (mesmo com as chaves): {e}")
+        return None
+
+
+def get_supabase():
+    """
+    Retorna o cliente Supabase, criando-o no primeiro uso.
+    Retorna None se o serviço não estiver disponível.
+    """
+    global _client, _client_initialized, _client_retry_at
+    if _client_initialized and (_client is not None or time.monotonic() < _client_retry_at):
+        return _client
+
+    with _client_lock:
+        if _client is None and time.monotonic() >= _client_retry_at:
+            _client = _create_client()
+            _client_initialized = True
+            if _client is None:
+                _client_retry_at = time.monotonic() + settings.CLIENT_RETRY_SECONDS
+    return _client
+
+
+def reset_connections():
+    """
+    Descarta o cliente PostgREST (e o pool HTTP) herdado do processo master.
+    Deve ser chamado em cada worker logo após o fork: ligações abertas durante
+    o pré-carregamento não podem ser partilhadas entre processos.
+    """
+    if _client is not None:
+        from app.services import http_pool_service
+        _client.options.httpx_client = http_pool_service.reset()
+        _client._postgrest = None
+
+
+async def _create_async_client():
+    credentials = _credentials()
+    if credentials is None:
+        return None
+    url, key = credentials
+
+    try:
+        from supabase import AsyncClientOptions, acreate_client
+
+        from app.services import http_pool_service
+        options = AsyncClientOptions(httpx_client=http_pool_service.new_async_client())
+        client = await acreate_client(url, key, options=options)
+        logger.info("Cliente Supabase assíncrono inicializado com sucesso!")
+        return client
+
+    except Exception as e:
+        logger.error(f"Erro ao inicializar o cliente Supabase assíncrono: {e}")
+        return None
+
+
+async def get_async_supabase():
+    """
+    Versão assíncrona de `get_supabase()`, para o modo ASGI: retorna o
+    cliente do event loop atual, criando-o no primeiro uso, ou None se o
+    serviço não estiver disponível.
+    """
+    global _async_client, _async_client_loop, _async_client_retry_at
+    loop = asyncio.get_running_loop()
+    if _async_client_loop is loop and (_async_client is not None or time.monotonic() < _async_client_retry_at):
+        return _async_client
+
+    client = await _create_async_client()
+    if _async_client_loop is loop and _async_client is not None:
+        # Outro pedido do mesmo loop criou-o entretanto
+        return _async_client
+    _async_client, _async_client_loop = client, loop
+    if client is None:
+        _async_client_retry_at = time.monotonic() + settings.CLIENT_RETRY_SECONDS
+    return client
+
+
+async def close_async_client():
+    """Fecha o pool HTTP do cliente assíncrono (no fim do lifespan ASGI)."""
+    global _async_client, _async_client_loop
+    client, _async_client, _async_client_loop = _async_client, None, None
+    postgrest = getattr(client, '_postgrest', None) if client is not None else None
+    if postgrest is not None:
+        await postgrest.aclose()
@@ -0,0 +1,364 @@
+# app/services/tracing_service.py
+
+"""
+Tracing no estilo OpenTelemetry, sem dependências externas.
+
+Cada pedido amostrado (TRACE_SAMPLE_RATE, ou a decisão do chamador no
+cabeçalho W3C `traceparent`) gera um trace com spans para:
+
+  - o pedido HTTP (middleware);
+  - a construção da query nos serviços ('query.build');
+  - cada chamada ao backend, tabela ou RPC ('backend.execute');
+  - as consultas ao cache ('cache.get');
+  - a codificação JSON da resposta ('response.encode').
+
+Os spans terminados vão para o exportador configurado em TRACE_EXPORTER:
+  - 'none'            desligado (padrão);
+  - 'console'         uma linha JSON por span no stdout;
+  - 'file:<caminho>'  JSON lines num ficheiro;
+  - 'otlp'            OTLP/HTTP (JSON) para TRACE_OTLP_ENDPOINT, em lotes;
+  - 'memory'          lista em memória (testes locais, `memory_exporter.spans`).
+
+Pedidos não amostrados não criam spans: `span()` devolve um objeto inerte.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'ancine-api'
+
+# Tipos de span do OTLP
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """Um span de um trace amostrado."""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'kind', 'attributes',
+                 'start_ns', 'end_ns', 'status', 'status_message', '_token')
+
+    def __init__(self, name, trace_id, parent_id=None, kind=KIND_INTERNAL, attributes=None):
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = 'unset'
+        self.status_message = None
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, error):
+        self.status = 'error'
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        get_exporter().export(self)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.set_error(exc)
+        self.end()
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            'attributes': self.attributes,
+            'status': self.status,
+            'status_message': self.status_message
+        }
+
+
+class _NoopSpan:
+    """Span inerte para pedidos não amostrados (custo praticamente nulo)."""
+
+    __slots__ = ()
+    trace_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, error):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+# --- Exportadores ---
+
+class NoopExporter:
+    def export(self, span):
+        pass
+
+
+class InMemoryExporter:
+    """Guarda os spans numa lista (testes locais)."""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+class ConsoleExporter:
+    def export(self, span):
+        print(json.dumps(span.to_dict(), default=str, ensure_ascii=False))
+
+
+class FileExporter:
+    """Acrescenta cada span como uma linha JSON ao ficheiro."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class OTLPExporter:
+    """
+    Envia spans por OTLP/HTTP com codificação JSON, em lotes, a partir de uma
+    thread própria (o pedido nunca espera pelo coletor).
+    """
+
+    def __init__(self, endpoint, batch_size=256, interval=5.0, max_queue=4096):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def export(self, span):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # coletor lento: descarta em vez de acumular memória
+
+    def _ensure_thread(self):
+        # A thread é criada no primeiro span (depois do fork do Gunicorn)
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='otlp-exporter', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        import httpx
+
+        with httpx.Client(timeout=5) as client:
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.interval
+                while len(batch) < self.batch_size:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=left))
+                    except queue.Empty:
+                        break
+                try:
+                    client.post(self.endpoint, json=self._payload(batch))
+                except Exception as e:
+                    logger.warning(f"Falha ao exportar {len(batch)} spans por OTLP: {e}")
+
+    def _payload(self, spans) -> dict:
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+                'scopeSpans': [{
+                    'scope': {'name': 'app.services.tracing_service'},
+                    'spans': [{
+                        'traceId': span.trace_id,
+                        'spanId': span.span_id,
+                        'parentSpanId': span.parent_id or '',
+                        'name': span.name,
+                        'kind': span.kind,
+                        'startTimeUnixNano': str(span.start_ns),
+                        'endTimeUnixNano': str(span.end_ns),
+                        'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in span.attributes.items()],
+                        'status': {
+                            'code': 2 if span.status == 'error' else 0,
+                            'message': span.status_message or ''
+                        }
+                    } for span in spans]
+                }]
+            }]
+        }
+
+
+def create_exporter(spec=None):
+    """Exportador descrito em TRACE_EXPORTER (ver docstring do módulo)."""
+    spec = (spec if spec is not None else settings.TRACE_EXPORTER) or 'none'
+    if spec == 'console':
+        return ConsoleExporter()
+    if spec.startswith('file:'):
+        return FileExporter(os.path.expanduser(spec[len('file:'):]))
+    if spec == 'otlp':
+        return OTLPExporter(settings.TRACE_OTLP_ENDPOINT)
+    if spec == 'memory':
+        return memory_exporter
+    return NoopExporter()
+
+
+memory_exporter = InMemoryExporter()
+_exporter = None
+
+
+def get_exporter():
+    global _exporter
+    if _exporter is None:
+        _exporter = create_exporter()
+    return _exporter
+
+
+def set_exporter(exporter):
+    """Substitui o exportador (ex.: InMemoryExporter num teste local)."""
+    global _exporter
+    _exporter = exporter
+
+
+def is_enabled() -> bool:
+    return not isinstance(get_exporter(), NoopExporter)
+
+
+# --- API ---
+
+_TRACEPARENT = re.compile(r'([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})')
+
+
+def _parse_traceparent(header):
+    """
+    Lê `00-<trace_id>-<parent_id>-<flags>`; retorna (trace_id, parent_id,
+    amostrado), ou None se o cabeçalho for inválido (inicia-se um trace novo).
+    """
+    try:
+        match = _TRACEPARENT.fullmatch(header.strip())
+    except AttributeError:
+        return None
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags = match.groups()
+    if version == 'ff' or trace_id == '0' * 32 or parent_id == '0' * 16:
+        return None
+    try:
+        return trace_id, parent_id, int(flags, 16) & 1 == 1
+    except ValueError:
+        return None
+
+
+def start_trace(name, traceparent=None, attributes=None):
+    """
+    Inicia o span raiz de um pedido e torna-o o span atual. Retorna NOOP_SPAN
+    se o tracing estiver desligado ou o pedido não for amostrado.
+    """
+    if not is_enabled():
+        return NOOP_SPAN
+
+    parent = _parse_traceparent(traceparent) if traceparent else None
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = '%032x' % random.getrandbits(128), None
+        sampled = random.random() < settings.TRACE_SAMPLE_RATE
+    if not sampled:
+        return NOOP_SPAN
+
+    root = Span(name, trace_id, parent_id, kind=KIND_SERVER, attributes=attributes)
+    root._token = _current_span.set(root)
+    return root
+
+
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """
+    Span filho do span atual, para usar com `with`. Fora de um trace
+    amostrado retorna NOOP_SPAN.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(name, parent.trace_id, parent.span_id, kind=kind, attributes=attributes)
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+def traceparent() -> str:
+    """Cabeçalho `traceparent` do span atual (para propagar a outros serviços)."""
+    current = _current_span.get()
+    if current is None:
+        return None
+    return f"00-{current.trace_id}-{current.span_id}-01"
@@ -0,0 +1,112 @@
+# app/services/warmup_service.py
+
+"""
+Aquecimento da aplicação: snapshot, ligações ao Supabase, caches, KPIs e
+primeiras páginas.
+
+Chamado por create_app() no modo de pré-carregamento (PRELOAD_WARMUP=1,
+normalmente com `gunicorn --preload`) e pelo handler `/_ah/warmup` do
+App Engine. Assim os workers começam "quentes" desde o primeiro pedido.
+Com o cache em disco, uma instância reiniciada obtém estes valores do
+SQLite local em vez de chamar o Supabase.
+"""
+
+import logging
+import time
+
+from app.services import deadline_service, http_pool_service, lancamento_service, obra_service, sala_service
+from app.services.deadline_service import DeadlineExceededError
+from app.services.snapshot_service import get_snapshot
+
+logger = logging.getLogger(__name__)
+
+# KPIs pré-calculados no aquecimento (nome -> função de serviço com cache)
+WARMUP_KPIS = {
+    'salas_por_uf': sala_service.get_stats_salas_por_uf,
+    'obras_por_tipo': obra_service.get_stats_obras_por_tipo,
+    'market_share': lancamento_service.get_market_share_nacional,
+    'ranking_distribuidoras': lancamento_service.get_ranking_distribuidoras
+}
+
+# Primeiras páginas (sem filtros) das pesquisas mais usadas pelo dashboard
+WARMUP_FIRST_PAGES = {
+    'pesquisa-salas': lambda: sala_service.get_salas_com_join({}),
+    'pesquisa-obras': lambda: obra_service.get_obras_com_join({}),
+    'lancamentos': lambda: lancamento_service.get_lancamentos_com_join({})
+}
+
+PAGE_SIZE = 4096
+
+
+def _touch_snapshot_pages(snapshot) -> int:
+    """
+    Lê um byte por página de cada buffer do snapshot para que os ficheiros
+    mapeados fiquem residentes na page cache (partilhada entre processos).
+    Retorna o total de bytes mapeados.
+    """
+    total_bytes = 0
+    for table in snapshot.tables.values():
+        for column in table.columns:
+            for chunk in column.chunks:
+                for buffer in chunk.buffers():
+                    if buffer is None or buffer.size == 0:
+                        continue
+                    view = memoryview(buffer)
+                    for offset in range(0, buffer.size, PAGE_SIZE):
+                        view[offset]
+                    total_bytes += buffer.size
+    return total_bytes
+
+
+def warm_up() -> dict:
+    """
+    Aquece snapshot e caches. Falhas individuais não interrompem o processo:
+    um KPI que falhe será simplesmente calculado no primeiro pedido.
+    Se o prazo do pedido de warmup esgotar, os passos restantes são saltados.
+    Retorna um resumo do que foi aquecido.
+    """
+    started = time.perf_counter()
+    summary = {'snapshot': None, 'connections': None, 'kpis': {}, 'first_pages': {}}
+
+    try:
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            summary['snapshot'] = {
+                'version': snapshot.version,
+                'bytes': _touch_snapshot_pages(snapshot)
+            }
+    except Exception as e:
+        logger.warning(f"Falha ao aquecer o snapshot: {e}")
+
+    # Ligações ao Supabase abertas antes do primeiro pedido (mesmo que os
+    # KPIs e as primeiras páginas venham do cache em disco)
+    try:
+        summary['connections'] = http_pool_service.prewarm()
+    except Exception as e:
+        logger.warning(f"Falha ao abrir ligações ao Supabase: {e}")
+
+    for name, kpi_function in WARMUP_KPIS.items():
+        try:
+            deadline_service.check(stage=f"kpi:{name}")
+            kpi_function()
+            summary['kpis'][name] = 'ok'
+        except DeadlineExceededError:
+            summary['kpis'][name] = 'prazo esgotado'
+        except Exception as e:
+            logger.warning(f"Falha ao pré-calcular o KPI '{name}': {e}")
+            summary['kpis'][name] = 'erro'
+
+    for name, loader in WARMUP_FIRST_PAGES.items():
+        try:
+            deadline_service.check(stage=f"first_page:{name}")
+            loader()
+            summary['first_pages'][name] = 'ok'
+        except DeadlineExceededError:
+            summary['first_pages'][name] = 'prazo esgotado'
+        except Exception as e:
+            logger.warning(f"Falha ao pré-carregar a primeira página de '{name}': {e}")
+            summary['first_pages'][name] = 'erro'
+
+    summary['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"Aquecimento concluído em {summary['duration_ms']} ms.")
+    return summary
@@ -0,0 +1,122 @@
+# app/status.py
+
+# Rotas de estado interno da aplicação (só leitura).
+
+import functools
+import hmac
+
+from flask import Response, jsonify, request
+
+from app.config import settings
+
+
+def is_admin(request) -> bool:
+    """O pedido traz o token de administração correto (comparação em tempo constante)."""
+    token = settings.ADMIN_TOKEN
+    supplied = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def admin_only(view):
+    """Decorador de rota: 403 sem `X-Admin-Token` válido (ver ADMIN_TOKEN)."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin(request):
+            return jsonify({'error': 'Não autorizado.'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def register_status(app):
+    """
+    Regista as rotas de estado (/status/...).
+    """
+
+    @app.route('/status/backend')
+    def backend_status():
+        # Circuit breaker, orçamento de novas tentativas e contadores por rota
+        from app.services import backend_service
+        return jsonify(backend_service.stats())
+
+    @app.route('/metrics')
+    def metrics():
+        # Formato de exposição do Prometheus
+        from app.services import metrics_service
+        return Response(metrics_service.render(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/status/admission')
+    def admission_status():
+        # Pedidos em curso, em espera, admitidos e rejeitados por prioridade
+        from app.services import admission_service
+        return jsonify(admission_service.controller.snapshot())
+
+    @app.route('/status/settings')
+    @admin_only
+    def settings_status():
+        # Perfil e valores efetivos da configuração, com a origem de cada um
+        # (env, profile, default) e os segredos mascarados; exige o token de
+        # administração por expor a topologia e os limites do serviço
+        return jsonify(settings.effective())
+
+    @app.route('/status/queries')
+    @admin_only
+    def queries_status():
+        """
+        Assinaturas de queries ao backend (sem valores) com frequência e latência.
+        ?sort=total|slow|avg|calls, ?limit=20.
+        """
+        from app.services import query_log_service
+
+        sort = request.args.get('sort', 'total')
+        if sort not in ('total', 'slow', 'avg', 'calls'):
+            return jsonify({'error': "sort inválido."}), 400
+        limit = min(request.args.get('limit', 20, type=int), 200)
+        return jsonify({
+            'slow_query_ms': settings.SLOW_QUERY_MS,
+            'top': query_log_service.top(sort, limit),
+            'recent_slow': query_log_service.slow_log(limit)
+        })
+
+    @app.route('/status/queries/indexes')
+    @admin_only
+    def query_index_suggestions():
+        # Sugestões de CREATE INDEX para as colunas filtradas com frequência
+        from app.services import query_log_service
+
+        min_calls = request.args.get('min_calls', type=int)
+        suggestions = query_log_service.suggest_indexes(min_calls)
+        return jsonify({
+            'suggestions': suggestions,
+            'sql': '\n'.join(s['statement'] for s in suggestions)
+        })
+
+    if settings.PROFILING_ENABLED:
+        @app.route('/status/tracemalloc')
+        def tracemalloc_status():
+            """
+            Snapshot do tracemalloc (requer `X-Profile: <PROFILING_TOKEN>`).
+            ?action=start|stop|snapshot, ?limit=20, ?group_by=lineno|filename|traceback,
+            ?compare=1 (diferença para o snapshot anterior), ?app_only=1.
+            """
+            from app.services import profiling_service
+
+            if not profiling_service.is_authorized(request):
+                return jsonify({'error': 'Não autorizado.'}), 403
+
+            action = request.args.get('action', 'snapshot')
+            if action == 'start':
+                profiling_service.tracemalloc_start(min(max(request.args.get('frames', 10, type=int), 1), 100))
+                return jsonify({'tracing': True})
+            if action == 'stop':
+                profiling_service.tracemalloc_stop()
+                return jsonify({'tracing': False})
+
+            group_by = request.args.get('group_by', 'lineno')
+            if group_by not in ('lineno', 'filename', 'traceback'):
+                return jsonify({'error': "group_by inválido."}), 400
+            return jsonify(profiling_service.tracemalloc_report(
+                limit=min(max(request.args.get('limit', 20, type=int), 1), 200),
+                group_by=group_by,
+                compare=request.args.get('compare') == '1',
+                app_only=request.args.get('app_only') == '1'
+            ))
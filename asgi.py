@@ -0,0 +1,11 @@
+# asgi.py
+
+# Ponto de entrada do modo assíncrono (ver app/asgi.py), por exemplo:
+#   uvicorn asgi:application --port 8000
+#   gunicorn -k uvicorn.workers.UvicornWorker --workers 1 asgi:application
+# O run.py continua a ser o ponto de entrada WSGI (gunicorn run:app).
+
+from app.asgi import ASGIApp
+from run import app
+
+application = ASGIApp(app)
@@ -0,0 +1,444 @@
+# benchmarks/dataset.py
+
+"""
+Gerador de dados sintéticos com a forma das tabelas da ANCINE.
+
+As tabelas públicas são pequenas demais para ver como a paginação, os JOINs
+e os KPIs escalam; este módulo gera conjuntos 10x–1000x maiores, coerentes
+entre si (exibidores → complexos → salas, obras → paises_origem,
+distribuidoras → lancamentos) e com todas as colunas de
+`app/models/db_models.py`. As distribuições imitam os dados reais:
+
+  - complexos concentrados em SP e RJ, com mais salas por complexo (multiplexes)
+    nas capitais; poucas redes de exibição ficam com a maior parte deles;
+  - poucas distribuidoras (as majors) dominam lançamentos e público
+    (lei de Zipf), com público por lançamento em cauda longa (log-normal);
+  - lançamentos às quintas-feiras, renda = público × preço médio do bilhete
+    do ano, ~20% de títulos nacionais ligados a longas-metragens.
+
+O resultado é determinista para o mesmo `scale`/`random_seed`. Pode ser
+usado em memória (`generate()`, ex.: no backend falso dos benchmarks) ou
+gravado em disco tabela a tabela, sem manter as linhas em memória (`write()`):
+
+  - csv:      um ficheiro por tabela, com cabeçalho, para `\\copy ... csv header`
+              no Postgres/Supabase (na ordem do manifesto, por causa das FKs);
+  - jsonl:    uma linha JSON por registo;
+  - snapshot: snapshot Arrow lido pelo `snapshot_service` (SNAPSHOT_DIR).
+
+Uso:
+    python benchmarks/dataset.py DIRETÓRIO [--scale 10] [--seed 42] [--format csv|jsonl|snapshot]
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from array import array
+from datetime import date, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tamanhos aproximados das tabelas públicas da ANCINE (scale=1)
+BASE_SIZES = {
+    'exibidores': 250,
+    'complexos': 850,
+    'salas': 3500,
+    'obras': 20000,
+    'distribuidoras': 300,
+    'lancamentos': 8000,
+}
+
+# Ordem de carga (respeita as chaves estrangeiras)
+TABLE_ORDER = ['exibidores', 'complexos', 'salas', 'obras', 'paises_origem', 'distribuidoras', 'lancamentos']
+
+# Colunas de cada tabela, na ordem de app/models/db_models.py
+COLUMNS = {
+    'exibidores': ['registro_exibidor', 'cnpj_exibidor', 'nome_exibidor', 'nome_grupo_exibidor',
+                   'situacao_exibidor'],
+    'complexos': ['registro_complexo', 'registro_exibidor_fk', 'situacao_complexo', 'data_situacao_complexo',
+                  'website_complexo', 'complexo_itinerante', 'tipo_operacao_usual', 'endereco_complexo',
+                  'numero_endereco_complexo', 'complemento_complexo', 'bairro_complexo',
+                  'municipio_complexo', 'uf_complexo', 'cep_complexo'],
+    'salas': ['registro_sala', 'registro_complexo_fk', 'nome_sala', 'cnpj_sala', 'situacao_sala',
+              'data_situacao_sala', 'data_inicio_funcionamento', 'assentos_total', 'assentos_cadeirantes',
+              'assentos_mobilidade_reduzida', 'assentos_obesidade', 'acesso_assentos_rampa',
+              'acesso_sala_rampa', 'banheiros_acessiveis'],
+    'obras': ['cpb', 'titulo_original', 'data_emissao_cpb', 'situacao_obra', 'tipo_obra', 'subtipo_obra',
+              'classificacao_obra', 'organizacao_temporal', 'duracao_total_minutos', 'quantidade_episodios',
+              'ano_producao_inicial', 'ano_producao_final', 'segmento_destinacao_inicial',
+              'coproducao_internacional', 'requerente', 'cnpj_requerente', 'uf_requerente',
+              'municipio_requerente'],
+    'paises_origem': ['id', 'obra_cpb_fk', 'pais_origem', 'titulo_original_pais'],
+    'distribuidoras': ['registro_distribuidora', 'cnpj_distribuidora', 'razao_social_distribuidora'],
+    'lancamentos': ['id', 'obra_cpb_fk', 'registro_distribuidora_fk', 'cpb_roe', 'titulo_original',
+                    'data_lancamento', 'tipo_obra', 'pais_obra', 'publico_total', 'renda_total'],
+}
+
+# Peso de cada UF no número de complexos (aproximação do parque exibidor)
+UF_WEIGHTS = {
+    'SP': 30.0, 'RJ': 11.0, 'MG': 9.0, 'RS': 6.0, 'PR': 6.0, 'SC': 4.5, 'BA': 4.0, 'PE': 3.0,
+    'GO': 3.0, 'DF': 2.5, 'CE': 2.5, 'ES': 2.0, 'PA': 2.0, 'AM': 1.5, 'MT': 1.5, 'MS': 1.3,
+    'RN': 1.2, 'PB': 1.2, 'MA': 1.2, 'AL': 0.9, 'PI': 0.8, 'SE': 0.8, 'RO': 0.7, 'TO': 0.5,
+    'AP': 0.3, 'AC': 0.3, 'RR': 0.3,
+}
+
+CAPITAIS = {
+    'SP': 'São Paulo', 'RJ': 'Rio de Janeiro', 'MG': 'Belo Horizonte', 'RS': 'Porto Alegre',
+    'PR': 'Curitiba', 'SC': 'Florianópolis', 'BA': 'Salvador', 'PE': 'Recife', 'GO': 'Goiânia',
+    'DF': 'Brasília', 'CE': 'Fortaleza', 'ES': 'Vitória', 'PA': 'Belém', 'AM': 'Manaus',
+    'MT': 'Cuiabá', 'MS': 'Campo Grande', 'RN': 'Natal', 'PB': 'João Pessoa', 'MA': 'São Luís',
+    'AL': 'Maceió', 'PI': 'Teresina', 'SE': 'Aracaju', 'RO': 'Porto Velho', 'TO': 'Palmas',
+    'AP': 'Macapá', 'AC': 'Rio Branco', 'RR': 'Boa Vista',
+}
+
+# Grandes redes de exibição (ficam com os exibidores de maior peso)
+GRUPOS_EXIBIDORES = ['Cinemark', 'Cinépolis', 'Kinoplex', 'UCI', 'Cineflix', 'Moviecom', 'Cinesystem',
+                     'Centerplex', 'Araújo', 'Cine A']
+
+# Majors primeiro: recebem o maior peso de Zipf
+DISTRIBUIDORAS_PRINCIPAIS = ['Disney', 'Warner Bros.', 'Sony Pictures', 'Universal Pictures',
+                             'Paramount Pictures', 'Paris Filmes', 'Diamond Films', 'Imagem Filmes',
+                             'H2O Films', 'Downtown Filmes']
+
+TIPOS_OBRA = {'Longa-metragem': 45, 'Curta-metragem': 25, 'Seriado': 15, 'Documentário': 8,
+              'Telefilme': 4, 'Videomusical': 3}
+SEGMENTOS = ['Salas de Exibição', 'TV Paga', 'TV Aberta', 'Vídeo por Demanda', 'Festivais']
+PAISES = {'Estados Unidos': 55, 'França': 8, 'Reino Unido': 7, 'Argentina': 4, 'Espanha': 4,
+          'Japão': 4, 'Alemanha': 3, 'Portugal': 3, 'Coreia do Sul': 3, 'Itália': 3, 'Canadá': 3,
+          'México': 3}
+
+LANCAMENTO_INICIO = date(2009, 1, 1)
+LANCAMENTO_SEMANAS = 16 * 52
+
+
+def table_sizes(scale=1.0) -> dict:
+    """Número de linhas de cada tabela base para o fator de escala."""
+    return {name: max(1, int(size * scale)) for name, size in BASE_SIZES.items()}
+
+
+def _zipf_cum_weights(n, exponent):
+    """Pesos cumulativos 1/k^s (k = 1..n) para `random.choices`."""
+    return list(itertools.accumulate(1.0 / (k ** exponent) for k in range(1, n + 1)))
+
+
+def _weighted(options):
+    """(valores, pesos cumulativos) de um dicionário valor -> peso."""
+    return list(options), list(itertools.accumulate(options.values()))
+
+
+def _cnpj(rng):
+    return f"{rng.randrange(10**13, 10**14)}"
+
+
+def _date(rng, start_year, end_year):
+    start = date(start_year, 1, 1)
+    return (start + timedelta(days=rng.randrange((date(end_year, 12, 31) - start).days))).isoformat()
+
+
+class _Generator:
+    """
+    Gera as tabelas como iteradores, na ordem de TABLE_ORDER. Entre tabelas
+    só se guardam os dados compactos de que os filhos precisam (pesos dos
+    complexos, índices das longas-metragens e das coproduções), não as linhas.
+    """
+
+    def __init__(self, scale, random_seed):
+        self.sizes = table_sizes(scale)
+        self.random_seed = random_seed
+        self._complexo_weights = None
+        self._longas = None
+        self._coproducoes = None
+
+    def _rng(self, table_name):
+        # Um gerador por tabela: cada tabela é determinista mesmo gerada sozinha
+        return random.Random(f"{self.random_seed}:{table_name}")
+
+    def exibidores(self):
+        rng = self._rng('exibidores')
+        for i in range(1, self.sizes['exibidores'] + 1):
+            # Os primeiros exibidores (maior peso de Zipf) são as grandes redes
+            grupo = GRUPOS_EXIBIDORES[i - 1] if i <= len(GRUPOS_EXIBIDORES) else None
+            yield {
+                'registro_exibidor': f"{i:08d}",
+                'cnpj_exibidor': _cnpj(rng),
+                'nome_exibidor': f"{grupo} Cinemas S.A." if grupo else f"Exibidor {i} Ltda.",
+                'nome_grupo_exibidor': grupo,
+                'situacao_exibidor': 'REGULAR' if rng.random() < 0.92 else 'IRREGULAR',
+            }
+
+    def complexos(self):
+        rng = self._rng('complexos')
+        exibidor_weights = _zipf_cum_weights(self.sizes['exibidores'], 1.1)
+        exibidores = range(1, self.sizes['exibidores'] + 1)
+        ufs, uf_weights = _weighted(UF_WEIGHTS)
+
+        # Peso de cada complexo na distribuição das salas (≈ salas por complexo)
+        weights = array('d')
+        for i in range(1, self.sizes['complexos'] + 1):
+            exibidor = rng.choices(exibidores, cum_weights=exibidor_weights)[0]
+            uf = rng.choices(ufs, cum_weights=uf_weights)[0]
+            capital = rng.random() < (0.55 if uf in ('SP', 'RJ') else 0.4)
+            em_funcionamento = rng.random() < 0.9
+            itinerante = rng.random() < 0.01
+            # Multiplexes: mais frequentes nas redes, capitais e em SP/RJ
+            multiplex = exibidor <= len(GRUPOS_EXIBIDORES) or (capital and rng.random() < 0.3)
+            weights.append(0.0 if itinerante else rng.lognormvariate(math.log(8 if multiplex else 2), 0.4))
+            municipio = CAPITAIS[uf] if capital else f"Município {uf}-{rng.randrange(1, 120)}"
+            yield {
+                'registro_complexo': f"{i:08d}",
+                'registro_exibidor_fk': f"{exibidor:08d}",
+                'situacao_complexo': 'EM FUNCIONAMENTO' if em_funcionamento else 'FECHADO',
+                'data_situacao_complexo': _date(rng, 2000, 2024),
+                'website_complexo': f"https://cinema{i}.com.br" if rng.random() < 0.5 else None,
+                'complexo_itinerante': itinerante,
+                'tipo_operacao_usual': 'ITINERANTE' if itinerante else 'FIXO',
+                'endereco_complexo': f"Avenida {rng.randrange(1, 400)}",
+                'numero_endereco_complexo': str(rng.randrange(1, 5000)),
+                'complemento_complexo': 'Shopping' if multiplex else None,
+                'bairro_complexo': f"Bairro {rng.randrange(1, 60)}",
+                'municipio_complexo': municipio,
+                'uf_complexo': uf,
+                'cep_complexo': f"{rng.randrange(1000000, 99999999):08d}",
+            }
+        self._complexo_weights = list(itertools.accumulate(weights))
+
+    def salas(self):
+        if self._complexo_weights is None:
+            for _ in self.complexos():
+                pass
+        rng = self._rng('salas')
+        complexos = rng.choices(range(1, self.sizes['complexos'] + 1), cum_weights=self._complexo_weights,
+                                k=self.sizes['salas'])
+        # Salas do mesmo complexo com registos seguidos, como no cadastro real
+        complexos.sort()
+        numero = 0
+        for i, complexo in enumerate(complexos, start=1):
+            numero = numero + 1 if i > 1 and complexos[i - 2] == complexo else 1
+            assentos = int(rng.triangular(40, 500, 180))
+            yield {
+                'registro_sala': f"{i:08d}",
+                'registro_complexo_fk': f"{complexo:08d}",
+                'nome_sala': f"Sala {numero}",
+                'cnpj_sala': None,
+                'situacao_sala': 'EM FUNCIONAMENTO' if rng.random() < 0.9 else 'FECHADA',
+                'data_situacao_sala': _date(rng, 2000, 2024),
+                'data_inicio_funcionamento': _date(rng, 1980, 2024),
+                'assentos_total': assentos,
+                'assentos_cadeirantes': max(1, assentos // 100),
+                'assentos_mobilidade_reduzida': max(1, assentos // 100),
+                'assentos_obesidade': max(1, assentos // 200),
+                'acesso_assentos_rampa': rng.random() < 0.8,
+                'acesso_sala_rampa': rng.random() < 0.85,
+                'banheiros_acessiveis': rng.random() < 0.7,
+            }
+
+    def obras(self):
+        rng = self._rng('obras')
+        tipos, tipo_weights = _weighted(TIPOS_OBRA)
+        ufs, uf_weights = _weighted(UF_WEIGHTS)
+        self._longas = array('L')
+        self._coproducoes = array('L')
+        for i in range(1, self.sizes['obras'] + 1):
+            cpb = f"B{i:09d}"
+            tipo = rng.choices(tipos, cum_weights=tipo_weights)[0]
+            seriado = tipo == 'Seriado'
+            if tipo == 'Longa-metragem':
+                self._longas.append(i)
+                duracao = rng.uniform(70, 170)
+            elif tipo in ('Curta-metragem', 'Videomusical'):
+                duracao = rng.uniform(3, 30)
+            else:
+                duracao = rng.uniform(45, 600 if seriado else 120)
+            ano = rng.randrange(1995, 2025)
+            coproducao = rng.random() < 0.08
+            if coproducao:
+                self._coproducoes.append(i)
+            uf = rng.choices(ufs, cum_weights=uf_weights)[0]
+            yield {
+                'cpb': cpb,
+                'titulo_original': f"Obra {i}",
+                'data_emissao_cpb': _date(rng, ano, min(ano + 1, 2024)),
+                'situacao_obra': 'CPB EMITIDO',
+                'tipo_obra': tipo,
+                'subtipo_obra': 'Ficção' if rng.random() < 0.6 else 'Não ficção',
+                'classificacao_obra': 'Comum' if rng.random() < 0.9 else 'Brasileira Independente',
+                'organizacao_temporal': 'Seriada' if seriado else 'Não seriada',
+                'duracao_total_minutos': round(duracao, 1),
+                'quantidade_episodios': rng.randrange(4, 27) if seriado else None,
+                'ano_producao_inicial': ano,
+                'ano_producao_final': ano + (rng.randrange(0, 3) if seriado else 0),
+                'segmento_destinacao_inicial': rng.choice(SEGMENTOS),
+                'coproducao_internacional': coproducao,
+                'requerente': f"Produtora {rng.randrange(1, 2000)} Ltda.",
+                'cnpj_requerente': _cnpj(rng),
+                'uf_requerente': uf,
+                'municipio_requerente': CAPITAIS[uf],
+            }
+
+    def paises_origem(self):
+        if self._coproducoes is None:
+            for _ in self.obras():
+                pass
+        rng = self._rng('paises_origem')
+        paises, pais_weights = _weighted(PAISES)
+        coproducoes = iter(self._coproducoes)
+        proxima_coproducao = next(coproducoes, None)
+        pais_id = 0
+        for i in range(1, self.sizes['obras'] + 1):
+            # Todas as obras com CPB são brasileiras; as coproduções têm mais países
+            origens = ['Brasil']
+            if i == proxima_coproducao:
+                origens += sorted(set(rng.choices(paises, cum_weights=pais_weights, k=rng.randrange(1, 3))))
+                proxima_coproducao = next(coproducoes, None)
+            for pais in origens:
+                pais_id += 1
+                yield {
+                    'id': pais_id,
+                    'obra_cpb_fk': f"B{i:09d}",
+                    'pais_origem': pais,
+                    'titulo_original_pais': None,
+                }
+
+    def distribuidoras(self):
+        rng = self._rng('distribuidoras')
+        for i in range(1, self.sizes['distribuidoras'] + 1):
+            nome = DISTRIBUIDORAS_PRINCIPAIS[i - 1] if i <= len(DISTRIBUIDORAS_PRINCIPAIS) else f"Distribuidora {i}"
+            yield {
+                'registro_distribuidora': i,
+                'cnpj_distribuidora': _cnpj(rng),
+                'razao_social_distribuidora': f"{nome} Distribuidora Ltda.",
+            }
+
+    def lancamentos(self):
+        if self._longas is None:
+            for _ in self.obras():
+                pass
+        rng = self._rng('lancamentos')
+        distribuidora_weights = _zipf_cum_weights(self.sizes['distribuidoras'], 1.2)
+        distribuidoras = range(1, self.sizes['distribuidoras'] + 1)
+        paises, pais_weights = _weighted(PAISES)
+        majors = len(DISTRIBUIDORAS_PRINCIPAIS) // 2
+        # Primeira quinta-feira do período (estreias no Brasil são à quinta)
+        primeira_quinta = LANCAMENTO_INICIO + timedelta(days=(3 - LANCAMENTO_INICIO.weekday()) % 7)
+        for i in range(1, self.sizes['lancamentos'] + 1):
+            distribuidora = rng.choices(distribuidoras, cum_weights=distribuidora_weights)[0]
+            nacional = bool(self._longas) and rng.random() < 0.2
+            estreia = primeira_quinta + timedelta(weeks=rng.randrange(LANCAMENTO_SEMANAS))
+            # Público em cauda longa; as majors lançam os grandes sucessos
+            publico = int(rng.lognormvariate(math.log(40000 if distribuidora <= majors else 6000), 1.6))
+            preco_medio = 10.0 + 0.8 * (estreia.year - LANCAMENTO_INICIO.year)
+            yield {
+                'id': i,
+                'obra_cpb_fk': f"B{rng.choice(self._longas):09d}" if nacional else None,
+                'registro_distribuidora_fk': distribuidora,
+                'cpb_roe': f"E{i:09d}",
+                'titulo_original': f"Lançamento {i}",
+                'data_lancamento': estreia.isoformat(),
+                'tipo_obra': 'Longa-metragem',
+                'pais_obra': 'Brasil' if nacional else rng.choices(paises, cum_weights=pais_weights)[0],
+                'publico_total': publico,
+                'renda_total': round(publico * preco_medio * rng.uniform(0.85, 1.15), 2),
+            }
+
+    def iter_tables(self):
+        """Pares (tabela, iterador de registos) na ordem de carga."""
+        for table_name in TABLE_ORDER:
+            yield table_name, getattr(self, table_name)()
+
+
+def iter_tables(scale=1.0, random_seed=42):
+    """
+    Gera as tabelas uma a uma, na ordem de carga. Cada iterador tem de ser
+    consumido antes de pedir o seguinte (os filhos dependem dos pais).
+    """
+    return _Generator(scale, random_seed).iter_tables()
+
+
+def generate(scale=1.0, random_seed=42) -> dict:
+    """Todas as tabelas em memória (dict nome -> lista de registos)."""
+    return {table_name: list(rows) for table_name, rows in iter_tables(scale, random_seed)}
+
+
+def _write_csv(path, table_name, rows):
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS[table_name])
+        for row in rows:
+            # Vazio = NULL no COPY em CSV; booleanos como o Postgres os escreve
+            writer.writerow([('t' if value else 'f') if isinstance(value, bool) else ('' if value is None else value)
+                             for value in (row[column] for column in COLUMNS[table_name])])
+            count += 1
+    return count
+
+
+def _write_jsonl(path, table_name, rows):
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def write(directory, scale=1.0, random_seed=42, fmt='csv') -> dict:
+    """
+    Grava o conjunto de dados em `directory` e devolve o manifesto. Em csv e
+    jsonl as tabelas são escritas à medida que são geradas; 'snapshot' precisa
+    de todas as linhas em memória (usa `snapshot_service.write_snapshot`).
+    """
+    manifest = {'scale': scale, 'random_seed': random_seed, 'format': fmt, 'tables': {}}
+    if fmt == 'snapshot':
+        sys.path.insert(0, ROOT_DIR)
+        from app.services import snapshot_service
+
+        tables = generate(scale, random_seed)
+        snapshot = snapshot_service.write_snapshot(directory, tables, version=f"synthetic-{scale}-{random_seed}")
+        manifest['tables'] = {name: {'rows': info['rows']} for name, info in snapshot['tables'].items()}
+        return manifest
+
+    writers = {'csv': _write_csv, 'jsonl': _write_jsonl}
+    if fmt not in writers:
+        raise ValueError(f"Formato desconhecido: '{fmt}'. Use csv, jsonl ou snapshot.")
+
+    os.makedirs(directory, exist_ok=True)
+    for table_name, rows in iter_tables(scale, random_seed):
+        filename = f"{table_name}.{fmt}"
+        count = writers[fmt](os.path.join(directory, filename), table_name, rows)
+        manifest['tables'][table_name] = {'file': filename, 'rows': count}
+
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplica o tamanho das tabelas.')
+    parser.add_argument('--seed', type=int, default=42, help='Semente (mesma semente, mesmos dados).')
+    parser.add_argument('--format', choices=('csv', 'jsonl', 'snapshot'), default='csv')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    manifest = write(args.directory, args.scale, args.seed, args.format)
+    elapsed = time.perf_counter() - started
+
+    for table_name, info in manifest['tables'].items():
+        print(f"{table_name:<16}{info['rows']:>12} registos")
+    print(f"Gerado em {elapsed:.1f} s em {args.directory}.")
+    if args.format == 'csv':
+        print("Carga no Postgres (por esta ordem):")
+        for table_name in TABLE_ORDER:
+            path = os.path.join(args.directory, f"{table_name}.csv")
+            print(f"  \\copy {table_name} ({', '.join(COLUMNS[table_name])}) from '{path}' csv header")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,829 @@
+# benchmarks/fake_backend.py
+
+"""
+Backend falso em processo, compatível com o PostgREST, para benchmarks e
+testes de carga sem rede.
+
+Implementa a interface do cliente Supabase usada pelos serviços
+(`table()`/`from_()` e `rpc()`) e interpreta a cadeia do construtor de
+queries sobre tabelas em memória (listas de dicionários):
+
+  - select com colunas, aliases (`alias:coluna`) e embedded selects
+    aninhados (`*, complexos!inner(*, exibidores(*))`), com `!inner`;
+  - filtros eq, neq, gt, gte, lt, lte, like, ilike, in_, is_, filter(),
+    match(), not_ e or_, também sobre recursos embutidos
+    (`complexos.uf_complexo`);
+  - order (desc, nullsfirst, foreign_table), limit, offset e range;
+  - count='exact'/'planned'/'estimated' (sempre exato), head, single() e
+    maybe_single();
+  - RPCs registadas por nome (`register_rpc`), com filtros sobre o resultado.
+
+Os erros seguem os códigos do PostgREST/PostgreSQL (tabela ou coluna
+inexistente, relação desconhecida, single() com zero ou várias linhas) e
+são levantados como `postgrest.exceptions.APIError`, tal como o cliente real.
+
+Para ser rápido o suficiente para testes de carga, as igualdades usam
+índices de hash e a ordenação usa índices ordenados (com bisect para o
+cursor `gt`), construídos no primeiro uso; sem count, a avaliação para
+assim que a página está completa. `latency_ms`/`jitter_ms` simulam a ida ao
+Supabase e `error_rate` falhas de ligação (PGRST001).
+
+    import fake_backend  # com benchmarks/ no sys.path
+    fake_backend.install(fake_backend.seed(scale=1.0), latency_ms=5)
+
+`FakeAsyncSupabase` tem a interface do cliente assíncrono (modo ASGI) sobre
+o mesmo backend; `install_async()` instala-o no event loop atual.
+"""
+
+import asyncio
+import bisect
+import operator
+import random
+import re
+import time
+from types import SimpleNamespace
+
+import httpx
+from postgrest.exceptions import APIError
+
+import dataset
+
+# Chaves primárias (ordem natural das tabelas)
+PRIMARY_KEYS = {
+    'exibidores': 'registro_exibidor',
+    'complexos': 'registro_complexo',
+    'salas': 'registro_sala',
+    'obras': 'cpb',
+    'paises_origem': 'id',
+    'distribuidoras': 'registro_distribuidora',
+    'lancamentos': 'id',
+    'filmagem_estrangeira': 'id',
+}
+
+# Relações usadas nos embedded selects:
+# (tabela, recurso embutido) -> (coluna local, coluna remota, muitos?)
+RELATIONSHIPS = {
+    ('salas', 'complexos'): ('registro_complexo_fk', 'registro_complexo', False),
+    ('complexos', 'salas'): ('registro_complexo', 'registro_complexo_fk', True),
+    ('complexos', 'exibidores'): ('registro_exibidor_fk', 'registro_exibidor', False),
+    ('exibidores', 'complexos'): ('registro_exibidor', 'registro_exibidor_fk', True),
+    ('obras', 'paises_origem'): ('cpb', 'obra_cpb_fk', True),
+    ('paises_origem', 'obras'): ('obra_cpb_fk', 'cpb', False),
+    ('obras', 'lancamentos'): ('cpb', 'obra_cpb_fk', True),
+    ('lancamentos', 'distribuidoras'): ('registro_distribuidora_fk', 'registro_distribuidora', False),
+    ('distribuidoras', 'lancamentos'): ('registro_distribuidora', 'registro_distribuidora_fk', True),
+    ('lancamentos', 'obras'): ('obra_cpb_fk', 'cpb', False),
+}
+
+_COMPARATORS = {
+    'eq': operator.eq, 'neq': operator.ne,
+    'gt': operator.gt, 'gte': operator.ge, 'lt': operator.lt, 'lte': operator.le,
+}
+_OPERATORS = set(_COMPARATORS) | {'like', 'ilike', 'in', 'is'}
+
+
+def _error(code, message, hint=None, details=None):
+    return APIError({'code': code, 'message': message, 'hint': hint, 'details': details})
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+# --- Select ---
+
+class _Embed:
+    __slots__ = ('alias', 'table', 'inner', 'node')
+
+    def __init__(self, alias, table, inner, node):
+        self.alias = alias
+        self.table = table
+        self.inner = inner
+        self.node = node
+
+
+class _SelectNode:
+    """Colunas (alias, coluna) ou '*' e recursos embutidos de um nível do select."""
+
+    __slots__ = ('star', 'columns', 'embeds')
+
+    def __init__(self):
+        self.star = False
+        self.columns = []
+        self.embeds = []
+
+
+def _split_top_level(text, separator=','):
+    """Divide por `separator` fora de parênteses."""
+    items, depth, token = [], 0, ''
+    for char in text:
+        if char == separator and depth == 0:
+            items.append(token.strip())
+            token = ''
+            continue
+        depth += char == '('
+        depth -= char == ')'
+        token += char
+    items.append(token.strip())
+    return [item for item in items if item]
+
+
+def parse_select(select) -> _SelectNode:
+    """'*, complexos!inner(*, exibidores(*))' -> árvore de _SelectNode/_Embed."""
+    node = _SelectNode()
+    for item in _split_top_level(select or '*'):
+        if '(' in item:
+            name, inner = item.split('(', 1)
+            if not inner.endswith(')'):
+                raise _error('PGRST100', f"failed to parse select parameter ({select})")
+            alias, _, name = name.rpartition(':')
+            table, _, hint = name.strip().partition('!')
+            table = table.strip()
+            node.embeds.append(_Embed(alias.strip() or table, table, hint.strip() == 'inner',
+                                      parse_select(inner[:-1])))
+        elif item == '*':
+            node.star = True
+        else:
+            alias, _, column = item.rpartition(':')
+            column = column.split('::')[0].strip()  # ignora casts (coluna::text)
+            node.columns.append((alias.strip() or column, column))
+    return node
+
+
+# --- Filtros ---
+
+def _like_regex(pattern, ignore_case):
+    # No PostgREST '*' equivale a '%' (para não ter de o codificar no URL)
+    parts = ['.*' if char in '*%' else '.' if char == '_' else re.escape(char) for char in pattern]
+    return re.compile('^' + ''.join(parts) + '$', re.S | (re.I if ignore_case else 0))
+
+
+def _coerce(sample, value):
+    """Converte o valor do filtro (texto no URL) para o tipo da coluna."""
+    if isinstance(value, str):
+        if isinstance(sample, bool):
+            return value.lower() == 'true'
+        try:
+            if isinstance(sample, int):
+                return int(value)
+            if isinstance(sample, float):
+                return float(value)
+        except ValueError:
+            raise _error('22P02', f"invalid input syntax for type {type(sample).__name__}: \"{value}\"")
+        return value
+    if isinstance(sample, str) and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+def _compile(op, raw, sample, negate=False):
+    """Predicado `f(valor) -> bool` com a semântica de NULL do SQL."""
+    if op == 'is':
+        target = {'null': None, 'true': True, 'false': False}.get(str(raw).lower(), raw)
+        return (lambda v: v is not target) if negate else (lambda v: v is target)
+
+    if op == 'in':
+        items = raw if isinstance(raw, (list, tuple, set)) else \
+            [item.strip('"') for item in _split_top_level(str(raw).strip('()'))]
+        values = {_coerce(sample, item) for item in items}
+        test = values.__contains__
+    elif op in ('like', 'ilike'):
+        regex = _like_regex(str(raw), op == 'ilike')
+        test = lambda v: regex.match(str(v)) is not None  # noqa: E731
+    elif op in _COMPARATORS:
+        value, compare = _coerce(sample, raw), _COMPARATORS[op]
+        test = lambda v: compare(v, value)  # noqa: E731
+    else:
+        raise _error('PGRST100', f"failed to parse filter ({op}.{raw})")
+
+    # NULL nunca satisfaz uma comparação, nem negada
+    if negate:
+        return lambda v: v is not None and not test(v)
+    return lambda v: v is not None and test(v)
+
+
+class _Filter:
+    """Filtro `coluna=[not.]op.valor` num nível (path) do select."""
+
+    __slots__ = ('path', 'column', 'op', 'value', 'negate')
+
+    def __init__(self, path, column, op, value, negate=False):
+        self.path = path
+        self.column = column
+        self.op = op
+        self.value = value
+        self.negate = negate
+
+
+class _OrGroup:
+    """`or=(a.eq.1,b.gt.2)` (ou `and(...)` aninhado) num nível do select."""
+
+    __slots__ = ('path', 'conjunction', 'members', 'negate')
+
+    def __init__(self, path, conjunction, members, negate=False):
+        self.path = path
+        self.conjunction = conjunction
+        self.members = members
+        self.negate = negate
+
+
+def _parse_logic(path, expression, conjunction='or', negate=False):
+    members = []
+    for condition in _split_top_level(expression.strip()[1:-1] if expression.startswith('(') else expression):
+        inner_negate = condition.startswith('not.')
+        if inner_negate:
+            condition = condition[len('not.'):]
+        if condition.startswith(('and(', 'or(')):
+            kind, rest = condition.split('(', 1)
+            members.append(_parse_logic(path, '(' + rest, kind, inner_negate))
+            continue
+        column, op, value = (condition.split('.', 2) + ['', ''])[:3]
+        if op == 'not':
+            inner_negate = not inner_negate
+            op, _, value = value.partition('.')
+        members.append(_Filter(path, column, op, value, inner_negate))
+    return _OrGroup(path, conjunction, members, negate)
+
+
+# --- Construtor de queries ---
+
+class FakeQueryBuilder:
+    """Construtor de queries sobre uma tabela (ou o resultado de uma RPC) em memória."""
+
+    def __init__(self, backend, table, rpc=None, rpc_params=None):
+        self.backend = backend
+        self.table = table
+        self.rpc = rpc
+        self.rpc_params = rpc_params or {}
+        self.columns = '*'
+        self.count = None
+        self.head = False
+        self.filters = []
+        self.orders = {}   # path -> [(coluna, desc, nullsfirst)]
+        self.limits = {}   # path -> limite
+        self.offsets = {}  # path -> deslocamento
+        self.single_mode = None
+        self._negate_next = False
+        self._compiled = {}
+        path = f"/rest/v1/rpc/{rpc}" if rpc else f"/rest/v1/{table}"
+        self.request = SimpleNamespace(
+            http_method='POST' if rpc else 'GET',
+            path=path,
+            params=httpx.QueryParams(),
+            headers=httpx.Headers(),
+            json=self.rpc_params if rpc else None
+        )
+
+    def _param(self, key, value):
+        self.request.params = self.request.params.add(key, value)
+        return self
+
+    # Seleção
+
+    def select(self, *columns, count=None, head=None):
+        self.columns = ','.join(columns) or '*'
+        self.count = count
+        self.head = bool(head)
+        if count:
+            self.request.headers['prefer'] = f"count={count}"
+        if head:
+            self.request.http_method = 'HEAD'
+        return self._param('select', self.columns)
+
+    # Filtros
+
+    @property
+    def not_(self):
+        self._negate_next = True
+        return self
+
+    def filter(self, column, operator, criteria):
+        negate, self._negate_next = self._negate_next, False
+        op = operator
+        if op.startswith('not.'):
+            negate, op = not negate, op[len('not.'):]
+        path, _, name = column.rpartition('.')
+        if op not in _OPERATORS:
+            raise _error('PGRST100', f"failed to parse filter ({operator}.{criteria})")
+        self.filters.append(_Filter(tuple(path.split('.')) if path else (), name, op, criteria, negate))
+        if isinstance(criteria, (list, tuple, set)):
+            criteria = f"({','.join(str(v) for v in criteria)})"
+        return self._param(column, f"{'not.' if negate else ''}{op}.{criteria}")
+
+    def eq(self, column, value):
+        return self.filter(column, 'eq', value)
+
+    def neq(self, column, value):
+        return self.filter(column, 'neq', value)
+
+    def gt(self, column, value):
+        return self.filter(column, 'gt', value)
+
+    def gte(self, column, value):
+        return self.filter(column, 'gte', value)
+
+    def lt(self, column, value):
+        return self.filter(column, 'lt', value)
+
+    def lte(self, column, value):
+        return self.filter(column, 'lte', value)
+
+    def like(self, column, pattern):
+        return self.filter(column, 'like', pattern)
+
+    def ilike(self, column, pattern):
+        return self.filter(column, 'ilike', pattern)
+
+    def is_(self, column, value):
+        return self.filter(column, 'is', 'null' if value is None else str(value).lower())
+
+    def in_(self, column, values):
+        return self.filter(column, 'in', list(values))
+
+    def match(self, query):
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    def or_(self, filters, reference_table=None):
+        path = tuple(reference_table.split('.')) if reference_table else ()
+        self.filters.append(_parse_logic(path, f"({filters})"))
+        key = f"{reference_table}.or" if reference_table else 'or'
+        return self._param(key, f"({filters})")
+
+    # Ordenação e paginação
+
+    def order(self, column, *, desc=False, nullsfirst=None, foreign_table=None):
+        path = tuple(foreign_table.split('.')) if foreign_table else ()
+        self.orders.setdefault(path, []).append((column, desc, nullsfirst))
+        value = f"{column}.{'desc' if desc else 'asc'}"
+        if nullsfirst is not None:
+            value += '.nullsfirst' if nullsfirst else '.nullslast'
+        return self._param(f"{foreign_table}.order" if foreign_table else 'order', value)
+
+    def limit(self, size, *, foreign_table=None):
+        path = tuple(foreign_table.split('.')) if foreign_table else ()
+        self.limits[path] = size
+        return self._param(f"{foreign_table}.limit" if foreign_table else 'limit', str(size))
+
+    def offset(self, size):
+        self.offsets[()] = size
+        return self._param('offset', str(size))
+
+    def range(self, start, end, foreign_table=None):
+        path = tuple(foreign_table.split('.')) if foreign_table else ()
+        self.offsets[path] = start
+        self.limits[path] = end - start + 1
+        prefix = f"{foreign_table}." if foreign_table else ''
+        self._param(f"{prefix}offset", str(start))
+        return self._param(f"{prefix}limit", str(end - start + 1))
+
+    def single(self):
+        self.single_mode = 'single'
+        self.request.headers['accept'] = 'application/vnd.pgrst.object+json'
+        return self
+
+    def maybe_single(self):
+        self.single_mode = 'maybe'
+        self.request.headers['accept'] = 'application/vnd.pgrst.object+json'
+        return self
+
+    def retry(self, enabled):
+        return self
+
+    def execute(self):
+        self.backend.simulate_network()
+        return self._respond()
+
+    def _respond(self):
+        if self.rpc:
+            return self.backend.call_rpc(self)
+        return self.backend.query(self)
+
+
+class FakeAsyncQueryBuilder(FakeQueryBuilder):
+    """Builder do cliente assíncrono: `execute()` é uma corrotina."""
+
+    async def execute(self):
+        await asyncio.sleep(self.backend.network_delay())
+        self.backend.simulate_failure()
+        return self._respond()
+
+
+# --- Cliente ---
+
+class FakeSupabase:
+    """Cliente com a interface usada pelos serviços (`table`, `from_`, `rpc`)."""
+
+    def __init__(self, tables, latency_ms=0, jitter_ms=0, error_rate=0.0, random_seed=None):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rpcs = dict(RPCS)
+        self._random = random.Random(random_seed)
+        self.load(tables)
+
+    def load(self, tables):
+        """Substitui os dados (e descarta os índices)."""
+        self.tables = tables
+        self._hash_indexes = {}
+        self._sorted_indexes = {}
+        self._types = {}
+        self._columns = {}
+
+    def register_rpc(self, name, function):
+        """Regista `function(tables, params) -> dados` como a RPC `name`."""
+        self.rpcs[name] = function
+
+    def table(self, name):
+        return FakeQueryBuilder(self, name)
+
+    from_ = table
+
+    def rpc(self, name, params=None):
+        return FakeQueryBuilder(self, None, rpc=name, rpc_params=params)
+
+    def network_delay(self) -> float:
+        return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+
+    def simulate_failure(self):
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise _error('PGRST001', 'Could not connect with the database (falha simulada)')
+
+    def simulate_network(self):
+        if self.latency or self.jitter:
+            time.sleep(self.network_delay())
+        self.simulate_failure()
+
+    # --- Metadados e índices ---
+
+    def _rows(self, table):
+        rows = self.tables.get(table)
+        if rows is None:
+            raise _error('PGRST205', f"Could not find the table 'public.{table}' in the schema cache")
+        return rows
+
+    def _column_names(self, table, rows):
+        names = self._columns.get(table)
+        if names is None:
+            names = set()
+            for row in rows[:100]:
+                names.update(row)
+            self._columns[table] = names
+        return names
+
+    def _check_column(self, table, rows, column):
+        names = self._column_names(table, rows)
+        if names and column not in names:
+            raise _error('42703', f"column {table}.{column} does not exist")
+
+    def _sample(self, table, rows, column):
+        """Um valor não nulo da coluna (para converter os filtros para o seu tipo)."""
+        key = (table, column)
+        if key not in self._types:
+            self._types[key] = next((row[column] for row in rows if row.get(column) is not None), None)
+        return self._types[key]
+
+    def _hash_index(self, table, rows, column):
+        key = (table, column)
+        index = self._hash_indexes.get(key)
+        if index is None:
+            index = {}
+            for row in rows:
+                index.setdefault(row.get(column), []).append(row)
+            self._hash_indexes[key] = index
+        return index
+
+    def _sorted_index(self, table, rows, column):
+        """(linhas não nulas por ordem ascendente, chaves, linhas nulas)."""
+        key = (table, column)
+        index = self._sorted_indexes.get(key)
+        if index is None:
+            present = sorted((row for row in rows if row.get(column) is not None), key=lambda r: r[column])
+            index = (present, [row[column] for row in present], [row for row in rows if row.get(column) is None])
+            self._sorted_indexes[key] = index
+        return index
+
+    def _relationship(self, table, embedded):
+        relation = RELATIONSHIPS.get((table, embedded))
+        if relation is None:
+            raise _error('PGRST200', f"Could not find a relationship between '{table}' and '{embedded}' in the schema cache")
+        return relation
+
+    # --- Avaliação ---
+
+    def _compile_filters(self, table, rows, filters):
+        predicates = []
+        for item in filters:
+            if isinstance(item, _OrGroup):
+                members = self._compile_filters(table, rows, item.members)
+                combine = any if item.conjunction == 'or' else all
+                negate = item.negate
+                predicates.append(
+                    lambda row, members=members, combine=combine, negate=negate:
+                        combine(p(row) for p in members) != negate
+                )
+                continue
+            self._check_column(table, rows, item.column)
+            test = _compile(item.op, item.value, self._sample(table, rows, item.column), item.negate)
+            predicates.append(lambda row, column=item.column, test=test: test(row.get(column)))
+        return predicates
+
+    @staticmethod
+    def _sort(rows, orders):
+        # Ordenações estáveis da última chave para a primeira; NULLs como no
+        # PostgreSQL (últimos em asc, primeiros em desc, salvo nullsfirst)
+        rows = list(rows)
+        for column, desc, nullsfirst in reversed(orders):
+            nulls_first = desc if nullsfirst is None else nullsfirst
+            null_key = (1,) if nulls_first == desc else (-1,)
+            rows.sort(key=lambda r: (0, r[column]) if r.get(column) is not None else null_key, reverse=desc)
+        return rows
+
+    def _candidates(self, table, rows, filters, orders):
+        """
+        Linhas candidatas, já ordenadas quando possível:
+          - igualdade numa coluna: índice de hash;
+          - ordenação por uma coluna: índice ordenado, com bisect para gt/gte
+            nessa coluna (cursor de paginação).
+        Retorna (iterável, ordenado?). Os filtros são sempre reavaliados.
+        """
+        if table.startswith('rpc:'):
+            # Resultado de uma função: novo a cada chamada, sem índices
+            return rows, False
+
+        plain = [f for f in filters if isinstance(f, _Filter) and not f.negate]
+        equality = [f for f in plain if f.op == 'eq']
+        if equality:
+            best = None
+            for f in equality:
+                self._check_column(table, rows, f.column)
+                value = _coerce(self._sample(table, rows, f.column), f.value)
+                matches = self._hash_index(table, rows, f.column).get(value, [])
+                if best is None or len(matches) < len(best):
+                    best = matches
+            return best, False
+
+        if len(orders) == 1:
+            column, desc, nullsfirst = orders[0]
+            self._check_column(table, rows, column)
+            present, keys, nulls = self._sorted_index(table, rows, column)
+            nulls_first = desc if nullsfirst is None else nullsfirst
+            if desc:
+                ordered = present[::-1]
+            else:
+                start = 0
+                for f in plain:
+                    if f.column == column and f.op in ('gt', 'gte'):
+                        value = _coerce(self._sample(table, rows, column), f.value)
+                        find = bisect.bisect_right if f.op == 'gt' else bisect.bisect_left
+                        start = max(start, find(keys, value))
+                ordered = present[start:]
+            return (nulls + ordered) if nulls_first else (ordered + nulls), True
+
+        return rows, False
+
+    def _related(self, table, row, embed, builder, path):
+        """Linhas de `embed` relacionadas com `row` que passam os filtros do seu nível."""
+        local, remote, _ = self._relationship(table, embed.table)
+        rows = self._rows(embed.table)
+        self._column_names(embed.table, rows)
+        matches = self._hash_index(embed.table, rows, remote).get(row.get(local), [])
+        predicates = self._level_predicates(embed.table, rows, builder, path)
+        result = []
+        for match in matches:
+            if all(p(match) for p in predicates) and self._inner_ok(embed.table, match, embed.node, builder, path):
+                result.append(match)
+        return result
+
+    def _level_predicates(self, table, rows, builder, path):
+        cache = builder._compiled
+        if path not in cache:
+            cache[path] = self._compile_filters(table, rows, [f for f in builder.filters if f.path == path])
+        return cache[path]
+
+    def _inner_ok(self, table, row, node, builder, path):
+        """Todos os recursos `!inner` deste nível têm pelo menos uma linha."""
+        for embed in node.embeds:
+            if embed.inner and not self._related(table, row, embed, builder, path + (embed.alias,)):
+                return False
+        return True
+
+    def _project(self, table, row, node, builder, path):
+        if node.star or (not node.columns and not node.embeds):
+            result = dict(row)
+        else:
+            result = {}
+        if node.columns:
+            names = self._columns.get(table)
+            for alias, column in node.columns:
+                if names and column not in names:
+                    raise _error('42703', f"column {table}.{column} does not exist")
+                result[alias] = row.get(column)
+        for embed in node.embeds:
+            embed_path = path + (embed.alias,)
+            _, _, many = self._relationship(table, embed.table)
+            related = self._related(table, row, embed, builder, embed_path)
+            if many:
+                related = self._sort(related, builder.orders.get(embed_path, []))
+                offset = builder.offsets.get(embed_path, 0)
+                limit = builder.limits.get(embed_path)
+                related = related[offset:offset + limit if limit is not None else None]
+                result[embed.alias] = [self._project(embed.table, r, embed.node, builder, embed_path) for r in related]
+            else:
+                result[embed.alias] = (
+                    self._project(embed.table, related[0], embed.node, builder, embed_path) if related else None
+                )
+        return result
+
+    def _evaluate(self, table, rows, builder):
+        builder._compiled = {}
+        node = parse_select(builder.columns)
+        self._column_names(table, rows)
+        predicates = self._level_predicates(table, rows, builder, ())
+        top_filters = [f for f in builder.filters if f.path == ()]
+        orders = builder.orders.get((), [])
+        for column, _, _ in orders:
+            self._check_column(table, rows, column)
+
+        candidates, ordered = self._candidates(table, rows, top_filters, orders)
+        offset = builder.offsets.get((), 0)
+        limit = builder.limits.get(())
+
+        def matches(row):
+            return all(p(row) for p in predicates) and self._inner_ok(table, row, node, builder, ())
+
+        count = None
+        if limit == 0 and not builder.count:
+            page = []
+        elif builder.count or not ordered and orders or limit is None:
+            # Contagem (ou ordenação em memória): filtra tudo
+            selected = [row for row in candidates if matches(row)]
+            if builder.count:
+                count = len(selected)
+            if not ordered and orders:
+                selected = self._sort(selected, orders)
+            page = selected[offset:offset + limit if limit is not None else None]
+        else:
+            # Sem contagem e já ordenado: para quando a página está completa
+            page, skipped = [], 0
+            for row in candidates:
+                if not matches(row):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                page.append(row)
+                if len(page) >= limit:
+                    break
+
+        if builder.head:
+            return FakeResponse([], count)
+        data = [self._project(table, row, node, builder, ()) for row in page]
+        return self._finish(builder, data, count)
+
+    @staticmethod
+    def _finish(builder, data, count):
+        if builder.single_mode is None:
+            return FakeResponse(data, count)
+        if len(data) == 1:
+            return FakeResponse(data[0], count)
+        if builder.single_mode == 'maybe' and not data:
+            return FakeResponse(None, count)
+        raise _error('PGRST116', 'JSON object requested, multiple (or no) rows returned',
+                     details=f"The result contains {len(data)} rows")
+
+    def query(self, builder):
+        return self._evaluate(builder.table, self._rows(builder.table), builder)
+
+    def call_rpc(self, builder):
+        function = self.rpcs.get(builder.rpc)
+        if function is None:
+            raise _error('PGRST202', f"Could not find the function public.{builder.rpc} in the schema cache")
+        result = function(self.tables, builder.rpc_params)
+        has_modifiers = builder.filters or builder.orders or builder.limits or builder.offsets or builder.columns != '*'
+        if not isinstance(result, list) or not (has_modifiers or builder.count or builder.single_mode):
+            return FakeResponse(result)
+        # Filtros/ordenação sobre o resultado da função (como no PostgREST)
+        return self._evaluate(f"rpc:{builder.rpc}", result, builder)
+
+
+# --- RPCs (mesmas colunas que as funções do banco) ---
+
+def _contar_salas_por_uf(tables, params=None):
+    complexos = {c['registro_complexo']: c for c in tables['complexos']}
+    per_uf = {}
+    for sala in tables['salas']:
+        uf = complexos[sala['registro_complexo_fk']]['uf_complexo']
+        entry = per_uf.setdefault(uf, {'salas': 0, 'poltronas': 0, 'complexos': set()})
+        entry['salas'] += 1
+        entry['poltronas'] += sala['assentos_total'] or 0
+        entry['complexos'].add(sala['registro_complexo_fk'])
+    return sorted(({
+        'uf_complexo': uf,
+        'total_salas': e['salas'],
+        'total_poltronas': e['poltronas'],
+        'media_poltronas_por_sala': round(e['poltronas'] / e['salas'], 1),
+        'total_complexos': len(e['complexos'])
+    } for uf, e in per_uf.items()), key=lambda r: r['total_salas'], reverse=True)
+
+
+def _contar_obras_por_tipo(tables, params=None):
+    per_type = {}
+    for obra in tables['obras']:
+        entry = per_type.setdefault(obra['tipo_obra'], [0, 0.0])
+        entry[0] += 1
+        entry[1] += obra['duracao_total_minutos'] or 0
+    return sorted(({
+        'tipo_obra': tipo,
+        'total_obras': n,
+        'duracao_media': round(total / n, 1)
+    } for tipo, (n, total) in per_type.items()), key=lambda r: r['total_obras'], reverse=True)
+
+
+def _calcular_market_share_nacional(tables, params=None):
+    totals = {'Nacional': [0, 0.0], 'Estrangeiro': [0, 0.0]}
+    for lancamento in tables['lancamentos']:
+        kind = 'Nacional' if lancamento['pais_obra'] == 'Brasil' else 'Estrangeiro'
+        totals[kind][0] += lancamento['publico_total'] or 0
+        totals[kind][1] += lancamento['renda_total'] or 0
+    publico = sum(t[0] for t in totals.values()) or 1
+    renda = sum(t[1] for t in totals.values()) or 1
+    return [{
+        'tipo': kind,
+        'publico_total': p,
+        'renda_total': round(r, 2),
+        'percentual_publico': round(100 * p / publico, 2),
+        'percentual_renda': round(100 * r / renda, 2)
+    } for kind, (p, r) in totals.items()]
+
+
+def _ranking_distribuidoras(tables, params=None):
+    names = {d['registro_distribuidora']: d['razao_social_distribuidora'] for d in tables['distribuidoras']}
+    per_distributor = {}
+    for lancamento in tables['lancamentos']:
+        entry = per_distributor.setdefault(lancamento['registro_distribuidora_fk'], [0, 0.0, 0])
+        entry[0] += lancamento['publico_total'] or 0
+        entry[1] += lancamento['renda_total'] or 0
+        entry[2] += 1
+    return sorted(({
+        'razao_social_distribuidora': names.get(key),
+        'publico_total': p,
+        'renda_total': round(r, 2),
+        'total_lancamentos': n
+    } for key, (p, r, n) in per_distributor.items()), key=lambda r: r['publico_total'], reverse=True)
+
+
+RPCS = {
+    'contar_salas_por_uf': _contar_salas_por_uf,
+    'contar_obras_por_tipo': _contar_obras_por_tipo,
+    'calcular_market_share_nacional': _calcular_market_share_nacional,
+    'ranking_distribuidoras': _ranking_distribuidoras,
+}
+
+
+class FakeAsyncSupabase:
+    """Interface do cliente assíncrono (`acreate_client`) sobre um `FakeSupabase`."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def table(self, name):
+        return FakeAsyncQueryBuilder(self.backend, name)
+
+    from_ = table
+
+    def rpc(self, name, params=None):
+        return FakeAsyncQueryBuilder(self.backend, None, rpc=name, rpc_params=params)
+
+
+# --- Dados ---
+
+def seed(scale=1.0, random_seed=42) -> dict:
+    """Tabelas sintéticas com a distribuição dos dados reais (ver dataset.py)."""
+    return {**dataset.generate(scale, random_seed), 'filmagem_estrangeira': []}
+
+
+def install(tables=None, latency_ms=0, jitter_ms=0, error_rate=0.0) -> FakeSupabase:
+    """Substitui o cliente Supabase da aplicação pelo backend falso."""
+    from app.services import supabase_service
+
+    client = FakeSupabase(tables if tables is not None else seed(), latency_ms, jitter_ms, error_rate)
+    supabase_service._client = client
+    supabase_service._client_initialized = True
+    return client
+
+
+async def install_async(backend) -> FakeAsyncSupabase:
+    """
+    Substitui o cliente assíncrono da aplicação (modo ASGI) por `backend`
+    (o retornado por `install`). Deve ser chamada dentro do event loop.
+    """
+    from app.services import supabase_service
+
+    client = FakeAsyncSupabase(backend)
+    supabase_service._async_client = client
+    supabase_service._async_client_loop = asyncio.get_running_loop()
+    return client
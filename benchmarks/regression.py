@@ -0,0 +1,406 @@
+# benchmarks/regression.py
+
+"""
+Controlo de regressões de desempenho.
+
+`run` corre o benchmark das rotas (routes.py), grava o resultado no
+histórico local (JSON, uma entrada por execução com o commit do git) e
+compara-o com uma execução de referência; termina com código 1 se alguma
+rota ficou mais lenta ou passou a usar mais memória.
+
+Cada cenário corre em processos próprios (--repeat, 3 por omissão), para que
+o pico de RSS seja o do cenário e não o acumulado e para captar a variação
+entre processos. As latências de cada pedido ficam no histórico e a
+comparação de p50/p99 usa bootstrap: reamostra as duas séries (processos e,
+dentro deles, pedidos) e calcula o intervalo de confiança (95%) da razão
+atual/referência. Só há regressão se
+todo o intervalo estiver acima da tolerância (ex.: p50 com IC [+8%, +17%]
+com tolerância de 5%); ruído entre execuções não falha a verificação. A
+memória alocada por pedido (tracemalloc) e o pico de RSS, quase
+deterministas, usam uma tolerância relativa simples.
+
+Uso:
+    python benchmarks/regression.py run [--baseline main] [--group joins] [--iterations 200]
+    python benchmarks/regression.py compare BASE ATUAL
+    python benchmarks/regression.py history
+
+BASE/ATUAL e --baseline aceitam um commit, ramo ou tag (a execução mais
+recente desse commit no histórico) ou o índice da execução no histórico
+(-1 = a última). Sem --baseline, a referência é a última execução limpa do
+mesmo commit (se houver alterações por gravar) ou a última de outro commit.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTES_SCRIPT = os.path.join(ROOT_DIR, 'benchmarks', 'routes.py')
+DEFAULT_HISTORY = os.path.join(ROOT_DIR, '.benchmarks', 'history.json')
+
+# Tolerâncias relativas (0.05 = 5%) por métrica
+THRESHOLDS = {'p50_ms': 0.05, 'p99_ms': 0.15, 'alloc_kb': 0.10, 'peak_rss_kb': 0.10}
+# Variações absolutas abaixo destas nunca contam (ruído de medição)
+MIN_DELTAS = {'p50_ms': 0.05, 'p99_ms': 0.2, 'alloc_kb': 4.0, 'peak_rss_kb': 2048}
+
+BOOTSTRAP_RESAMPLES = 2000
+CONFIDENCE = 0.95
+
+# Parâmetros que têm de coincidir para que duas execuções sejam comparáveis
+COMPARABLE_PARAMS = ('scale', 'seed', 'latency_ms', 'jitter_ms', 'threads')
+
+DEFAULT_REPEAT = 3
+
+
+# --- git e histórico ---
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def current_commit() -> dict:
+    status = _git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': _git('rev-parse', 'HEAD'),
+        'branch': _git('rev-parse', '--abbrev-ref', 'HEAD'),
+        'dirty': bool(status)
+    }
+
+
+def load_history(path) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['runs']
+
+
+def save_history(path, runs):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'runs': runs}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def find_run(runs, ref):
+    """Execução por índice (-1 = última) ou pela referência git (a mais recente desse commit)."""
+    try:
+        return runs[int(ref)]
+    except ValueError:
+        pass
+    except IndexError:
+        return None
+    commit = _git('rev-parse', '--verify', '--quiet', f"{ref}^{{commit}}") or ref
+    for run in reversed(runs):
+        if run['commit'] and run['commit'].startswith(commit):
+            return run
+    return None
+
+
+def default_baseline(runs, current):
+    """
+    Com alterações por gravar, a última execução limpa do mesmo commit (mede
+    a alteração); senão, a última execução de outro commit.
+    """
+    previous = [run for run in runs if run is not current]
+    if current['dirty']:
+        for run in reversed(previous):
+            if run['commit'] == current['commit'] and not run['dirty']:
+                return run
+    for run in reversed(previous):
+        if run['commit'] != current['commit']:
+            return run
+    return None
+
+
+# --- execução ---
+
+def _run_scenario(name, args) -> dict:
+    command = [sys.executable, ROUTES_SCRIPT, '--json', '--samples', '--scenario', name,
+               '--iterations', str(args.iterations), '--scale', str(args.scale), '--seed', str(args.seed),
+               '--latency-ms', str(args.latency_ms), '--cache', args.cache]
+    proc = subprocess.run(command, cwd=ROOT_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"Falhou o cenário '{name}':\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout)
+
+
+def run_benchmarks(args) -> dict:
+    """
+    Corre routes.py um cenário de cada vez, `--repeat` vezes (em rondas, para
+    que uma variação lenta da máquina afete todos os cenários por igual).
+    """
+    sys.path.insert(0, os.path.dirname(ROUTES_SCRIPT))
+    import routes
+
+    scenarios = [(group, name) for group, name, _ in routes.SCENARIOS
+                 if not args.groups or group in args.groups]
+    if args.scenarios:
+        scenarios = [(group, name) for group, name in scenarios if name in args.scenarios]
+
+    results = {}
+    python = sys.version.split()[0]
+    for round_number in range(1, args.repeat + 1):
+        for group, name in scenarios:
+            report = _run_scenario(name, args)
+            python = report['python']
+            for result in report['results']:
+                entry = results.setdefault(f"{name} [{result['cache']}]", {
+                    'group': group, 'path': result['path'], 'samples_ms': [],
+                    'alloc_kb': [], 'peak_rss_kb': [], 'statuses': {}
+                })
+                entry['samples_ms'].append(result['samples_ms'])
+                entry['alloc_kb'].append(result['alloc_kb'])
+                entry['peak_rss_kb'].append(report['peak_rss_kb'])
+                for status, count in result['statuses'].items():
+                    entry['statuses'][status] = entry['statuses'].get(status, 0) + count
+        print(f"  ronda {round_number}/{args.repeat}: {len(scenarios)} cenários", file=sys.stderr)
+
+    # Latências de todos os processos juntas; memória pela mediana
+    for entry in results.values():
+        pooled = sorted(ms for samples in entry['samples_ms'] for ms in samples)
+        entry['p50_ms'] = _percentile(pooled, 50)
+        entry['p99_ms'] = _percentile(pooled, 99)
+        entry['alloc_kb'] = statistics.median(entry['alloc_kb'])
+        entry['peak_rss_kb'] = statistics.median(entry['peak_rss_kb'])
+
+    return {
+        **current_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': python,
+        'params': {'scale': args.scale, 'seed': args.seed, 'latency_ms': args.latency_ms,
+                   'jitter_ms': 0, 'threads': 1, 'iterations': args.iterations, 'repeat': args.repeat},
+        'results': results
+    }
+
+
+# --- estatística ---
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def _resample(rng, groups):
+    """
+    Reamostragem em dois níveis: processos e, dentro de cada um, pedidos.
+    Assim o intervalo inclui a variação entre processos (estado da máquina,
+    disposição da memória) e não só a variação entre pedidos.
+    """
+    values = []
+    for samples in rng.choices(groups, k=len(groups)):
+        values.extend(rng.choices(samples, k=len(samples)))
+    values.sort()
+    return values
+
+
+def bootstrap_ratio(baseline, current, pct, resamples=BOOTSTRAP_RESAMPLES, random_seed=0):
+    """Intervalo de confiança da razão percentil(atual)/percentil(referência)."""
+    rng = random.Random(random_seed)
+    ratios = []
+    for _ in range(resamples):
+        base = _percentile(_resample(rng, baseline), pct)
+        cur = _percentile(_resample(rng, current), pct)
+        ratios.append(cur / base if base > 0 else 1.0)
+    ratios.sort()
+    tail = (1 - CONFIDENCE) / 2
+    return ratios[int(tail * resamples)], ratios[min(resamples - 1, int((1 - tail) * resamples))]
+
+
+def compare_metric(metric, base_result, cur_result):
+    """Compara uma métrica; retorna a linha do diff com o veredicto."""
+    base, cur = base_result[metric], cur_result[metric]
+    change = (cur - base) / base if base else 0.0
+    row = {'metric': metric, 'baseline': base, 'current': cur, 'change': change, 'ci': None}
+    threshold = THRESHOLDS[metric]
+    significant = abs(cur - base) >= MIN_DELTAS[metric]
+
+    if metric in ('p50_ms', 'p99_ms'):
+        low, high = bootstrap_ratio(base_result['samples_ms'], cur_result['samples_ms'],
+                                    50 if metric == 'p50_ms' else 99)
+        row['ci'] = (low - 1, high - 1)
+        if significant and low > 1 + threshold:
+            row['verdict'] = 'regression'
+        elif significant and high < 1 - threshold:
+            row['verdict'] = 'improvement'
+        else:
+            row['verdict'] = 'unchanged'
+    elif significant and change > threshold:
+        row['verdict'] = 'regression'
+    elif significant and change < -threshold:
+        row['verdict'] = 'improvement'
+    else:
+        row['verdict'] = 'unchanged'
+    return row
+
+
+def _failed(result) -> bool:
+    # Respostas fora de 2xx (como routes.failed)
+    return any(not status.startswith('2') for status in result['statuses'])
+
+
+def compare_runs(baseline, current) -> dict:
+    """
+    Compara as execuções cenário a cenário. Um cenário com respostas fora de
+    2xx na execução atual é uma regressão (estados), e as latências e a
+    memória só se comparam quando os dois lados responderam só 2xx.
+    """
+    mismatched = [param for param in COMPARABLE_PARAMS
+                  if baseline['params'].get(param) != current['params'].get(param)]
+    rows = {}
+    for key, cur_result in current['results'].items():
+        base_result = baseline['results'].get(key)
+        base_statuses = base_result['statuses'] if base_result is not None else None
+        if _failed(cur_result) or (base_result is not None and base_statuses != cur_result['statuses']):
+            rows.setdefault(key, []).append({'metric': 'statuses', 'baseline': base_statuses,
+                                             'current': cur_result['statuses'], 'verdict': 'regression'})
+        if base_result is None or _failed(base_result) or _failed(cur_result):
+            continue
+        for metric in THRESHOLDS:
+            rows.setdefault(key, []).append(compare_metric(metric, base_result, cur_result))
+    regressions = sum(1 for metrics in rows.values() for row in metrics if row['verdict'] == 'regression')
+    return {'mismatched_params': mismatched, 'rows': rows, 'regressions': regressions,
+            'missing': sorted(set(baseline['results']) - set(current['results']))}
+
+
+# --- saída ---
+
+_UNITS = {'p50_ms': ' ms', 'p99_ms': ' ms', 'alloc_kb': ' KB', 'peak_rss_kb': ' KB'}
+_VERDICTS = {'regression': 'REGRESSÃO', 'improvement': 'melhoria', 'unchanged': ''}
+
+
+def _describe(run):
+    commit = (run['commit'] or '?')[:10]
+    return f"{commit}{' (alterado)' if run.get('dirty') else ''} {run['branch'] or ''} {run['timestamp']}"
+
+
+def print_comparison(baseline, current, comparison, verbose=False):
+    print(f"Referência: {_describe(baseline)}")
+    print(f"Atual:      {_describe(current)}")
+    if comparison['mismatched_params']:
+        print(f"AVISO: parâmetros diferentes ({', '.join(comparison['mismatched_params'])}); "
+              "a comparação pode não ser válida.")
+
+    print(f"\n{'cenário':<40}{'métrica':<13}{'referência':>14}{'atual':>14}{'Δ':>9}  {'IC 95%':<18}")
+    for key, metrics in comparison['rows'].items():
+        for row in metrics:
+            if row['verdict'] == 'unchanged' and not verbose:
+                continue
+            if row['metric'] == 'statuses':
+                print(f"{key:<40}{'estados':<13}{json.dumps(row['baseline']):>14}"
+                      f"{json.dumps(row['current']):>14}  REGRESSÃO")
+                continue
+            unit = _UNITS[row['metric']]
+            ci = f"[{row['ci'][0]:+.1%}, {row['ci'][1]:+.1%}]" if row['ci'] else ''
+            print(f"{key:<40}{row['metric']:<13}{row['baseline']:>11.2f}{unit}{row['current']:>11.2f}{unit}"
+                  f"{row['change']:>+9.1%}  {ci:<18}{_VERDICTS[row['verdict']]}")
+    for key in comparison['missing']:
+        print(f"{key:<40}(sem resultado na execução atual)")
+
+    if comparison['regressions']:
+        print(f"\n{comparison['regressions']} regressão(ões) acima da tolerância "
+              f"({', '.join(f'{m} {t:.0%}' for m, t in THRESHOLDS.items())}).")
+    else:
+        print("\nSem regressões.")
+
+
+def _summary(run):
+    return {key: {metric: result[metric] for metric in THRESHOLDS} for key, result in run['results'].items()}
+
+
+# --- comandos ---
+
+def cmd_run(args, runs):
+    current = run_benchmarks(args)
+    # A referência é procurada nas execuções anteriores: `--baseline HEAD` ou
+    # `-1` não podem resolver para a execução acabada de gravar
+    previous = [run for run in runs if run is not current]
+    baseline = find_run(previous, args.baseline) if args.baseline else default_baseline(previous, current)
+    if not args.no_save:
+        runs.append(current)
+        save_history(args.history, runs)
+
+    if baseline is None and args.baseline:
+        raise SystemExit(f"Execução de referência '{args.baseline}' não encontrada no histórico.")
+    if baseline is None:
+        failures = sorted(key for key, result in current['results'].items() if _failed(result))
+        if args.json:
+            print(json.dumps({'current': _summary(current), 'baseline': None, 'failed': failures},
+                             indent=2, ensure_ascii=False))
+        else:
+            print("Sem execução de referência no histórico; resultado gravado como primeira referência.")
+            for key in failures:
+                print(f"{key:<40}respostas fora de 2xx: {json.dumps(current['results'][key]['statuses'])}")
+        return 1 if failures else 0
+    return report(baseline, current, args)
+
+
+def cmd_compare(args, runs):
+    baseline, current = find_run(runs, args.baseline), find_run(runs, args.current)
+    if baseline is None or current is None:
+        raise SystemExit("Execução não encontrada no histórico.")
+    return report(baseline, current, args)
+
+
+def cmd_history(args, runs):
+    for index, run in enumerate(runs):
+        print(f"{index:>4}  {_describe(run)}  {len(run['results'])} cenários  {run['params']}")
+    return 0
+
+
+def report(baseline, current, args):
+    comparison = compare_runs(baseline, current)
+    if args.json:
+        print(json.dumps({
+            'baseline': baseline['commit'], 'current': current['commit'],
+            'mismatched_params': comparison['mismatched_params'],
+            'regressions': comparison['regressions'],
+            'rows': comparison['rows']
+        }, indent=2, ensure_ascii=False))
+    else:
+        print_comparison(baseline, current, comparison, args.verbose)
+    return 1 if comparison['regressions'] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='Ficheiro JSON do histórico.')
+    parser.add_argument('--json', action='store_true', help='Imprime a comparação em JSON.')
+    parser.add_argument('--verbose', action='store_true', help='Mostra também as métricas sem alteração.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Corre o benchmark, grava e compara.')
+    run_parser.add_argument('--baseline', help='Commit/ramo/índice de referência.')
+    run_parser.add_argument('--iterations', type=int, default=200, help='Pedidos por cenário e processo.')
+    run_parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Processos por cenário.')
+    run_parser.add_argument('--scale', type=float, default=1.0)
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--latency-ms', type=float, default=0)
+    run_parser.add_argument('--cache', choices=('cold', 'warm', 'both'), default='both')
+    run_parser.add_argument('--group', action='append', dest='groups')
+    run_parser.add_argument('--scenario', action='append', dest='scenarios')
+    run_parser.add_argument('--no-save', action='store_true', help='Não grava a execução no histórico.')
+
+    compare_parser = commands.add_parser('compare', help='Compara duas execuções do histórico.')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current', nargs='?', default='-1')
+
+    commands.add_parser('history', help='Lista as execuções gravadas.')
+
+    args = parser.parse_args()
+    runs = load_history(args.history)
+    handler = {'run': cmd_run, 'compare': cmd_compare, 'history': cmd_history}[args.command]
+    sys.exit(handler(args, runs))
+
+
+if __name__ == '__main__':
+    main()
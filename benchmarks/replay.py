@@ -0,0 +1,245 @@
+# benchmarks/replay.py
+
+"""
+Reprodução do tráfego capturado (CAPTURE_ENABLED=1, ver capture_service).
+
+Lê os ficheiros de captura (incluindo os rodados: traffic.jsonl.3, .2, .1 e
+traffic.jsonl, por esta ordem) e volta a enviar os pedidos GET com o ritmo
+original dividido por --speedup (0 = o mais depressa possível), com no
+máximo --concurrency pedidos em simultâneo (o equivalente às --threads do
+Gunicorn). Reporta a distribuição das latências, a taxa de erros, os estados
+e o atraso em relação ao ritmo pedido (atraso alto = concorrência a menos).
+
+Por omissão corre em processo contra o backend falso (dataset.py, com
+--latency-ms a simular o Supabase), com o cache em memória e o controlo de
+admissão ativos e sem rate limiting (todo o tráfego viria de um só cliente).
+As variáveis de ambiente continuam a mandar, por exemplo para comparar TTLs:
+
+    CACHE_DEFAULT_TTL=60 python benchmarks/replay.py traffic.jsonl --speedup 10 --concurrency 16
+
+Com --url os pedidos vão para um servidor já a correr (ex.: gunicorn local).
+
+Uso:
+    python benchmarks/replay.py FICHEIRO [FICHEIRO ...] [--speedup 1] [--concurrency 16]
+                                [--limit N] [--url http://localhost:8000]
+                                [--scale 1] [--latency-ms 20] [--jitter-ms 5] [--json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT_DIR, os.path.dirname(os.path.abspath(__file__))]
+
+from routes import percentile  # noqa: E402
+
+
+def _rotated_files(path):
+    """O ficheiro e as cópias rodadas, da mais antiga para a mais recente."""
+    backups = [p for p in glob.glob(f"{glob.escape(path)}.*") if p.rsplit('.', 1)[1].isdigit()]
+    backups.sort(key=lambda p: int(p.rsplit('.', 1)[1]), reverse=True)
+    return backups + ([path] if os.path.exists(path) else [])
+
+
+def load_capture(paths, limit=None) -> tuple:
+    """Pedidos GET capturados, por ordem de chegada; e o número de linhas ignoradas."""
+    entries, skipped = [], 0
+    for path in paths:
+        for filename in _rotated_files(path):
+            with open(filename, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    if entry.get('method') != 'GET':
+                        skipped += 1
+                        continue
+                    entries.append(entry)
+    entries.sort(key=lambda entry: entry['ts'])
+    return (entries[:limit] if limit else entries), skipped
+
+
+def request_target(entry) -> str:
+    args = [tuple(pair) for pair in entry.get('args') or []]
+    return f"{entry['path']}?{urlencode(args)}" if args else entry['path']
+
+
+def _configure_environment(args):
+    os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+    os.environ.setdefault('SUPABASE_KEY', 'replay')
+    os.environ['APP_PROFILE'] = 'benchmark'
+    for name in ('PRELOAD_WARMUP', 'CAPTURE_ENABLED', 'RATE_LIMIT_ENABLED'):
+        os.environ.pop(name, None)
+    # Ao contrário do perfil, o controlo de admissão fica ligado: faz parte
+    # do comportamento a reproduzir
+    if args.no_admission:
+        os.environ['ADMISSION_ENABLED'] = '0'
+    else:
+        os.environ.setdefault('ADMISSION_ENABLED', '1')
+
+
+def in_process_sender(args):
+    """Envia os pedidos à aplicação em processo, sobre o backend falso."""
+    _configure_environment(args)
+    import fake_backend
+    from run import app
+
+    fake_backend.install(fake_backend.seed(args.scale, args.seed), latency_ms=args.latency_ms,
+                         jitter_ms=args.jitter_ms)
+    client = app.test_client()
+    return lambda target: client.get(target).status_code
+
+
+def http_sender(args):
+    """Envia os pedidos a um servidor HTTP (ligações mantidas entre pedidos)."""
+    import httpx
+
+    client = httpx.Client(base_url=args.url, timeout=args.timeout,
+                          limits=httpx.Limits(max_connections=args.concurrency))
+    return lambda target: client.get(target).status_code
+
+
+def replay(entries, send, speedup, concurrency) -> list:
+    """
+    Envia os pedidos segundo o ritmo capturado. Retorna, por pedido:
+    (entrada, estado HTTP ou nome da exceção, latência ms, atraso ms).
+    """
+    results = []
+    lock = threading.Lock()
+    origin = entries[0]['ts'] if entries else 0.0
+    started = time.perf_counter()
+
+    def one(entry, due):
+        begin = time.perf_counter()
+        try:
+            status = send(request_target(entry))
+        except Exception as e:
+            status = type(e).__name__
+        elapsed = (time.perf_counter() - begin) * 1000
+        with lock:
+            results.append((entry, status, elapsed, max(0.0, (begin - due) * 1000)))
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        for entry in entries:
+            due = started + ((entry['ts'] - origin) / speedup if speedup else 0.0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, entry, due)
+    return results
+
+
+def summarize(values) -> dict:
+    values = sorted(values)
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    return {'p50': round(percentile(values, 50), 2), 'p95': round(percentile(values, 95), 2),
+            'p99': round(percentile(values, 99), 2), 'max': round(values[-1], 2)}
+
+
+def _is_error(status) -> bool:
+    # Exceções (ligação recusada, timeout) e respostas 5xx
+    return not isinstance(status, int) or status >= 500
+
+
+def build_report(entries, results, wall, args) -> dict:
+    statuses, routes = {}, {}
+    for entry, status, elapsed, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        route = routes.setdefault(entry.get('route') or entry['path'], {
+            'requests': 0, 'errors': 0, 'latencies': [], 'captured': []
+        })
+        route['requests'] += 1
+        route['errors'] += _is_error(status)
+        route['latencies'].append(elapsed)
+        if entry.get('latency_ms') is not None:
+            route['captured'].append(entry['latency_ms'])
+
+    errors = sum(1 for _, status, _, _ in results if _is_error(status))
+    captured_span = entries[-1]['ts'] - entries[0]['ts'] if len(entries) > 1 else 0.0
+    return {
+        'target': args.url or 'em processo (backend falso)',
+        'speedup': args.speedup,
+        'concurrency': args.concurrency,
+        'requests': len(results),
+        'duration_s': round(wall, 2),
+        'offered_rps': round(len(entries) / captured_span * args.speedup, 1) if captured_span and args.speedup else None,
+        'achieved_rps': round(len(results) / wall, 1) if wall else 0.0,
+        'error_rate': round(errors / len(results), 4) if results else 0.0,
+        'statuses': statuses,
+        'latency_ms': summarize([elapsed for _, _, elapsed, _ in results]),
+        'lag_ms': summarize([lag for _, _, _, lag in results]),
+        'routes': {
+            name: {
+                'requests': route['requests'],
+                'error_rate': round(route['errors'] / route['requests'], 4),
+                'latency_ms': summarize(route['latencies']),
+                'captured_latency_ms': summarize(route['captured'])
+            }
+            for name, route in sorted(routes.items(), key=lambda item: -item[1]['requests'])
+        }
+    }
+
+
+def print_report(report, skipped):
+    print(f"Alvo: {report['target']}; speedup {report['speedup'] or 'máximo'}, "
+          f"concorrência {report['concurrency']}")
+    print(f"{report['requests']} pedidos em {report['duration_s']} s "
+          f"({report['achieved_rps']} req/s; ritmo pedido: {report['offered_rps'] or 'máximo'} req/s); "
+          f"{skipped} linhas ignoradas")
+    latency, lag = report['latency_ms'], report['lag_ms']
+    print(f"Latência: p50 {latency['p50']} ms, p95 {latency['p95']} ms, p99 {latency['p99']} ms, "
+          f"máx {latency['max']} ms")
+    print(f"Atraso face ao ritmo: p50 {lag['p50']} ms, p99 {lag['p99']} ms")
+    print(f"Taxa de erros (5xx/exceções): {report['error_rate']:.2%}; estados: "
+          + ' '.join(f"{s}×{n}" for s, n in sorted(report['statuses'].items())))
+
+    print(f"\n{'rota':<52}{'pedidos':>8}{'erros':>8}{'p50':>9}{'p99':>9}{'p99 capt.':>11}")
+    for name, route in report['routes'].items():
+        print(f"{name[:51]:<52}{route['requests']:>8}{route['error_rate']:>8.1%}"
+              f"{route['latency_ms']['p50']:>9.2f}{route['latency_ms']['p99']:>9.2f}"
+              f"{route['captured_latency_ms']['p99']:>11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='+', help='Ficheiros de captura (CAPTURE_FILE).')
+    parser.add_argument('--speedup', type=float, default=1.0, help='Fator de aceleração do ritmo (0 = máximo).')
+    parser.add_argument('--concurrency', type=int, default=16, help='Pedidos em simultâneo.')
+    parser.add_argument('--limit', type=int, help='Só os primeiros N pedidos.')
+    parser.add_argument('--url', help='Servidor alvo (por omissão, a aplicação em processo).')
+    parser.add_argument('--timeout', type=float, default=30, help='Timeout por pedido com --url (s).')
+    parser.add_argument('--scale', type=float, default=1.0, help='Escala do conjunto de dados do backend falso.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency-ms', type=float, default=20, help='Latência simulada do backend falso.')
+    parser.add_argument('--jitter-ms', type=float, default=5)
+    parser.add_argument('--no-admission', action='store_true', help='Desliga o controlo de admissão.')
+    parser.add_argument('--json', action='store_true', help='Imprime o relatório em JSON.')
+    args = parser.parse_args()
+
+    entries, skipped = load_capture(args.files, args.limit)
+    if not entries:
+        raise SystemExit("Nenhum pedido GET encontrado nos ficheiros de captura.")
+
+    send = http_sender(args) if args.url else in_process_sender(args)
+    started = time.perf_counter()
+    results = replay(entries, send, args.speedup, args.concurrency)
+    report = build_report(entries, results, time.perf_counter() - started, args)
+
+    if args.json:
+        print(json.dumps({**report, 'skipped': skipped}, indent=2, ensure_ascii=False))
+    else:
+        print_report(report, skipped)
+
+
+if __name__ == '__main__':
+    main()
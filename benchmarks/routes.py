@@ -0,0 +1,232 @@
+# benchmarks/routes.py
+
+"""
+Benchmark das rotas da API contra um backend falso em processo.
+
+Corre cada rota de `data.py` e dos blueprints `endpoints_*` sobre tabelas em
+memória geradas por dataset.py (tamanhos e distribuições realistas,
+multiplicados por --scale), sem acesso à rede, e reporta o débito
+(pedidos/s) e as latências p50/p95/p99 por cenário:
+
+  - paging:        primeiras páginas, páginas seguintes (last_id) e filtros;
+  - joins:         pesquisas com embedded selects (salas, obras, lançamentos);
+  - kpis:          estatísticas calculadas por RPC;
+  - serialization: páginas de 100 registos com JOINs (custo do JSON);
+  - producao:      filmagem estrangeira (só /stats: a listagem e a pesquisa
+                   por país chamam métodos que o FilmagemService não tem e
+                   respondem sempre 500).
+
+Cada cenário corre com o cache vazio antes de cada pedido ('cold': mede o
+caminho completo até ao backend) e/ou com o cache quente ('warm'). Depois da
+medição, alguns pedidos extra correm com o tracemalloc para medir a memória
+alocada por pedido (alloc_kb); o relatório inclui o pico de RSS do processo.
+Um cenário com respostas fora de 2xx é marcado como falhado ('failed'): as
+latências de respostas de erro não medem a rota.
+O regression.py usa --scenario e --samples para comparar execuções.
+
+Uso:
+    python benchmarks/routes.py [--iterations 200] [--scale 1.0] [--seed 42] [--latency-ms 0]
+                                [--jitter-ms 0] [--cache cold|warm|both] [--threads 1]
+                                [--group joins] [--scenario NOME] [--samples] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT_DIR, os.path.dirname(os.path.abspath(__file__))]
+
+# (grupo, nome, caminho)
+SCENARIOS = [
+    ('paging', 'data/salas', '/api/v1/data/salas?limit=10'),
+    ('paging', 'data/salas filtrado', '/api/v1/data/salas?limit=10&situacao_sala=EM%20FUNCIONAMENTO'),
+    ('paging', 'data/obras página seguinte', '/api/v1/data/obras?limit=10&last_id=B000010000'),
+    ('paging', 'data/lancamentos', '/api/v1/data/lancamentos?limit=25'),
+    ('joins', 'pesquisa-salas', '/api/v1/pesquisa-salas?limit=10'),
+    ('joins', 'pesquisa-salas página seguinte', '/api/v1/pesquisa-salas?limit=10&last_id=00001500'),
+    ('joins', 'pesquisa-salas por UF', '/api/v1/pesquisa-salas?limit=10&complexos.uf_complexo=SP'),
+    ('joins', 'pesquisa-obras', '/api/v1/pesquisa-obras?limit=10&tipo_obra=Longa-metragem'),
+    ('joins', 'pesquisa-obras por país', '/api/v1/pesquisa-obras?limit=10&paises_origem.pais_origem=Fran%C3%A7a'),
+    ('joins', 'obras/pesquisa', '/api/v1/obras/pesquisa?limit=10'),
+    ('joins', 'lancamentos/pesquisa', '/api/v1/lancamentos/pesquisa?limit=10'),
+    ('kpis', 'salas_por_uf', '/api/v1/estatisticas/salas_por_uf'),
+    ('kpis', 'obras_por_tipo', '/api/v1/estatisticas/obras_por_tipo'),
+    ('kpis', 'obras/por_tipo', '/api/v1/obras/estatisticas/por_tipo'),
+    ('kpis', 'market_share', '/api/v1/estatisticas/market_share'),
+    ('kpis', 'ranking_distribuidoras', '/api/v1/estatisticas/ranking_distribuidoras'),
+    ('serialization', 'pesquisa-salas limit=100', '/api/v1/pesquisa-salas?limit=100'),
+    ('serialization', 'lancamentos limit=100', '/api/v1/lancamentos/pesquisa?limit=100'),
+    ('serialization', 'data/obras limit=100', '/api/v1/data/obras?limit=100'),
+    ('producao', 'filmagem stats', '/api/v1/producao/filmagem-estrangeira/stats'),
+]
+
+
+def _configure_environment():
+    # Sem rede, sem disco e sem proteções de carga: mede-se só a aplicação
+    os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+    os.environ.setdefault('SUPABASE_KEY', 'benchmark')
+    # (perfil 'benchmark' de app/config/settings.py, sem variáveis a sobrepô-lo)
+    os.environ['APP_PROFILE'] = 'benchmark'
+    for name in ('PRELOAD_WARMUP', 'DISK_CACHE_ENABLED', 'RATE_LIMIT_ENABLED', 'ADMISSION_ENABLED', 'SNAPSHOT_DIR'):
+        os.environ.pop(name, None)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def peak_rss_kb() -> int:
+    """Pico de memória residente do processo (KB)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em bytes no macOS e em KB no Linux
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def measure_allocations(one, requests=5) -> float:
+    """Pico médio de memória alocada (KB) durante um pedido, com o tracemalloc."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            one(None)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return round(statistics.fmean(peaks) / 1024, 1)
+
+
+def failed(statuses) -> bool:
+    """Se houve respostas fora de 2xx (estados como no relatório: {'200': n})."""
+    return any(not status.startswith('2') for status in statuses)
+
+
+def run_scenario(client, path, iterations, cold, threads, clear_cache, samples=False):
+    """Executa `iterations` pedidos; retorna latências (ms), estados e memória alocada."""
+    def one(_):
+        if cold:
+            clear_cache()
+        started = time.perf_counter()
+        status = client.get(path).status_code
+        return (time.perf_counter() - started) * 1000, status
+
+    # Aquecimento (imports preguiçosos, índices do backend falso)
+    for _ in range(min(5, iterations)):
+        one(None)
+
+    started = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(threads) as pool:
+            results = list(pool.map(one, range(iterations)))
+    else:
+        results = [one(None) for _ in range(iterations)]
+    wall = time.perf_counter() - started
+    alloc_kb = measure_allocations(one)
+
+    latencies = sorted(ms for ms, _ in results)
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    stats = {
+        'iterations': iterations,
+        'throughput_rps': round(iterations / wall, 1),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'alloc_kb': alloc_kb,
+        'statuses': statuses,
+        'failed': failed(statuses)
+    }
+    if samples:
+        stats['samples_ms'] = [round(ms, 3) for ms, _ in results]
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplica o tamanho das tabelas.')
+    parser.add_argument('--seed', type=int, default=42, help='Semente do conjunto de dados.')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Latência simulada por chamada ao backend.')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Variação aleatória somada à latência.')
+    parser.add_argument('--cache', choices=('cold', 'warm', 'both'), default='both')
+    parser.add_argument('--threads', type=int, default=1, help='Pedidos em paralelo.')
+    parser.add_argument('--group', action='append', dest='groups', help='Só estes grupos de cenários.')
+    parser.add_argument('--scenario', action='append', dest='scenarios', help='Só estes cenários (pelo nome).')
+    parser.add_argument('--samples', action='store_true', help='Inclui as latências de cada pedido no JSON.')
+    parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON.')
+    args = parser.parse_args()
+
+    _configure_environment()
+    import fake_backend
+    from app.services import cache_service
+    from run import app
+
+    seed_started = time.perf_counter()
+    tables = fake_backend.seed(args.scale, args.seed)
+    fake_backend.install(tables, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    seed_ms = (time.perf_counter() - seed_started) * 1000
+
+    client = app.test_client()
+    modes = ['cold', 'warm'] if args.cache == 'both' else [args.cache]
+    results = []
+    for group, name, path in SCENARIOS:
+        if args.groups and group not in args.groups:
+            continue
+        if args.scenarios and name not in args.scenarios:
+            continue
+        for mode in modes:
+            cache_service.clear()
+            stats = run_scenario(client, path, args.iterations, mode == 'cold', args.threads, cache_service.clear,
+                                 samples=args.samples)
+            results.append({'group': group, 'name': name, 'path': path, 'cache': mode, **stats})
+
+    report = {
+        'scale': args.scale,
+        'seed': args.seed,
+        'rows': {table: len(rows) for table, rows in tables.items()},
+        'seed_ms': round(seed_ms, 1),
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'threads': args.threads,
+        'python': sys.version.split()[0],
+        'peak_rss_kb': peak_rss_kb(),
+        'results': results
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Escala {args.scale} ({sum(report['rows'].values())} linhas), latência simulada "
+          f"{args.latency_ms} ms, {args.threads} thread(s), {args.iterations} pedidos por cenário")
+    print(f"{'grupo':<14}{'cenário':<32}{'cache':<6}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'KB/ped':>9}  estados")
+    for r in results:
+        statuses = ' '.join(f"{s}×{n}" for s, n in sorted(r['statuses'].items()))
+        if r['failed']:
+            statuses += '  FALHOU'
+        print(f"{r['group']:<14}{r['name']:<32}{r['cache']:<6}{r['throughput_rps']:>9.1f}"
+              f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['alloc_kb']:>9.1f}  {statuses}")
+    print(f"Pico de RSS: {report['peak_rss_kb'] / 1024:.1f} MB")
+    failures = sorted({r['name'] for r in results if r['failed']})
+    if failures:
+        print(f"Cenários com respostas fora de 2xx (latências sem significado): {', '.join(failures)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/startup.py
+
+"""
+Benchmark de arranque a frio.
+
+Cada execução corre num processo Python novo e mede:
+  - import_ms: tempo de `import run` (inclui create_app());
+  - first_response_ms: tempo do primeiro pedido a cada rota indicada;
+  - os módulos com maior tempo de importação acumulado (python -X importtime).
+
+Uso:
+    python benchmarks/startup.py [--runs 5] [--path / --path /apispec.json] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD_SCRIPT = r'''
+import json, sys, time
+started = time.perf_counter()
+import run
+import_ms = (time.perf_counter() - started) * 1000
+client = run.app.test_client()
+first_response = {}
+for path in sys.argv[1:]:
+    t0 = time.perf_counter()
+    status = client.get(path).status_code
+    first_response[path] = {'ms': (time.perf_counter() - t0) * 1000, 'status': status}
+print("__RESULT__" + json.dumps({'import_ms': import_ms, 'first_response': first_response}))
+'''
+
+
+def _child_env():
+    env = dict(os.environ)
+    # O cliente Supabase é criado de forma preguiçosa: valores fictícios
+    # bastam para medir o arranque sem acesso à rede.
+    env.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+    env.setdefault('SUPABASE_KEY', 'benchmark')
+    env.setdefault('PRELOAD_WARMUP', '0')
+    return env
+
+
+def run_once(paths):
+    proc = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, *paths],
+        cwd=ROOT_DIR, env=_child_env(), capture_output=True, text=True, check=True
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith('__RESULT__'):
+            return json.loads(line[len('__RESULT__'):])
+    raise RuntimeError(f"Saída inesperada do processo filho:\n{proc.stdout}\n{proc.stderr}")
+
+
+def top_imports(limit=10):
+    """Módulos de topo com maior tempo de importação acumulado (microssegundos)."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import run'],
+        cwd=ROOT_DIR, env=_child_env(), capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append((name.strip(), int(cumulative_us)))
+    # Apenas pacotes (sem submódulos) para a lista ficar legível
+    top_level = [(name, us) for name, us in entries if '.' not in name]
+    return sorted(top_level, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', action='append', dest='paths')
+    parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON.')
+    args = parser.parse_args()
+    paths = args.paths or ['/', '/apispec.json']
+
+    results = [run_once(paths) for _ in range(args.runs)]
+    report = {
+        'runs': args.runs,
+        'import_ms': statistics.median(r['import_ms'] for r in results),
+        'first_response_ms': {
+            path: statistics.median(r['first_response'][path]['ms'] for r in results)
+            for path in paths
+        },
+        'top_imports_ms': {name: us / 1000 for name, us in top_imports()}
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Execuções: {report['runs']} (medianas)")
+    print(f"  import run / create_app: {report['import_ms']:8.1f} ms")
+    for path, ms in report['first_response_ms'].items():
+        print(f"  primeiro GET {path:<20} {ms:8.1f} ms")
+    print("Importações mais pesadas (acumulado):")
+    for name, ms in report['top_imports_ms'].items():
+        print(f"  {name:<30} {ms:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+# gunicorn.conf.py
+
+# Lido automaticamente pelo Gunicorn (ficheiro padrão no diretório atual).
+# Os parâmetros passados no 'entrypoint' do app.yaml têm precedência.
+
+import gc
+import os
+
+# Carrega a aplicação (e aquece os caches, se PRELOAD_WARMUP=1) uma única vez
+# no master, antes do fork: os workers herdam os dados via copy-on-write.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+
+def when_ready(server):
+    # Move os objetos já criados (caches aquecidos) para a geração permanente:
+    # o GC dos workers deixa de os percorrer e as páginas não são copiadas.
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    # Ligações HTTP abertas no master durante o aquecimento não podem
+    # ser partilhadas entre processos.
+    from app.services.supabase_service import reset_connections
+    reset_connections()
+    # Reabre as ligações em segundo plano: o primeiro pedido já não paga o
+    # handshake TCP/TLS
+    from app.services import http_pool_service
+    http_pool_service.prewarm_in_background()